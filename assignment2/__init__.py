@@ -1,8 +1,8 @@
-import bpy
-
-from .planes import *
-from .rotation import *
-from .smoothing import *
+try:
+    import bpy
+except ImportError:
+    # Outside of Blender only the NumPy core (assignment2.core) can be used
+    bpy = None
 
 bl_info = {
     "name": "GDP Practical Assignment 2",
@@ -15,20 +15,30 @@ bl_info = {
     "category": "Mesh",
 }
 
-classes = [
-    AxisOfRotation,
-    AxisOfRotationGizmo,
-    PlanesPropertyGroup,
-    PlanesList,
-    CreatePlaneOperator,
-    RemovePlaneOperator,
-    CreateExamplePlanesOperator,
-    DistanceToPlanes,
-    MoveToOptimalPositionOperator,
-    PlanesGizmo,
-    VectorsToPlanesGizmo,
-    ExplicitLaplaceSmoothing,
-]
+if bpy is not None:
+    from .planes import *
+    from .rotation import *
+    from .smoothing import *
+
+    classes = [
+        AxisOfRotation,
+        AxisOfRotationGizmo,
+        PlanesPropertyGroup,
+        PlanesList,
+        CreatePlaneOperator,
+        RemovePlaneOperator,
+        CreateExamplePlanesOperator,
+        DetectPlanesOperator,
+        SavePlanesOperator,
+        LoadPlanesOperator,
+        DistanceToPlanes,
+        MoveToOptimalPositionOperator,
+        PlanesGizmo,
+        VectorsToPlanesGizmo,
+        ExplicitLaplaceSmoothing,
+        ModalExplicitLaplaceSmoothing,
+        ClearSmoothingCache,
+    ]
 
 
 def register():
@@ -36,6 +46,7 @@ def register():
         bpy.utils.register_class(c)
 
     bpy.types.VIEW3D_MT_object.append(ExplicitLaplaceSmoothing.menu_func)
+    bpy.types.VIEW3D_MT_object.append(ModalExplicitLaplaceSmoothing.menu_func)
 
     rotation.register()
     planes.register()
@@ -0,0 +1,19 @@
+# The Blender-free numerical core of the add-on.
+# Everything in here only depends on NumPy / SciPy, so it can be imported by plain CPython processes;
+# the Blender-facing modules (assignment2.planes, .rotation, .smoothing) are thin adapters around it.
+# The eigensolvers, sparse factorizations and the job server (assignment2.core.geodesics, .multigrid, .spectral
+# and .server) are slow to import, so they aren't imported here; import them from their modules when needed.
+from .cache import *
+from .components import *
+from .deltas import *
+from .laplacian import *
+from .obj import *
+from .out_of_core import *
+from .planes import *
+from .profiling import *
+from .quality import *
+from .ransac import *
+from .reorder import *
+from .rotation import *
+from .smoothing import *
+from .topology import *
@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+__all__ = ["LRUCache"]
+
+
+class LRUCache(object):
+    """
+    A thread-safe LRU cache of anything expensive to build or to recompute, keyed by anything hashable,
+    e.g. the Laplacian of a mesh's topology or the factorizations of a geodesics solver.
+
+    The cache is bounded by the number of entries, by the bytes of all entries, or both;
+    the least recently used entries are dropped first. An entry's size is its `nbytes` attribute
+    (as for numpy arrays), entries without one only count towards the number of entries.
+    """
+
+    def __init__(
+        self, size: Optional[int] = None, budget: Optional[int] = None
+    ):
+        """
+        :param size: Maximum number of entries kept, None for no limit.
+        :param budget: Maximum number of bytes of all entries, None for no limit.
+        """
+        self.size = size
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def sizeof(entry) -> int:
+        return getattr(entry, "nbytes", 0)
+
+    def get(self, key: Hashable, build: Optional[Callable[[], object]] = None):
+        """
+        :param key: Identifies the entry.
+        :param build: Computes the entry when it isn't cached.
+        :return: The cached (or built) entry.
+        :raises KeyError: If the entry isn't cached and there is nothing to build it with.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+        if build is None:
+            raise KeyError(key)
+        # Built outside the lock, so other requests aren't blocked (a race only builds an entry twice)
+        entry = build()
+        self.put(key, entry)
+        return entry
+
+    def put(self, key: Hashable, entry) -> bool:
+        """
+        Stores an entry, dropping the least recently used ones until the cache is within its bounds.
+
+        :param key: Identifies the entry.
+        :param entry: The entry to store.
+        :return: Whether the entry was stored, False if it alone exceeds the budget.
+        """
+        nbytes = self.sizeof(entry)
+        if self.budget is not None and nbytes > self.budget:
+            return False
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.sizeof(self.entries.pop(key))
+            self.entries[key] = entry
+            self.nbytes += nbytes
+            self.evict()
+        return True
+
+    def resize(self, budget: Optional[int]):
+        """
+        Changes the memory budget, dropping the least recently used entries until the new one is met.
+
+        :param budget: Maximum number of bytes of all entries, None for no limit.
+        """
+        with self.lock:
+            self.budget = budget
+            self.evict()
+
+    def evict(self):
+        # Callers hold the lock
+        while (self.size is not None and len(self.entries) > self.size) or (
+            self.budget is not None and self.nbytes > self.budget
+        ):
+            self.nbytes -= self.sizeof(self.entries.popitem(last=False)[1])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
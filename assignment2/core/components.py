@@ -0,0 +1,171 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import csr_array, sparray
+
+from .profiling import NO_SPANS, SpanRecorder
+from .reorder import inverse_permutation, permute_laplacian
+from .smoothing import laplace_step_in_place
+
+__all__ = [
+    "MIN_BLOCK_SIZE",
+    "component_blocks",
+    "smooth_block",
+    "block_diagonal_smooth",
+    "component_parallel_smooth",
+]
+
+# Smallest number of vertices worth a task of its own, smaller components are batched into blocks of this size
+MIN_BLOCK_SIZE = 4096
+
+
+def component_blocks(
+    L: sparray, min_block_size: int = MIN_BLOCK_SIZE
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Groups the connected components of a mesh into blocks which can be smoothed independently.
+
+    Explicit smoothing never couples vertices of different components, so L is block diagonal
+    once the vertices are sorted by component.
+    The components are sorted by decreasing size (so the largest tasks are scheduled first).
+    Components of at least `min_block_size` vertices form a block of their own,
+    and the smaller ones are batched into blocks of roughly `min_block_size` vertices.
+
+    :param L: The NxN sparse Laplacian (or adjacency) matrix.
+    :param min_block_size: Number of vertices below which components are batched together.
+    :return: A tuple (order, offsets), where block b holds the vertices order[offsets[b]:offsets[b + 1]].
+    """
+    # scipy.sparse.csgraph pulls in scipy.sparse.linalg, so it is imported on first use to keep importing the core fast
+    from scipy.sparse.csgraph import connected_components
+
+    _, labels = connected_components(L, directed=False)
+    sizes = np.bincount(labels)
+    ranking = np.argsort(-sizes, kind="stable")
+    order = np.argsort(inverse_permutation(ranking)[labels], kind="stable")
+    sizes = sizes[ranking]
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    # Large components get a block of their own, the small ones (at the end) start a new block
+    # whenever they start in a new multiple of min_block_size
+    large = np.count_nonzero(sizes >= min_block_size)
+    window = (starts[large:-1] - starts[large]) // min_block_size
+    first = large + np.flatnonzero(np.diff(window, prepend=-1))
+    offsets = np.concatenate([starts[:large], starts[first], [len(labels)]])
+    return order, offsets
+
+
+def smooth_block(
+    X: np.ndarray, L: csr_array, steps: list[float], iterations: int
+) -> np.ndarray:
+    """
+    Performs iterative explicit (or Taubin) smoothing in place, see taubin_smooth().
+
+    :param X: Vertex positions as a C-contiguous Nx3 numpy array, which is overwritten.
+    :param L: The NxN sparse Laplacian matrix.
+    :param steps: The step factors of one iteration, [tau] or [tau, mu].
+    :param iterations: Number of iterations to perform.
+    :return: X
+    """
+    for _ in range(iterations):
+        for factor in steps:
+            laplace_step_in_place(X, L, factor)
+    return X
+
+
+def block_diagonal_smooth(
+    vertices: np.ndarray,
+    L: sparray,
+    order: np.ndarray,
+    offsets: np.ndarray,
+    tau: float,
+    iterations: int,
+    mu: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    recorder: SpanRecorder = NO_SPANS,
+) -> np.ndarray:
+    """
+    Performs iterative explicit smoothing of every block of vertices independently, on a thread pool.
+
+    The Laplacian is renumbered once into block order, after which every block is a contiguous range of rows
+    whose columns fall into the same range, so the block matrices and coordinates are views rather than copies.
+    Every worker runs all iterations of its block without any synchronisation, and the sparse products release the GIL.
+
+    :param vertices: Vertex positions as an Nx3 numpy array, which is not modified.
+    :param L: The NxN sparse Laplacian matrix, which must not couple different blocks.
+    :param order: The vertices sorted by block, see component_blocks().
+    :param offsets: The B + 1 offsets of the blocks in `order`.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations to perform.
+    :param mu: Optional negative step factor, which turns every iteration into a Taubin step pair.
+    :param max_workers: Size of the thread pool, defaults to the ThreadPoolExecutor default.
+    :param recorder: Records the time spent renumbering and smoothing every block.
+    :return: The new positions of the vertices as an Nx3 numpy array.
+    """
+    with recorder.span("permute_laplacian", nnz=L.nnz):
+        L = permute_laplacian(L, order)
+        X = np.ascontiguousarray(vertices[order])
+    steps = [tau] if mu is None else [tau, mu]
+
+    def smooth(block: int):
+        start, end = offsets[block], offsets[block + 1]
+        first, last = L.indptr[start], L.indptr[end]
+        L_block = csr_array(
+            (
+                L.data[first:last],
+                L.indices[first:last] - L.indices.dtype.type(start),
+                L.indptr[start : end + 1] - first,
+            ),
+            shape=(end - start, end - start),
+        )
+        with recorder.span(
+            "smooth_block", verts=end - start, iterations=iterations
+        ):
+            smooth_block(X[start:end], L_block, steps, iterations)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Consume the results, so errors of the workers are raised here
+        list(pool.map(smooth, range(len(offsets) - 1)))
+    smoothed = np.empty_like(X)
+    smoothed[order] = X
+    return smoothed
+
+
+def component_parallel_smooth(
+    vertices: np.ndarray,
+    L: sparray,
+    tau: float,
+    iterations: int,
+    mu: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    min_block_size: int = MIN_BLOCK_SIZE,
+    recorder: SpanRecorder = NO_SPANS,
+) -> np.ndarray:
+    """
+    Performs iterative explicit smoothing with the connected components of the mesh smoothed in parallel,
+    see component_blocks() and block_diagonal_smooth().
+    Meshes which form a single block are smoothed in place without renumbering.
+
+    :param vertices: Vertex positions as an Nx3 numpy array, which is not modified.
+    :param L: The NxN sparse Laplacian matrix.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations to perform.
+    :param mu: Optional negative step factor, which turns every iteration into a Taubin step pair.
+    :param max_workers: Size of the thread pool, defaults to the ThreadPoolExecutor default.
+    :param min_block_size: Smallest number of vertices per block, see component_blocks().
+    :param recorder: Records the time spent finding the components and smoothing them.
+    :return: The new positions of the vertices as an Nx3 numpy array.
+    """
+    with recorder.span("component_blocks", verts=len(vertices)) as span:
+        order, offsets = component_blocks(L, min_block_size)
+        span["args"]["blocks"] = len(offsets) - 1
+    if len(offsets) <= 2:
+        with recorder.span("smooth_block", verts=len(vertices)):
+            return smooth_block(
+                np.array(vertices, order="C"),
+                csr_array(L),
+                [tau] if mu is None else [tau, mu],
+                iterations,
+            )
+    return block_diagonal_smooth(
+        vertices, L, order, offsets, tau, iterations, mu, max_workers, recorder
+    )
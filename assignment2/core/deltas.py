@@ -0,0 +1,176 @@
+import hashlib
+import zlib
+from typing import Hashable, Optional
+
+import numpy as np
+
+from .cache import LRUCache
+
+__all__ = [
+    "QUANTIZATION_LEVELS",
+    "coordinates_fingerprint",
+    "shuffle_bytes",
+    "unshuffle_bytes",
+    "CoordinateDelta",
+    "DeltaCache",
+    "SMOOTHING_DELTAS",
+]
+
+# Largest magnitude of a quantized displacement component
+QUANTIZATION_LEVELS = np.iinfo(np.int16).max
+
+
+def coordinates_fingerprint(*arrays: np.ndarray) -> str:
+    """
+    :param arrays: The arrays a result depends on, e.g. the vertex positions and the edges of a mesh.
+    :return: A digest of the shapes, types and contents of the arrays.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def shuffle_bytes(array: np.ndarray) -> bytes:
+    """
+    Transposes the bytes of an array, so the k-th bytes of all elements follow each other.
+    The high bytes of similar numbers repeat, which makes the buffer far more compressible.
+
+    :param array: A numpy array of a fixed-size type.
+    :return: The shuffled bytes.
+    """
+    array = np.ascontiguousarray(array)
+    return array.view(np.uint8).reshape([-1, array.itemsize]).T.tobytes()
+
+
+def unshuffle_bytes(buffer: bytes, dtype: np.dtype) -> np.ndarray:
+    """
+    Inverts shuffle_bytes().
+
+    :param buffer: The shuffled bytes.
+    :param dtype: Type of the elements.
+    :return: A flat numpy array of the elements.
+    """
+    dtype = np.dtype(dtype)
+    planes = np.frombuffer(buffer, dtype=np.uint8).reshape(
+        [dtype.itemsize, -1]
+    )
+    return np.ascontiguousarray(planes.T).view(dtype).ravel()
+
+
+class CoordinateDelta(object):
+    """
+    The displacement of every vertex between two states of a mesh (e.g. before and after smoothing),
+    stored compactly enough to keep many of them around and re-apply one instead of recomputing it.
+
+    The displacements are stored per component (x, y and z after each other) as 32-bit floats,
+    which is half the size of the double precision positions and loses nothing Blender would keep,
+    since meshes store their positions as 32-bit floats themselves.
+    With `quantize`, every component is instead rounded to a 16-bit integer multiple of a per-axis step,
+    max |displacement| / 32767, so the error of every component is at most half a step (see `error`).
+    With `compress`, the bytes are shuffled (see shuffle_bytes()) and deflated with zlib,
+    which shrinks smooth or partly pinned displacement fields most (a pinned vertex has zero displacement).
+    """
+
+    def __init__(
+        self,
+        original: np.ndarray,
+        result: np.ndarray,
+        quantize: bool = False,
+        compress: bool = False,
+        level: int = 1,
+    ):
+        """
+        :param original: The original vertex positions as an Nx3 numpy array.
+        :param result: The new vertex positions as an Nx3 numpy array.
+        :param quantize: Whether to store 16-bit integers instead of 32-bit floats.
+        :param compress: Whether to deflate the stored bytes.
+        :param level: zlib compression level, from 1 (fastest) to 9 (smallest).
+        """
+        original = np.asarray(original, dtype=np.float64)
+        self.shape = original.shape
+        displacement = (np.asarray(result, dtype=np.float64) - original).T
+        if quantize:
+            self.step = np.abs(displacement).max(axis=1, initial=0)
+            self.step /= QUANTIZATION_LEVELS
+            self.step[self.step == 0] = 1.0
+            values = np.rint(displacement / self.step[:, np.newaxis]).astype(
+                np.int16
+            )
+        else:
+            self.step = None
+            values = displacement.astype(np.float32)
+        self.dtype = values.dtype
+        self.compressed = compress
+        if compress:
+            self.buffer = zlib.compress(shuffle_bytes(values), level)
+        else:
+            self.buffer = np.ascontiguousarray(values)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) if self.compressed else self.buffer.nbytes
+
+    @property
+    def error(self) -> np.ndarray:
+        """
+        :return: The largest error of the x, y and z components of the restored displacements.
+        """
+        if self.step is None:
+            return np.zeros(3)
+        return self.step / 2
+
+    def displacement(self) -> np.ndarray:
+        """
+        :return: The stored displacements as an Nx3 numpy array.
+        """
+        if self.compressed:
+            values = unshuffle_bytes(zlib.decompress(self.buffer), self.dtype)
+        else:
+            values = self.buffer
+        values = values.reshape([self.shape[1], -1]).astype(np.float64)
+        if self.step is not None:
+            values *= self.step[:, np.newaxis]
+        return values.T
+
+    def apply(self, original: np.ndarray) -> np.ndarray:
+        """
+        :param original: The original vertex positions as an Nx3 numpy array.
+        :return: The new vertex positions as an Nx3 numpy array.
+        """
+        if np.shape(original) != self.shape:
+            raise ValueError(
+                f"Expected {self.shape} positions, got {np.shape(original)}"
+            )
+        return np.asarray(original, dtype=np.float64) + self.displacement()
+
+
+class DeltaCache(LRUCache):
+    """
+    A thread-safe LRU cache of CoordinateDeltas with a memory budget, keyed by anything hashable.
+
+    The key must identify the original state as well as the operation, e.g. a fingerprint of the mesh
+    (see coordinates_fingerprint()) together with the smoothing parameters, so a redo with the same settings
+    (or undoing and repeating an operation) restores the result from the original positions without recomputing it.
+    """
+
+    def __init__(self, budget: int = 256 << 20):
+        """
+        :param budget: Maximum number of bytes of all stored deltas, the least recently used ones are dropped first.
+        """
+        super().__init__(budget=budget)
+
+    def get(self, key: Hashable) -> Optional[CoordinateDelta]:
+        """
+        :param key: Identifies the original state and the operation.
+        :return: The cached delta, or None.
+        """
+        try:
+            return super().get(key)
+        except KeyError:
+            return None
+
+
+SMOOTHING_DELTAS = DeltaCache()
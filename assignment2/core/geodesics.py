@@ -0,0 +1,230 @@
+import numpy as np
+from scipy.sparse import csc_array, diags_array
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import splu
+
+from .cache import LRUCache
+from .deltas import coordinates_fingerprint
+from .laplacian import cotangent_weights, mass_matrix, triangle_cotangents
+from .profiling import NO_SPANS, SpanRecorder
+
+__all__ = [
+    "PERMUTATION",
+    "FALLOFFS",
+    "HeatGeodesics",
+    "geodesic_falloff",
+    "GEODESIC_SOLVERS",
+    "cached_heat_geodesics",
+]
+
+# Column ordering of the sparse LU factorizations. Both systems are symmetric, for which a minimum degree
+# ordering of A^T + A has about half the fill-in of SuperLU's default (COLAMD), so factorizing and solving are faster
+PERMUTATION = "MMD_AT_PLUS_A"
+
+# Profiles of the smoothing falloff by name (as in Blender's proportional editing),
+# each mapping the distance in units of the radius (clipped to [0, 1]) to a weight from 1 down to 0
+FALLOFFS = {
+    "smooth": lambda x: 1 - x * x * (3 - 2 * x),
+    "sphere": lambda x: np.sqrt(1 - x * x),
+    "root": lambda x: np.sqrt(1 - x),
+    "linear": lambda x: 1 - x,
+    "sharp": lambda x: np.square(1 - x),
+    "constant": lambda x: np.ones_like(x),
+}
+
+
+class HeatGeodesics(object):
+    """
+    Geodesic distances on a triangle mesh with the heat method (Crane et al., "Geodesics in Heat", 2013).
+
+    Heat diffused from the sources for a short time t has gradients which point away from them,
+    so the distance is the function whose gradient best matches the normalized (reversed) heat gradient:
+        1. solve (M + t L) u = u_0, with u_0 = 1 at the sources,
+        2. X = -grad(u) / |grad(u)| on every triangle,
+        3. solve L phi = -div(X), and shift phi to zero at the sources,
+    where L = D - W is the (unnormalized) cotangent Laplacian, see cotangent_weights(), and M the lumped mass matrix.
+
+    Both matrices only depend on the mesh, so they are factorized once, and every query from other sources costs
+    two back-substitutions plus a pass over the triangles (the per-triangle gradient and divergence coefficients
+    are precomputed as well).
+    """
+
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        triangles: np.ndarray,
+        time_factor: float = 1.0,
+        recorder: SpanRecorder = NO_SPANS,
+    ):
+        """
+        :param vertices: Vertex positions as an Nx3 numpy array.
+        :param triangles: Triangle vertex indices as a Tx3 numpy array.
+        :param time_factor: The heat diffuses for time_factor * h^2, h being the mean edge length.
+                            Larger factors give smoother (but less accurate) distances.
+        :param recorder: Records the time spent factorizing.
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        self.triangles = np.asarray(triangles, dtype=np.int64).reshape([-1, 3])
+        self.num_verts = len(vertices)
+        with recorder.span(
+            "heat_geodesics_factorize",
+            verts=self.num_verts,
+            triangles=len(self.triangles),
+        ):
+            W = cotangent_weights(vertices, self.triangles)
+            L = diags_array(np.asarray(W.sum(axis=1)).ravel()) - W
+            areas = mass_matrix(vertices, self.triangles).diagonal()
+            corners = vertices[self.triangles]
+            edges = np.roll(corners, -1, axis=1) - corners
+            self.time = (
+                time_factor * np.mean(np.linalg.norm(edges, axis=-1)) ** 2
+            )
+
+            # Vertices outside every (non-degenerate) triangle get identity rows, so both systems are regular
+            unused = areas <= 0
+            # phi is only defined up to a constant per connected component,
+            # so the first vertex of every component is fixed to 0
+            _, self.labels = connected_components(W, directed=False)
+            _, first = np.unique(self.labels, return_index=True)
+            fixed = np.zeros(self.num_verts, dtype=bool)
+            fixed[first] = True
+            self.heat = splu(
+                self.with_identity_rows(
+                    diags_array(areas) + self.time * L, unused
+                ),
+                permc_spec=PERMUTATION,
+            )
+            self.poisson = splu(
+                self.with_identity_rows(L, unused | fixed),
+                permc_spec=PERMUTATION,
+            )
+            self.fixed = fixed
+
+            # The gradient of a linear function on a triangle is sum_c u_c (N x e_c) / 2A,
+            # e_c being the edge opposite corner c, counter-clockwise
+            normals = np.cross(edges[:, 0], -edges[:, 2])
+            double_areas = np.linalg.norm(normals, axis=-1)
+            regular = double_areas > 0
+            normals[regular] /= double_areas[regular, np.newaxis]
+            opposite = np.roll(edges, -1, axis=1)
+            self.gradients = np.zeros_like(corners)
+            self.gradients[regular] = (
+                np.cross(normals[regular, np.newaxis], opposite[regular])
+                / double_areas[regular, np.newaxis, np.newaxis]
+            )
+            # The integrated divergence at corner c is the sum of the cotangent-weighted edges leaving it, dotted with X
+            cot = triangle_cotangents(vertices, self.triangles)
+            self.divergences = 0.5 * (
+                np.roll(cot, -2, axis=1)[..., np.newaxis] * edges
+                - np.roll(cot, -1, axis=1)[..., np.newaxis]
+                * np.roll(edges, 1, axis=1)
+            )
+
+    @property
+    def nbytes(self) -> int:
+        """
+        An estimate of the memory held by the solver: every nonzero of the LU factors of both systems
+        stores a double and a 32-bit index, plus the per-triangle and per-vertex arrays.
+        """
+        factors = (self.heat.nnz + self.poisson.nnz) * (8 + 4)
+        return factors + sum(
+            array.nbytes
+            for array in (
+                self.triangles,
+                self.gradients,
+                self.divergences,
+                self.labels,
+                self.fixed,
+            )
+        )
+
+    @staticmethod
+    def with_identity_rows(A, rows: np.ndarray) -> csc_array:
+        """
+        :param A: A symmetric sparse matrix.
+        :param rows: A boolean mask of the rows (and columns) to replace with those of the identity.
+        :return: The modified matrix in CSC format, ready for factorization.
+        """
+        keep = diags_array((~rows).astype(np.float64))
+        return csc_array(
+            keep @ A @ keep + diags_array(rows.astype(np.float64))
+        )
+
+    def distances(
+        self, sources: np.ndarray, recorder: SpanRecorder = NO_SPANS
+    ) -> np.ndarray:
+        """
+        :param sources: Indices of the source vertices.
+        :param recorder: Records the time spent solving.
+        :return: The geodesic distance of every vertex to the nearest source,
+                 inf for vertices not connected to any source.
+        """
+        sources = np.asarray(sources, dtype=np.int64).reshape(-1)
+        if len(sources) == 0:
+            raise ValueError("Geodesic distances need at least one source")
+        with recorder.span("heat_geodesics_solve", sources=len(sources)):
+            u0 = np.zeros(self.num_verts)
+            u0[sources] = 1.0
+            u = self.heat.solve(u0)
+
+            # Normalized negative gradient per triangle, zero where the heat is flat (or the triangle degenerate)
+            X = -np.einsum("tc,tcd->td", u[self.triangles], self.gradients)
+            norms = np.linalg.norm(X, axis=-1, keepdims=True)
+            np.divide(X, norms, out=X, where=norms > 0)
+            divergence = np.bincount(
+                self.triangles.ravel(),
+                np.einsum("tcd,td->tc", self.divergences, X).ravel(),
+                minlength=self.num_verts,
+            )
+            divergence[self.fixed] = 0.0
+            phi = self.poisson.solve(-divergence)
+
+            # Shift every component with a source to zero at its nearest source
+            offsets = np.full(self.labels.max(initial=0) + 1, np.inf)
+            np.minimum.at(offsets, self.labels[sources], phi[sources])
+            offsets = offsets[self.labels]
+            return np.where(
+                np.isfinite(offsets), np.maximum(phi - offsets, 0.0), np.inf
+            )
+
+
+def geodesic_falloff(
+    distances: np.ndarray, radius: float, falloff: str = "smooth"
+) -> np.ndarray:
+    """
+    Turns distances from a region into smoothing weights, from 1 in the region down to 0 at `radius`.
+
+    :param distances: The distance of every vertex, e.g. from HeatGeodesics.distances().
+    :param radius: Distance at which the weights reach 0.
+    :param falloff: The profile of the weights, one of the keys of FALLOFFS.
+    :return: The per-vertex weights.
+    """
+    if falloff not in FALLOFFS:
+        raise ValueError(
+            f"Unknown falloff '{falloff}', expected one of {list(FALLOFFS)}"
+        )
+    x = np.clip(np.asarray(distances, dtype=np.float64) / radius, 0.0, 1.0)
+    return np.where(x < 1, FALLOFFS[falloff](x), 0.0)
+
+
+# The factorizations take about 1.5 kB per vertex (on a regular grid), so the budget keeps the solver of one
+# 1M vertex mesh, and bounds the cache rather than the number of solvers for large meshes
+GEODESIC_SOLVERS = LRUCache(size=4, budget=2 << 30)
+
+
+def cached_heat_geodesics(
+    vertices: np.ndarray,
+    triangles: np.ndarray,
+    time_factor: float = 1.0,
+    recorder: SpanRecorder = NO_SPANS,
+    cache: LRUCache = GEODESIC_SOLVERS,
+) -> HeatGeodesics:
+    """
+    Returns the heat method solver of a mesh from the shared cache, so repeated queries on the same mesh
+    (e.g. when redoing an operator with another selection) reuse its factorizations.
+    """
+    with recorder.span("geodesics_key", verts=len(vertices)):
+        key = (coordinates_fingerprint(vertices, triangles), time_factor)
+    return cache.get(
+        key, lambda: HeatGeodesics(vertices, triangles, time_factor, recorder)
+    )
@@ -0,0 +1,375 @@
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import coo_array, csr_array, diags_array, sparray
+
+from .quality import signed_volume
+
+__all__ = [
+    "compact_csr",
+    "edge_adjacency",
+    "combinatorial_laplacian",
+    "triangle_cotangents",
+    "cotangent_weights",
+    "mass_matrix",
+    "enclosed_volume",
+    "cotangent_laplacian",
+    "weighted_laplacian",
+    "pin_laplacian",
+    "neighbours",
+    "k_rings",
+    "grow_region",
+    "localize_laplacian",
+    "region_laplacian",
+]
+
+
+def compact_csr(L: sparray, dtype: np.dtype = np.float64) -> csr_array:
+    """
+    Converts a sparse matrix to CSR with the given value type and the smallest index type which fits.
+
+    Sparse products are memory-bandwidth bound, so float32 values with int32 indices
+    move roughly half the bytes of the float64 / int64 default per product.
+
+    :param L: The sparse matrix to convert.
+    :param dtype: Floating point type of the stored values.
+    :return: A CSR copy (or view, if nothing had to change) of L.
+    """
+    L = csr_array(L, dtype=dtype)
+    if max(L.nnz, *L.shape) < np.iinfo(np.int32).max:
+        L.indices = L.indices.astype(np.int32, copy=False)
+        L.indptr = L.indptr.astype(np.int32, copy=False)
+    return L
+
+
+def edge_adjacency(
+    num_verts: int, edges: np.ndarray, dtype: np.dtype = np.float64
+) -> coo_array:
+    """
+    Computes the (symmetric) adjacency matrix of a graph given as an array of edges.
+
+    :param num_verts: Number of vertices of the graph.
+    :param edges: Vertex indices of the edges as an Ex2 numpy array.
+    :param dtype: Type of the stored values.
+    :return: An NxN sparse matrix with A_ij = 1 if an edge exists between i and j.
+    """
+    edges = np.asarray(edges, dtype=np.int32)
+    rows = np.concatenate([edges[:, 0], edges[:, 1]])
+    cols = np.concatenate([edges[:, 1], edges[:, 0]])
+    data = np.ones(len(rows), dtype=dtype)
+    return coo_array((data, (rows, cols)), shape=(num_verts, num_verts))
+
+
+def combinatorial_laplacian(
+    num_verts: int, edges: np.ndarray, dtype: np.dtype = np.float64
+) -> csr_array:
+    """
+    Computes the normalized combinatorial Laplacian L = I - D^(-1)A of a graph given as an array of edges.
+
+    Vertices without any edges get an empty row, so they are left in place by smoothing.
+
+    :param num_verts: Number of vertices of the graph.
+    :param edges: Vertex indices of the edges as an Ex2 numpy array.
+    :param dtype: Floating point type of the stored values.
+    :return: An NxN sparse CSR matrix with L_ii = 1 and L_ij = -1 / deg_i.
+    """
+    A = edge_adjacency(num_verts, edges, dtype).tocsr()
+    degrees = np.asarray(A.sum(axis=1)).ravel()
+    has_edges = degrees > 0
+    inv_degrees = np.divide(
+        1, degrees, out=np.zeros_like(degrees), where=has_edges
+    )
+    L = diags_array(has_edges.astype(dtype)) - diags_array(inv_degrees) @ A
+    return compact_csr(L, dtype)
+
+
+def triangle_cotangents(
+    vertices: np.ndarray, triangles: np.ndarray
+) -> np.ndarray:
+    """
+    Computes the cotangent of every interior angle of every triangle in one vectorized pass.
+
+    The corner positions are stacked into a [t, 3, 3] array, so the two edge vectors leaving each corner
+    are obtained by rolling the corner axis instead of looping over faces.
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :param triangles: Triangle vertex indices as a Tx3 numpy array.
+    :return: A Tx3 array, where array[t, k] is the cotangent of the angle at corner k of triangle t.
+    """
+    corners = vertices[triangles]
+    u = np.roll(corners, -1, axis=1) - corners
+    v = np.roll(corners, -2, axis=1) - corners
+    dot = np.einsum("tki,tki->tk", u, v)
+    cross = np.linalg.norm(np.cross(u, v), axis=-1)
+    # Degenerate (zero-area) triangles contribute nothing instead of inf / nan
+    return np.divide(dot, cross, out=np.zeros_like(dot), where=cross > 0)
+
+
+def cotangent_weights(
+    vertices: np.ndarray, triangles: np.ndarray
+) -> csr_array:
+    """
+    Assembles the symmetric cotangent weight matrix of a triangle mesh.
+
+    For every edge (i, j), W_ij = (cot(alpha_ij) + cot(beta_ij)) / 2,
+    where alpha_ij and beta_ij are the angles opposite the edge in its (one or two) adjacent triangles.
+    The matrix is assembled from COO triplets; duplicate entries from neighbouring triangles are summed.
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :param triangles: Triangle vertex indices as a Tx3 numpy array.
+    :return: An NxN sparse matrix of cotangent edge weights (zero diagonal).
+    """
+    num_verts = len(vertices)
+    cot = 0.5 * triangle_cotangents(vertices, triangles).ravel()
+    # The angle at corner k is opposite the edge between corners k+1 and k+2
+    i = np.roll(triangles, -1, axis=1).ravel()
+    j = np.roll(triangles, -2, axis=1).ravel()
+    return coo_array(
+        (
+            np.concatenate([cot, cot]),
+            (np.concatenate([i, j]), np.concatenate([j, i])),
+        ),
+        shape=(num_verts, num_verts),
+    ).tocsr()
+
+
+def mass_matrix(vertices: np.ndarray, triangles: np.ndarray) -> sparray:
+    """
+    Computes the lumped (barycentric) mass matrix of a triangle mesh.
+
+    Each triangle distributes a third of its area to each of its corners, so M_ii is the barycentric area of vertex i.
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :param triangles: Triangle vertex indices as a Tx3 numpy array.
+    :return: An NxN sparse diagonal matrix of vertex areas.
+    """
+    corners = vertices[triangles]
+    areas = 0.5 * np.linalg.norm(
+        np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]),
+        axis=-1,
+    )
+    vertex_areas = np.bincount(
+        triangles.ravel(),
+        weights=np.repeat(areas / 3, 3),
+        minlength=len(vertices),
+    )
+    return diags_array(vertex_areas, format="csr")
+
+
+def enclosed_volume(vertices: np.ndarray, triangles: np.ndarray) -> float:
+    """
+    Computes the signed volume enclosed by a closed, consistently oriented triangle mesh.
+
+    Sums the signed volumes of the tetrahedra spanned by the origin and every triangle (divergence theorem).
+    For meshes with boundaries the result depends on the position of the origin.
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :param triangles: Triangle vertex indices as a Tx3 numpy array.
+    :return: The enclosed volume, positive for outward facing triangles.
+    """
+    return signed_volume(np.asarray(vertices, dtype=np.float64)[triangles])
+
+
+def cotangent_laplacian(
+    vertices: np.ndarray, triangles: np.ndarray, dtype: np.dtype = np.float64
+) -> csr_array:
+    """
+    Computes the normalized cotangent Laplacian of a triangle mesh.
+
+    Uses the same normalization as the combinatorial Laplacian, L = I - D^(-1)W,
+    but with the cotangent weights W instead of the adjacency matrix.
+    Negative weights (produced by obtuse angles) are clamped to zero,
+    so an explicit step always moves a vertex towards a convex combination of its neighbours.
+    Vertices without any (positive) weight get an empty row and are left in place.
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :param triangles: Triangle vertex indices as a Tx3 numpy array.
+    :param dtype: Floating point type of the stored values. The weights are always computed in double precision.
+    :return: An NxN sparse CSR matrix with L_ii = 1 and L_ij = -W_ij / sum_k(W_ik).
+    """
+    W = cotangent_weights(np.asarray(vertices, dtype=np.float64), triangles)
+    W.data = np.maximum(W.data, 0)
+    return weighted_laplacian(W, dtype)
+
+
+def weighted_laplacian(W: sparray, dtype: np.dtype = np.float64) -> csr_array:
+    """
+    Computes the normalized Laplacian L = I - D^(-1)W of a symmetric, non-negative weight matrix.
+
+    Vertices without any weight get an empty row, so they are left in place by smoothing.
+
+    :param W: The NxN sparse weight matrix with a zero diagonal.
+    :param dtype: Floating point type of the stored values. The normalization is always computed in double precision.
+    :return: An NxN sparse CSR matrix with L_ii = 1 and L_ij = -W_ij / sum_k(W_ik).
+    """
+    W = csr_array(W, dtype=np.float64)
+    degrees = np.asarray(W.sum(axis=1)).ravel()
+    has_weight = degrees > 0
+    inv_degrees = np.divide(
+        1.0, degrees, out=np.zeros_like(degrees), where=has_weight
+    )
+    L = (
+        diags_array(has_weight.astype(np.float64))
+        - diags_array(inv_degrees) @ W
+    )
+    return compact_csr(L, dtype)
+
+
+def pin_laplacian(L: sparray, pinned: np.ndarray) -> csr_array:
+    """
+    Folds fixed vertices into a Laplacian by dropping their rows, so every iteration x = x - tau * L @ x
+    leaves them in place while their free neighbours still see their positions.
+
+    The constraint costs nothing per iteration, the product with the pinned Laplacian even has fewer entries.
+
+    :param L: The NxN sparse Laplacian matrix.
+    :param pinned: Indices of the vertices to keep in place, e.g. see pinned_vertices().
+    :return: A CSR copy of L with empty rows for the pinned vertices, with the value and index types of L.
+    """
+    L = csr_array(L, copy=True)
+    mask = np.zeros(L.shape[0], dtype=bool)
+    mask[pinned] = True
+    L.data[np.repeat(mask, np.diff(L.indptr))] = 0
+    L.eliminate_zeros()
+    return compact_csr(L, L.dtype)
+
+
+def neighbours(L: csr_array, vertices: np.ndarray) -> np.ndarray:
+    """
+    Finds all vertices which share a (structurally non-zero) Laplacian entry with any of the given vertices.
+
+    Reads the CSR index arrays directly, so the cost is proportional to the number of entries
+    in the given rows rather than to the size of the whole mesh.
+
+    :param L: An NxN sparse CSR matrix, e.g. a Laplacian or adjacency matrix.
+    :param vertices: Indices of the vertices to find the neighbours of.
+    :return: A sorted numpy array of the neighbouring vertex indices (including the vertices themselves if L_ii != 0).
+    """
+    starts = L.indptr[vertices]
+    lengths = L.indptr[vertices + 1] - starts
+    # Position of every entry of every requested row in L.indices
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.unique(L.indices[offsets + np.arange(lengths.sum())])
+
+
+def k_rings(L: csr_array, seeds: np.ndarray, k: int) -> list[np.ndarray]:
+    """
+    Grows a region of vertices ring by ring.
+
+    :param L: An NxN sparse CSR matrix defining the vertex connectivity.
+    :param seeds: Indices of the vertices to start from.
+    :param k: Number of rings to grow.
+    :return: A list of k + 1 disjoint sorted index arrays; entry 0 holds the seeds, entry r the vertices r edges away.
+    """
+    rings = [np.unique(seeds)]
+    visited = rings[0]
+    for _ in range(k):
+        ring = np.setdiff1d(
+            neighbours(L, rings[-1]), visited, assume_unique=True
+        )
+        rings.append(ring)
+        visited = np.union1d(visited, ring)
+    return rings
+
+
+def grow_region(
+    A: csr_array, weights: np.ndarray, halo: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the ("active") vertices smoothing a weighted region moves: the vertices with a non-zero weight
+    plus `halo` rings around them, whose weights fall off linearly so the region blends into the rest of the mesh.
+
+    :param A: An NxN sparse CSR matrix defining the vertex connectivity, e.g. a Laplacian or adjacency matrix.
+    :param weights: Per-vertex smoothing weights in [0, 1] as a numpy array of shape [n].
+    :param halo: Number of rings around the weighted region which are smoothed with falling-off weights.
+    :return: A tuple (active, active_weights) of the active vertex indices, ring after ring, and their weights.
+    """
+    region = np.flatnonzero(weights)
+    rings = k_rings(A, region, halo)
+    falloff = [
+        np.full(
+            len(ring), weights[region].max(initial=0) * (1 - r / (halo + 1))
+        )
+        for r, ring in enumerate(rings[1:], start=1)
+    ]
+    return np.concatenate(rings), np.concatenate([weights[region], *falloff])
+
+
+def localize_laplacian(
+    L: sparray, weights: np.ndarray, halo: int = 0
+) -> tuple[np.ndarray, np.ndarray, csr_array, np.ndarray]:
+    """
+    Extracts the part of a Laplacian needed to smooth only a weighted region of a mesh.
+
+    The smoothed ("active") vertices are the vertices with a non-zero weight plus `halo` rings around them,
+    see grow_region().
+    One more ring of "boundary" vertices is needed to evaluate the Laplacian of the active vertices;
+    those stay fixed.
+
+    :param L: The full NxN Laplacian matrix.
+    :param weights: Per-vertex smoothing weights in [0, 1] as a numpy array of shape [n].
+    :param halo: Number of rings around the weighted region which are smoothed with falling-off weights.
+    :return: A tuple (active, boundary, L_local, active_weights), where `active` and `boundary` are vertex indices,
+             and L_local is the len(active) x (len(active) + len(boundary)) sub-matrix of L
+             whose columns follow the order of `numpy.concatenate([active, boundary])`.
+    """
+    L = csr_array(L)
+    active, active_weights = grow_region(L, weights, halo)
+    rows = L[active]
+    boundary = np.setdiff1d(rows.indices, active)
+
+    # Re-index the columns of the active rows into the local vertex order
+    local = np.concatenate([active, boundary])
+    order = np.argsort(local)
+    columns = order[np.searchsorted(local[order], rows.indices)]
+    L_local = compact_csr(
+        csr_array(
+            (rows.data, columns, rows.indptr), shape=(len(active), len(local))
+        ),
+        L.dtype,
+    )
+    return active, boundary, L_local, active_weights
+
+
+def region_laplacian(
+    active: np.ndarray,
+    elements: np.ndarray,
+    num_verts: int,
+    vertices: Optional[np.ndarray] = None,
+    dtype: np.dtype = np.float64,
+) -> tuple[np.ndarray, csr_array]:
+    """
+    Assembles only the rows of the active vertices of a mesh's Laplacian, i.e. the (boundary, L_local) part
+    of localize_laplacian(), without building the Laplacian of the whole mesh.
+
+    Without vertex positions, the elements are the edges of the mesh and the rows are those of its combinatorial
+    Laplacian, with vertex positions they are its triangles and the rows are those of its cotangent Laplacian.
+    Only the elements with an active vertex are kept (which includes every element around an active vertex,
+    so their degrees and weights are exact), so apart from one mask over the elements,
+    the cost depends on the size of the region rather than on the size of the mesh.
+
+    :param active: Indices of the vertices to smooth, see grow_region().
+    :param elements: Vertex indices of the edges as an Ex2, or of the triangles as a Tx3 numpy array.
+    :param num_verts: Number of vertices of the mesh.
+    :param vertices: Vertex positions as an Nx3 numpy array for the cotangent Laplacian,
+                     only the vertices of the kept triangles are read.
+    :param dtype: Floating point type of the stored values.
+    :return: A tuple (boundary, L_local), with the columns of L_local following `numpy.concatenate([active, boundary])`.
+             The boundary holds every other vertex of the kept elements, which can include vertices whose (clamped)
+             cotangent weight is zero.
+    """
+    inside = np.zeros(num_verts, dtype=bool)
+    inside[active] = True
+    elements = np.asarray(elements)
+    elements = elements[inside[elements].any(axis=1)]
+    boundary = np.setdiff1d(elements, active)
+
+    # Renumber the kept elements into the local vertex order
+    local = np.concatenate([active, boundary])
+    order = np.argsort(local)
+    elements = order[np.searchsorted(local[order], elements)]
+    if vertices is None:
+        L = combinatorial_laplacian(len(local), elements, dtype)
+    else:
+        L = cotangent_laplacian(np.asarray(vertices)[local], elements, dtype)
+    return boundary, compact_csr(L[: len(active)], dtype)
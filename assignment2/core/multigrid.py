@@ -0,0 +1,324 @@
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import csr_array, diags_array, sparray
+from scipy.sparse.linalg import splu
+
+from .laplacian import compact_csr, weighted_laplacian
+from .profiling import NO_SPANS, SpanRecorder
+
+__all__ = [
+    "PROLONGATION_SMOOTHING",
+    "row_maxima",
+    "aggregate",
+    "MultigridHierarchy",
+    "spectral_radius",
+    "MultigridSolver",
+    "MultigridSmoother",
+]
+
+# Weight of the Jacobi step which smooths the piecewise constant prolongation, 4 / (3 * 2) for eigenvalues in [0, 2]
+PROLONGATION_SMOOTHING = 2 / 3
+
+
+def row_maxima(A: csr_array, values: np.ndarray) -> np.ndarray:
+    """
+    :param A: An NxM sparse CSR matrix, whose structure selects the values of every row.
+    :param values: Non-negative values of the M columns.
+    :return: The maximum value among the non-zero columns of every row, 0 for empty rows.
+    """
+    maxima = np.zeros(A.shape[0], dtype=values.dtype)
+    nonempty = np.diff(A.indptr) > 0
+    if A.nnz:
+        maxima[nonempty] = np.maximum.reduceat(
+            values[A.indices], A.indptr[:-1][nonempty]
+        )
+    return maxima
+
+
+def aggregate(W: sparray, seed: Optional[int] = 0) -> np.ndarray:
+    """
+    Groups the vertices of a graph into aggregates of neighbouring vertices, one per vertex of the coarse graph.
+
+    The aggregate roots are a maximal independent set, found with Luby's algorithm: in every round,
+    undecided vertices whose random priority beats all their undecided neighbours become roots,
+    and they and their neighbours are decided. Every vertex is a root or has a root neighbour,
+    which it joins (the one with the highest priority, if there are several).
+    Every round is a few vectorized passes over the edges, and about log(n) rounds are needed.
+
+    :param W: The symmetric NxN weight (or adjacency) matrix of the graph.
+    :param seed: Seed of the random priorities.
+    :return: The index of every vertex's aggregate, numbered in the order of the roots.
+    """
+    A = csr_array(W)
+    n = A.shape[0]
+    # Unique priorities, starting at 1 so 0 can stand for "no neighbour"
+    priority = np.random.default_rng(seed).permutation(n) + 1
+    undecided = np.ones(n, dtype=bool)
+    roots = np.zeros(n, dtype=bool)
+    while undecided.any():
+        candidates = np.where(undecided, priority, 0)
+        new_roots = undecided & (candidates > row_maxima(A, candidates))
+        roots |= new_roots
+        covered = new_roots | (row_maxima(A, new_roots.astype(np.int8)) > 0)
+        undecided &= ~covered
+
+    # Every vertex joins its highest priority root neighbour, roots join themselves
+    owner_priority = np.where(
+        roots, priority, row_maxima(A, np.where(roots, priority, 0))
+    )
+    vertex_of_priority = np.empty(n + 1, dtype=np.int64)
+    vertex_of_priority[priority] = np.arange(n)
+    coarse_index = np.cumsum(roots) - 1
+    return coarse_index[vertex_of_priority[owner_priority]]
+
+
+class MultigridHierarchy(object):
+    """
+    A hierarchy of ever coarser versions of a mesh's Laplacian, built from its graph alone (smoothed aggregation).
+
+    The Laplacian L = I - D^(-1)W is kept as the symmetric pair of the mass matrix M = D and the stiffness matrix
+    K = D - W (L = M^(-1)K). Every coarser graph merges aggregates of neighbouring vertices (see aggregate())
+    into single vertices. Coordinates are interpolated from a coarse level to the next finer one by the prolongation:
+    the piecewise constant interpolation of the aggregates, smoothed by one Jacobi step of the finer Laplacian
+    so the interpolated coordinates don't show the aggregates. It keeps constant coordinates unchanged.
+    The coarse M and K are the Galerkin products P^T M P and P^T K P with the prolongation P.
+    """
+
+    def __init__(
+        self,
+        W: sparray,
+        levels: Optional[int] = None,
+        min_size: int = 256,
+        dtype: np.dtype = np.float64,
+        seed: Optional[int] = 0,
+        recorder: SpanRecorder = NO_SPANS,
+    ):
+        """
+        :param W: The symmetric NxN weight matrix of the mesh's Laplacian, e.g. the adjacency matrix.
+        :param levels: Maximum number of levels (including the mesh itself), unlimited by default.
+        :param min_size: Levels with at most this many vertices aren't coarsened any further.
+        :param dtype: Floating point type of the stored operators.
+        :param seed: Seed of the aggregation, see aggregate().
+        :param recorder: Records the time spent coarsening every level.
+        """
+        W = csr_array(W, dtype=np.float64)
+        W.data = np.maximum(W.data, 0)
+        degrees = np.asarray(W.sum(axis=1)).ravel()
+        # Vertices without any weight get a unit mass, so (M + t K) x = M b leaves them in place
+        mass = diags_array(np.where(degrees > 0, degrees, 1.0), format="csr")
+        stiffness = csr_array(diags_array(degrees) - W)
+        self.mass = [compact_csr(mass, dtype)]
+        self.stiffness = [compact_csr(stiffness, dtype)]
+        self.prolongation = [None]
+        while (levels is None or len(self) < levels) and W.shape[0] > min_size:
+            with recorder.span("coarsen", verts=W.shape[0]) as span:
+                aggregates = aggregate(W, seed)
+                n, n_coarse = W.shape[0], aggregates.max(initial=-1) + 1
+                # Aggregation doesn't pay off anymore (e.g. a graph without edges)
+                if n_coarse > n // 2:
+                    break
+                tentative = csr_array(
+                    (np.ones(n), (np.arange(n), aggregates)),
+                    shape=(n, n_coarse),
+                )
+                P = csr_array(
+                    tentative
+                    - PROLONGATION_SMOOTHING
+                    * (weighted_laplacian(W) @ tentative)
+                )
+                mass = csr_array(P.T @ mass @ P)
+                stiffness = csr_array(P.T @ stiffness @ P)
+                # The coarse graph only decides the next aggregation and prolongation smoothing
+                W = csr_array(tentative.T @ W @ tentative)
+                W = csr_array(W - diags_array(W.diagonal()))
+                W.eliminate_zeros()
+                self.mass.append(compact_csr(mass, dtype))
+                self.stiffness.append(compact_csr(stiffness, dtype))
+                self.prolongation.append(compact_csr(P, dtype))
+                span["args"]["coarse_verts"] = n_coarse
+
+    def __len__(self):
+        return len(self.mass)
+
+    @property
+    def sizes(self) -> list[int]:
+        """
+        :return: The number of vertices of every level, from the mesh to the coarsest level.
+        """
+        return [M.shape[0] for M in self.mass]
+
+
+def spectral_radius(
+    A: sparray, inverse_diagonal: np.ndarray, iterations: int = 15
+) -> float:
+    """
+    Estimates the largest eigenvalue of D^(-1)A (D the diagonal of the SPD matrix A) with power iterations.
+    """
+    x = np.random.default_rng(0).random(A.shape[0]) + 0.5
+    estimate = 1.0
+    for _ in range(iterations):
+        y = inverse_diagonal * (A @ x)
+        estimate = np.linalg.norm(y) / max(np.linalg.norm(x), 1e-300)
+        x = y / max(np.linalg.norm(y), 1e-300)
+    return estimate
+
+
+class MultigridSolver(object):
+    """
+    Solves the implicit smoothing system (M + t K) X = M B with multigrid V-cycles.
+
+    Every cycle relaxes the system on the mesh with a few damped Jacobi sweeps (which remove the high frequencies
+    of the error), restricts the remaining residual to the next coarser level, recursively solves for its correction
+    there (directly on the coarsest level), prolongs the correction back and finishes with a few more sweeps.
+    The low frequencies, which Jacobi (like explicit smoothing) needs many sweeps for, are handled on the coarse levels,
+    so a cycle costs a small constant number of products with the mesh's matrix, and reduces the error by a constant factor.
+    """
+
+    def __init__(
+        self,
+        hierarchy: MultigridHierarchy,
+        time: float,
+        sweeps: int = 2,
+        recorder: SpanRecorder = NO_SPANS,
+    ):
+        """
+        :param hierarchy: The multigrid hierarchy of the mesh.
+        :param time: The smoothing time t, i.e. the implicit step size.
+        :param sweeps: Number of Jacobi sweeps before and after the coarse correction on every level.
+        :param recorder: Records the time spent assembling the level systems.
+        """
+        self.hierarchy = hierarchy
+        self.sweeps = sweeps
+        with recorder.span("assemble_levels", levels=len(hierarchy)):
+            self.A = [
+                csr_array(M + time * K)
+                for M, K in zip(hierarchy.mass, hierarchy.stiffness)
+            ]
+            self.inverse_diagonal = []
+            self.damping = []
+            for A in self.A[:-1]:
+                inverse_diagonal = 1 / A.diagonal()
+                self.inverse_diagonal.append(inverse_diagonal)
+                self.damping.append(
+                    4 / (3 * spectral_radius(A, inverse_diagonal))
+                )
+            self.coarsest = splu(
+                csr_array(self.A[-1], dtype=np.float64).tocsc()
+            )
+
+    def relax(self, level: int, X: np.ndarray, B: np.ndarray) -> np.ndarray:
+        weights = (self.damping[level] * self.inverse_diagonal[level])[:, None]
+        for _ in range(self.sweeps):
+            X = X + weights.astype(X.dtype) * (B - self.A[level] @ X)
+        return X
+
+    def cycle(
+        self, X: np.ndarray, B: np.ndarray, level: int = 0
+    ) -> np.ndarray:
+        """
+        Performs one V-cycle from the given level down.
+
+        :param X: The current approximate solution on the level.
+        :param B: The right-hand side of the level's system.
+        :param level: Index of the level.
+        :return: The improved approximate solution.
+        """
+        if level == len(self.A) - 1:
+            return self.coarsest.solve(np.asarray(B, dtype=np.float64)).astype(
+                X.dtype
+            )
+        X = self.relax(level, X, B)
+        P = self.hierarchy.prolongation[level + 1]
+        residual = P.T @ (B - self.A[level] @ X)
+        X = X + P @ self.cycle(np.zeros_like(residual), residual, level + 1)
+        return self.relax(level, X, B)
+
+    def residual(self, X: np.ndarray, B: np.ndarray) -> float:
+        """
+        :return: The norm of the residual of the mesh's system, relative to the norm of the right-hand side.
+        """
+        return np.linalg.norm(B - self.A[0] @ X) / max(
+            np.linalg.norm(B), np.finfo(np.float64).tiny
+        )
+
+
+class MultigridSmoother(object):
+    """
+    Implicit Laplace smoothing (I + t L) X = X_0, solved with multigrid V-cycles (see MultigridSolver).
+
+    Explicit smoothing removes low-frequency bumps only after hundreds of iterations, because every iteration
+    moves information one ring further. The implicit step damps the frequency of eigenvalue lambda by 1 / (1 + t lambda)
+    for any t, and a few V-cycles (each a handful of products with the Laplacian) solve it well enough.
+    `iterations` explicit steps of weight tau damp it by (1 - tau lambda)^iterations, about exp(-t lambda)
+    for t = tau * iterations, so at equal t the implicit step keeps somewhat more of the low frequencies.
+
+    Has the interface of LaplaceSmoother, where every iteration is one V-cycle.
+    """
+
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        hierarchy: MultigridHierarchy,
+        time: float,
+        cycles: int,
+        weights: Optional[np.ndarray] = None,
+        sweeps: int = 2,
+        recorder: SpanRecorder = NO_SPANS,
+    ):
+        """
+        :param vertices: Vertex positions as an Nx3 numpy array, which is not modified.
+        :param hierarchy: The multigrid hierarchy of the mesh.
+        :param time: The smoothing time t, e.g. tau * iterations of the equivalent explicit smoothing.
+        :param cycles: Number of V-cycles to perform.
+        :param weights: Optional per-vertex weights in [0, 1], which blend between the original and smoothed positions.
+        :param sweeps: Number of Jacobi sweeps before and after the coarse correction on every level.
+        :param recorder: Records the time spent assembling the levels and cycling.
+        """
+        self.original = vertices
+        self.weights = weights
+        self.iterations = cycles
+        self.completed = 0
+        self.recorder = recorder
+        self.solver = MultigridSolver(hierarchy, time, sweeps, recorder)
+        self.B = hierarchy.mass[0] @ vertices
+        # The original coordinates are a good initial guess, since the high frequencies are small
+        self.X = vertices
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.iterations
+
+    def step(self, iterations: int = 1) -> int:
+        """
+        Performs (at most) the given number of the remaining V-cycles.
+
+        :param iterations: Maximum number of V-cycles to perform.
+        :return: The number of V-cycles which were actually performed.
+        """
+        iterations = min(iterations, self.iterations - self.completed)
+        with self.recorder.span(
+            "cycles", cycles=iterations, levels=len(self.solver.A)
+        ):
+            for _ in range(iterations):
+                self.X = self.solver.cycle(self.X, self.B)
+        self.completed += iterations
+        return iterations
+
+    def run(self) -> np.ndarray:
+        """
+        Performs all remaining V-cycles, see step().
+
+        :return: The smoothed coordinates of all vertices.
+        """
+        self.step(self.iterations - self.completed)
+        return self.coordinates()
+
+    def coordinates(self) -> np.ndarray:
+        """
+        :return: The current coordinates of all vertices, as an Nx3 numpy array.
+        """
+        if self.weights is None:
+            return self.X
+        weights = self.weights[:, None].astype(self.X.dtype)
+        return self.original + weights * (self.X - self.original)
@@ -0,0 +1,69 @@
+import numpy as np
+
+__all__ = ["load_obj", "face_edges", "fan_triangulate"]
+
+
+def load_obj(path: str) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Reads the vertices and faces of a Wavefront OBJ file, without Blender.
+
+    Only `v` and `f` statements are interpreted; texture coordinates, normals, groups and materials are ignored.
+
+    :param path: Path of the OBJ file.
+    :return: A tuple (vertices, faces), where vertices is an Nx3 numpy array
+             and faces is a list of (zero-based) vertex index arrays, one per polygon.
+    """
+    vertices, faces = [], []
+    with open(path) as file:
+        for line in file:
+            if line.startswith("v "):
+                vertices.append(line.split()[1:4])
+            elif line.startswith("f "):
+                # Each corner is `v`, `v/vt`, `v//vn` or `v/vt/vn`; negative indices count from the end
+                corners = [
+                    int(corner.split("/")[0]) for corner in line.split()[1:]
+                ]
+                faces.append(
+                    np.array(
+                        [
+                            c - 1 if c > 0 else len(vertices) + c
+                            for c in corners
+                        ],
+                        dtype=np.int32,
+                    )
+                )
+    return np.array(vertices, dtype=np.float64).reshape([-1, 3]), faces
+
+
+def face_edges(faces: list[np.ndarray]) -> np.ndarray:
+    """
+    Finds the unique (undirected) edges of a set of polygons.
+
+    :param faces: A list of vertex index arrays, one per polygon.
+    :return: An Ex2 numpy array of vertex indices, with the smaller index first.
+    """
+    if not faces:
+        return np.zeros((0, 2), dtype=np.int32)
+    starts = np.concatenate(faces)
+    ends = np.concatenate([np.roll(face, -1) for face in faces])
+    edges = np.sort(np.stack([starts, ends], axis=-1), axis=-1)
+    return np.unique(edges, axis=0)
+
+
+def fan_triangulate(faces: list[np.ndarray]) -> np.ndarray:
+    """
+    Splits every (convex) polygon into a fan of triangles around its first corner.
+
+    :param faces: A list of vertex index arrays, one per polygon.
+    :return: A Tx3 numpy array of triangle vertex indices.
+    """
+    triangles = [
+        np.stack(
+            [np.full(len(face) - 2, face[0]), face[1:-1], face[2:]], axis=-1
+        )
+        for face in faces
+        if len(face) >= 3
+    ]
+    if not triangles:
+        return np.zeros((0, 3), dtype=np.int32)
+    return np.concatenate(triangles).astype(np.int32)
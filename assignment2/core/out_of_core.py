@@ -0,0 +1,313 @@
+import os
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import csr_array
+
+from .profiling import NO_SPANS, SpanRecorder
+
+__all__ = [
+    "CHUNK_SIZE",
+    "INDPTR",
+    "INDICES",
+    "DATA",
+    "VERTICES",
+    "array_path",
+    "create_array",
+    "open_array",
+    "write_array",
+    "save_laplacian",
+    "load_laplacian",
+    "save_combinatorial_laplacian",
+    "chunk_halos",
+    "out_of_core_laplace_smooth",
+]
+
+# Default number of rows processed at once, which bounds the working set of every out-of-core pass
+CHUNK_SIZE = 1 << 20
+
+# File names of the arrays making up a smoothing problem on disk
+INDPTR, INDICES, DATA, VERTICES = "indptr", "indices", "data", "vertices"
+
+
+def array_path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}.npy")
+
+
+def create_array(
+    directory: str, name: str, shape: tuple, dtype: np.dtype
+) -> np.memmap:
+    """
+    Creates a memory-mapped .npy file, which can be filled chunk by chunk without holding it in memory.
+
+    :param directory: Directory of the smoothing problem.
+    :param name: Name of the array, e.g. VERTICES.
+    :param shape: Shape of the array.
+    :param dtype: Type of the stored values.
+    :return: The writable memory-mapped array.
+    """
+    return np.lib.format.open_memmap(
+        array_path(directory, name), mode="w+", dtype=dtype, shape=shape
+    )
+
+
+def open_array(directory: str, name: str, mode: str = "r") -> np.memmap:
+    """
+    :param directory: Directory of the smoothing problem.
+    :param name: Name of the array, e.g. VERTICES.
+    :param mode: Memory-mapping mode, "r" for read-only or "r+" for read-write access.
+    :return: The memory-mapped array stored in the directory.
+    """
+    return np.load(array_path(directory, name), mmap_mode=mode)
+
+
+def write_array(
+    directory: str,
+    name: str,
+    array: np.ndarray,
+    chunk_size: int = CHUNK_SIZE,
+) -> np.memmap:
+    """
+    Copies an array (which may itself be memory-mapped) to a .npy file in chunks of rows.
+
+    :param directory: Directory of the smoothing problem.
+    :param name: Name of the array, e.g. VERTICES.
+    :param array: The array to store.
+    :param chunk_size: Number of rows copied at once.
+    :return: The stored array, memory-mapped read-only.
+    """
+    stored = create_array(directory, name, array.shape, array.dtype)
+    for start in range(0, len(array), chunk_size):
+        stored[start : start + chunk_size] = array[start : start + chunk_size]
+    stored.flush()
+    del stored
+    return open_array(directory, name)
+
+
+def save_laplacian(
+    directory: str, L: csr_array, chunk_size: int = CHUNK_SIZE
+) -> tuple[np.memmap, np.memmap, np.memmap]:
+    """
+    Stores the CSR arrays of an (in memory) Laplacian, e.g. to smooth it out of core later on.
+
+    :param directory: Directory of the smoothing problem.
+    :param L: The NxN sparse Laplacian matrix.
+    :param chunk_size: Number of entries copied at once.
+    :return: The memory-mapped indptr, indices and data arrays.
+    """
+    L = csr_array(L)
+    return tuple(
+        write_array(directory, name, array, chunk_size)
+        for name, array in [
+            (INDPTR, L.indptr),
+            (INDICES, L.indices),
+            (DATA, L.data),
+        ]
+    )
+
+
+def load_laplacian(directory: str) -> tuple[np.memmap, np.memmap, np.memmap]:
+    """
+    :param directory: Directory of the smoothing problem.
+    :return: The memory-mapped indptr, indices and data arrays of the stored Laplacian.
+    """
+    return tuple(
+        open_array(directory, name) for name in [INDPTR, INDICES, DATA]
+    )
+
+
+def save_combinatorial_laplacian(
+    directory: str,
+    num_verts: int,
+    edges: np.ndarray,
+    dtype: np.dtype = np.float64,
+    chunk_size: int = CHUNK_SIZE,
+) -> tuple[np.memmap, np.memmap, np.memmap]:
+    """
+    Assembles the combinatorial Laplacian L = I - D^(-1)A of a graph directly into memory-mapped CSR arrays.
+
+    Equivalent to combinatorial_laplacian(), but only ever holds `chunk_size` edges or vertices in memory:
+        - a first pass over the edges counts the vertex degrees, which give the row offsets,
+        - a second pass scatters every chunk of edges into its rows, behind the diagonal entry.
+    The column indices of a row are not sorted, which doesn't matter for products.
+
+    :param directory: Directory of the smoothing problem.
+    :param num_verts: Number of vertices of the graph.
+    :param edges: Vertex indices of the edges as an Ex2 array, which may itself be memory-mapped.
+    :param dtype: Floating point type of the stored values.
+    :param chunk_size: Number of edges or vertices processed at once.
+    :return: The memory-mapped indptr, indices and data arrays.
+    """
+    index_type = (
+        np.int32
+        if 2 * len(edges) + num_verts < np.iinfo(np.int32).max
+        else np.int64
+    )
+
+    # Vertex degrees, in the cursor array which is later reused for the fill position of every row
+    cursor = create_array(directory, "cursor", (num_verts,), np.int64)
+    for start in range(0, len(edges), chunk_size):
+        chunk = np.asarray(edges[start : start + chunk_size])
+        touched, counts = np.unique(chunk, return_counts=True)
+        cursor[touched] += counts
+
+    # Rows hold the diagonal followed by one entry per edge, vertices without edges get an empty row
+    indptr = create_array(directory, INDPTR, (num_verts + 1,), index_type)
+    indptr[0] = 0
+    for start in range(0, num_verts, chunk_size):
+        degrees = np.asarray(cursor[start : start + chunk_size])
+        offset = indptr[start]
+        lengths = degrees + (degrees > 0)
+        indptr[start + 1 : start + 1 + len(degrees)] = offset + np.cumsum(
+            lengths
+        )
+    nnz = int(indptr[-1])
+    indices = create_array(directory, INDICES, (nnz,), index_type)
+    data = create_array(directory, DATA, (nnz,), dtype)
+    for start in range(0, num_verts, chunk_size):
+        rows = np.arange(start, min(start + chunk_size, num_verts))
+        degrees = np.asarray(cursor[rows])
+        offsets = np.asarray(indptr[rows])[degrees > 0]
+        indices[offsets] = rows[degrees > 0]
+        data[offsets] = 1
+        cursor[rows] = np.asarray(indptr[rows]) + (degrees > 0)
+
+    # Scatter both directions of every edge, ranking repeated rows within a chunk to find their slots
+    for start in range(0, len(edges), chunk_size):
+        chunk = np.asarray(edges[start : start + chunk_size])
+        rows = np.concatenate([chunk[:, 0], chunk[:, 1]])
+        cols = np.concatenate([chunk[:, 1], chunk[:, 0]])
+        order = np.argsort(rows, kind="stable")
+        rows, cols = rows[order], cols[order]
+        unique_rows, first, counts = np.unique(
+            rows, return_index=True, return_counts=True
+        )
+        rank = np.arange(len(rows)) - np.repeat(first, counts)
+        slots = np.asarray(cursor[rows]) + rank
+        row_lengths = np.asarray(indptr[rows + 1]) - np.asarray(indptr[rows])
+        indices[slots] = cols
+        data[slots] = -1 / (row_lengths - 1)
+        cursor[unique_rows] += counts
+
+    for array in [indptr, indices, data]:
+        array.flush()
+    del cursor, indptr, indices, data
+    os.remove(array_path(directory, "cursor"))
+    return load_laplacian(directory)
+
+
+def chunk_halos(
+    indptr: np.ndarray, indices: np.ndarray, start: int, stop: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Finds the vertices a block of rows reads from, i.e. the rows themselves and the halo of their neighbours.
+
+    :param indptr: CSR row offsets of the Laplacian.
+    :param indices: CSR column indices of the Laplacian.
+    :param start: First row of the block.
+    :param stop: End (exclusive) of the block.
+    :return: The block's local row offsets, the block-local column indices,
+             and the (sorted) global vertex indices which the local columns refer to.
+    """
+    offsets = np.asarray(indptr[start : stop + 1], dtype=np.int64)
+    columns = np.asarray(indices[offsets[0] : offsets[-1]])
+    halo, local_columns = np.unique(columns, return_inverse=True)
+    return offsets - offsets[0], local_columns, halo
+
+
+def out_of_core_laplace_smooth(
+    directory: str,
+    tau: float,
+    iterations: int,
+    chunk_size: int = CHUNK_SIZE,
+    mu: Optional[float] = None,
+    recorder: SpanRecorder = NO_SPANS,
+) -> np.memmap:
+    """
+    Performs iterative explicit (or Taubin) Laplace smoothing of a problem stored on disk.
+
+    The directory holds the Laplacian (see save_laplacian() / save_combinatorial_laplacian())
+    and the Nx3 vertex positions (see write_array() with VERTICES).
+    Every iteration reads the coordinates from one memory-mapped file and writes them to another,
+    one block of `chunk_size` rows at a time:
+
+        x[block] = x[block] - tau * L[block, halo] @ x[halo]
+
+    where the halo holds the block's vertices and all their neighbours, exchanged through the previous iteration's file.
+    Only one block of the Laplacian and its halo coordinates are ever held in memory,
+    so the peak memory use is bounded by the chunk size (and the OS page cache) rather than the mesh size.
+    The block-local column indices are computed once and stored next to the Laplacian.
+
+    :param directory: Directory of the smoothing problem, where the result is stored as well.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations to perform.
+    :param chunk_size: Number of rows processed at once.
+    :param mu: Optional negative step factor, which turns every iteration into a Taubin step pair.
+    :param recorder: Records the time spent planning the halos and iterating.
+    :return: The smoothed vertex positions, memory-mapped read-only.
+    """
+    indptr, indices, data = load_laplacian(directory)
+    vertices = open_array(directory, VERTICES)
+    num_verts = len(vertices)
+    blocks = [
+        (start, min(start + chunk_size, num_verts))
+        for start in range(0, num_verts, chunk_size)
+    ]
+
+    # The halos only depend on the Laplacian, so they are exchanged through files rather than recomputed.
+    # A block's halo is never larger than its number of entries, so nnz bounds the size of all halos.
+    with recorder.span("chunk_halos", chunks=len(blocks)):
+        halo_offsets = create_array(
+            directory, "halo_offsets", (len(blocks) + 1,), np.int64
+        )
+        local_indices = create_array(
+            directory, "local_indices", indices.shape, indices.dtype
+        )
+        halos = create_array(directory, "halos", indices.shape, indices.dtype)
+        halo_offsets[0] = 0
+        for i, (start, stop) in enumerate(blocks):
+            _, local_columns, halo = chunk_halos(indptr, indices, start, stop)
+            local_indices[indptr[start] : indptr[stop]] = local_columns
+            halo_offsets[i + 1] = halo_offsets[i] + len(halo)
+            halos[halo_offsets[i] : halo_offsets[i + 1]] = halo
+
+    factors = [tau] if mu is None else [tau, mu]
+    targets = [
+        create_array(directory, name, vertices.shape, vertices.dtype)
+        for name in ["smoothed", "smoothed_swap"]
+    ]
+    # Alternate between the two target files, such that the last pass writes to "smoothed"
+    passes = iterations * len(factors)
+    source, target = vertices, (passes - 1) % 2
+    with recorder.span(
+        "iterations", iterations=iterations, verts=num_verts, nnz=len(data)
+    ):
+        for _ in range(iterations):
+            for factor in factors:
+                for i, (start, stop) in enumerate(blocks):
+                    begin, end = int(indptr[start]), int(indptr[stop])
+                    halo = np.asarray(
+                        halos[halo_offsets[i] : halo_offsets[i + 1]]
+                    )
+                    L_block = csr_array(
+                        (
+                            np.asarray(data[begin:end]),
+                            np.asarray(local_indices[begin:end]),
+                            np.asarray(indptr[start : stop + 1]) - begin,
+                        ),
+                        shape=(stop - start, len(halo)),
+                    )
+                    targets[target][start:stop] = source[start:stop] - (
+                        factor * (L_block @ source[halo])
+                    )
+                source, target = targets[target], 1 - target
+    if passes == 0:
+        for start, stop in blocks:
+            targets[0][start:stop] = vertices[start:stop]
+
+    for array in targets:
+        array.flush()
+    del source, targets, halo_offsets, local_indices, halos
+    for name in ["smoothed_swap", "halo_offsets", "local_indices", "halos"]:
+        os.remove(array_path(directory, name))
+    return open_array(directory, "smoothed")
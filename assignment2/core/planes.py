@@ -0,0 +1,359 @@
+from typing import Optional
+
+import numpy as np
+
+__all__ = ["ROBUST_LOSSES", "SquaredDistanceToPlanes"]
+
+# Robust loss functions for SquaredDistanceToPlanes.optimal_point(), by name.
+# Each maps the residuals (in units of the tuning constant times the residual scale) to IRLS weights.
+ROBUST_LOSSES = {
+    "huber": (1.345, lambda u: 1 / np.maximum(np.abs(u), 1)),
+    "tukey": (4.685, lambda u: np.square(np.maximum(1 - np.square(u), 0))),
+}
+
+
+class SquaredDistanceToPlanes(object):
+    """
+    Computes and minimizes the sum of squared distances to a set of planes, using plain NumPy arrays.
+
+    Points are accepted as any (3,) array-like and returned as numpy arrays;
+    see SquaredDistanceToPlanesSolver for the Blender (mathutils) flavour.
+    """
+
+    def __init__(
+        self,
+        planes: list[tuple[np.ndarray, np.ndarray]],
+        weights: Optional[np.ndarray] = None,
+    ):
+        """
+        Prepares the solver to perform squared-distances-to-planes calculations for a given set of planes.
+
+        The normalized normals and the plane offsets are cached as arrays, which all per-plane queries work on.
+        The (weighted) sum of squared distances is the quadric f(p) = x^T A x - 2 b^T x + c of x = p - center,
+        so its A, b and c are precomputed and every sum_of_squared_distances() query takes constant time.
+        The quadric is relative to the centroid of the plane points, since expanding it around the origin
+        cancels catastrophically for planes far away from it.
+
+        :param planes: The set of planes to use in future calculations.
+                       Each plane is represented as a tuple of a point and a normal.
+        :param weights: Optional non-negative weight of every plane's squared distance, all ones by default.
+        """
+        points = np.array([point for point, _ in planes], dtype=np.float64)
+        normals = np.array([normal for _, normal in planes], dtype=np.float64)
+        self.set_planes(points, normals, weights)
+        self._planes = planes
+
+    def set_planes(
+        self,
+        points: np.ndarray,
+        normals: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+    ):
+        """
+        Replaces the set of planes with planes given as arrays, without building any per-plane Python objects.
+
+        :param points: A point on every plane as a kx3 array.
+        :param normals: The (not necessarily normalized) normal of every plane as a kx3 array.
+        :param weights: Optional non-negative weight of every plane's squared distance, all ones by default.
+        """
+        self._planes = None
+        self.points = np.asarray(points, dtype=np.float64).reshape([-1, 3])
+        # Unit normals n_i and offsets d_i = q_i . n_i, so that the signed distance of p to plane i is n_i . p - d_i
+        self.normals = np.array(normals, dtype=np.float64).reshape([-1, 3])
+        self.normals /= np.linalg.norm(self.normals, axis=1, keepdims=True)
+        self.offsets = np.einsum("ij,ij->i", self.points, self.normals)
+        self.center = (
+            self.points.mean(axis=0) if len(self.points) else np.zeros(3)
+        )
+        self.weights = (
+            np.ones(len(self.offsets))
+            if weights is None
+            else np.asarray(weights, dtype=np.float64).reshape(-1)
+        )
+        # Precompute matrix
+        self.A, self.b, self.c = self.quadric(self.weights)
+
+    @property
+    def planes(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        The planes as a list of (point, normal) tuples, as passed to __init__() or built from the arrays on demand.
+        """
+        if self._planes is None:
+            self._planes = list(zip(self.points, self.normals))
+        return self._planes
+
+    @classmethod
+    def from_arrays(
+        cls,
+        points: np.ndarray,
+        normals: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+    ) -> "SquaredDistanceToPlanes":
+        """
+        Creates a solver for planes given as arrays, see set_planes().
+        """
+        solver = cls.__new__(cls)
+        solver.set_planes(points, normals, weights)
+        return solver
+
+    # Arrays making up the state of a solver, see state() and from_state()
+    STATE = [
+        "points",
+        "normals",
+        "offsets",
+        "weights",
+        "center",
+        "A",
+        "b",
+        "c",
+    ]
+
+    def state(self) -> dict[str, np.ndarray]:
+        """
+        :return: The solver's plane arrays and precomputed quadric, by name.
+        """
+        return {name: np.asarray(getattr(self, name)) for name in self.STATE}
+
+    @classmethod
+    def from_state(
+        cls, state: dict[str, np.ndarray]
+    ) -> "SquaredDistanceToPlanes":
+        """
+        Restores a solver from its state, without recomputing anything.
+
+        :param state: The arrays returned by state(), e.g. the contents of a file written by save().
+        :return: The restored solver.
+        """
+        solver = cls.__new__(cls)
+        solver._planes = None
+        # States saved before the quadric was centered hold it relative to the origin
+        solver.center = np.zeros(3)
+        for name in cls.STATE:
+            if name != "center" or name in state:
+                setattr(
+                    solver, name, np.asarray(state[name], dtype=np.float64)
+                )
+        solver.c = float(solver.c)
+        return solver
+
+    def save(self, file, **arrays: np.ndarray):
+        """
+        Saves the solver's state to an (uncompressed, so it loads quickly) .npz file.
+
+        :param file: Path or file object to write to.
+        :param arrays: Additional arrays to store in the same file, e.g. the colors of the planes.
+        """
+        np.savez(file, **self.state(), **arrays)
+
+    @classmethod
+    def load(cls, file) -> "SquaredDistanceToPlanes":
+        """
+        Loads a solver saved with save().
+
+        :param file: Path or file object to read from.
+        :return: The restored solver.
+        """
+        with np.load(file) as state:
+            return cls.from_state(state)
+
+    def quadric(
+        self, weights: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, float]:
+        """
+        Computes the quadric of the weighted sum of squared distances, sum_i w_i (n_i . x - e_i)^2,
+        of x = p - center, where e_i = d_i - n_i . center are the offsets of the planes relative to the center.
+
+        :param weights: The weight of every plane.
+        :return: A tuple (A, b, c) with A = sum_i w_i n_i n_i^T, b = sum_i w_i e_i n_i and c = sum_i w_i e_i^2.
+        """
+        offsets = self.offsets - self.normals @ self.center
+        weighted_normals = self.normals.T * weights
+        return (
+            weighted_normals @ self.normals,
+            weighted_normals @ offsets,
+            float(weights @ np.square(offsets)),
+        )
+
+    def minimize_quadric(self, A: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        :param A: The matrix of a quadric, see quadric().
+        :param b: The vector of the quadric.
+        :return: A point minimizing the quadric, the one nearest to the center if there are several
+                 (e.g. when planes with weight 0 leave fewer than three independent normals).
+        """
+        return self.center + np.linalg.lstsq(A, b, rcond=None)[0]
+
+    def sum_of_squared_distances(self, point: np.ndarray) -> float:
+        """
+        Computes the sum of squared distances between a given point and each plane.
+
+        :param point: The point to find distance for.
+        :return: The sum of squared distances between the point and all planes, as a float.
+        """
+        if len(self.offsets) <= 0:
+            return 0
+        x = np.asarray(point, dtype=np.float64) - self.center
+        # Rounding can make the quadric slightly negative for points on all planes
+        return max(x @ self.A @ x - 2 * self.b @ x + self.c, 0.0)
+
+    def signed_distances(self, points: np.ndarray) -> np.ndarray:
+        """
+        Computes the signed distance of one or more points to every plane, positive on the side the normal points to.
+
+        :param points: A single (3,) point, or an Mx3 array of points.
+        :return: The distances as a (k,) array for a single point, or an Mxk array.
+        """
+        return (
+            np.asarray(points, dtype=np.float64) @ self.normals.T
+            - self.offsets
+        )
+
+    def projections(self, points: np.ndarray) -> np.ndarray:
+        """
+        Projects one or more points onto every plane, i.e. finds the nearest point on every plane.
+
+        :param points: A single (3,) point, or an Mx3 array of points.
+        :return: The projected points as a kx3 array for a single point, or an Mxkx3 array.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        distances = self.signed_distances(points)
+        return points[..., None, :] - distances[..., None] * self.normals
+
+    def nearest_planes(
+        self, points: np.ndarray, k: int = 1, chunk_size: int = 1 << 22
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the k nearest planes of every point, e.g. to label a point cloud with the planes it belongs to.
+
+        The distances to all planes are computed with a single matrix product per chunk of points,
+        and only the chunk's distance matrix (of at most `chunk_size` entries) is ever held in memory.
+
+        :param points: An Mx3 array of points.
+        :param k: Number of planes to find for every point.
+        :param chunk_size: Number of point-plane distances computed at once.
+        :return: A tuple (indices, distances) of Mxk arrays, holding the indices of the nearest planes
+                 (ordered by increasing distance) and the signed distances to them.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape([-1, 3])
+        k = min(k, len(self.offsets))
+        indices = np.empty((len(points), k), dtype=np.int64)
+        distances = np.empty((len(points), k))
+        if k == 0:
+            return indices, distances
+        chunk_size = max(1, chunk_size // len(self.offsets))
+        for start in range(0, len(points), chunk_size):
+            chunk = self.signed_distances(points[start : start + chunk_size])
+            if k == 1:
+                nearest = np.abs(chunk).argmin(axis=1)[:, None]
+            else:
+                nearest = np.argpartition(np.abs(chunk), k - 1, axis=1)[:, :k]
+            nearest_distances = np.take_along_axis(chunk, nearest, axis=1)
+            order = np.argsort(np.abs(nearest_distances), axis=1)
+            indices[start : start + chunk_size] = np.take_along_axis(
+                nearest, order, axis=1
+            )
+            distances[start : start + chunk_size] = np.take_along_axis(
+                nearest_distances, order, axis=1
+            )
+        return indices, distances
+
+    def optimal_point(
+        self,
+        robust: Optional[str] = None,
+        scale: Optional[float] = None,
+        iterations: int = 50,
+    ) -> np.ndarray:
+        """
+        Finds a point which minimizes the sum of squared distances to all planes.
+
+        This function is not always deterministic!
+        For example, with two (non-parallel) planes any point along the line defined by their intersection is optimal.
+
+        With a `robust` loss, planes far away from the optimum get less (Huber) or no (Tukey) weight,
+        so a few outlier planes can't drag the point away, see robust_optimal_point().
+
+        :param robust: Optional robust loss, one of the keys of ROBUST_LOSSES.
+        :param scale: Residual scale of the robust loss, see robust_optimal_point().
+        :param iterations: Maximum number of reweighting iterations of the robust loss.
+        :return: A point which minimizes the sum of squared distances.
+        """
+        if robust is not None and len(self.offsets) > 2:
+            return self.robust_optimal_point(robust, scale, iterations)
+
+        if len(self.offsets) <= 0:
+            return np.zeros(3)
+
+        if len(self.offsets) == 1:
+            # It fails to solve because of singular matrices.
+            # Just return the point of plane since any points on the plane can be optimal
+            return self.points[0].copy()
+
+        if len(self.offsets) == 2:
+            p1, n1 = self.points[0], self.normals[0]
+            p2, n2 = self.points[1], self.normals[1]
+            n1 = n1 / np.linalg.norm(n1)
+            n2 = n2 / np.linalg.norm(n2)
+
+            d = np.cross(n1, n2)
+
+            A = np.array([n1, n2, d])
+            b = np.array([np.dot(n1, p1), np.dot(n2, p2), 0])
+            p = np.linalg.lstsq(A.T, b, rcond=None)[0]
+            return p
+
+        # Solve the linear system A * x = b, which is singular if planes with weight 0 leave too few others
+        if np.linalg.matrix_rank(self.A) < 3:
+            return self.minimize_quadric(self.A, self.b)
+        return self.center + np.linalg.solve(self.A, self.b)
+
+    def robust_optimal_point(
+        self,
+        loss: str = "huber",
+        scale: Optional[float] = None,
+        iterations: int = 50,
+        tolerance: float = 1e-9,
+    ) -> np.ndarray:
+        """
+        Minimizes a robust sum of distances to all planes with iteratively reweighted least squares (IRLS).
+
+        Starting from the least squares optimum, every iteration computes the distances to all planes
+        in one product with the cached normals, turns them into robust weights, and solves the 3x3 system
+        of the reweighted quadric. Every iteration costs O(k), and usually a few dozen suffice.
+
+        :param loss: The robust loss, one of the keys of ROBUST_LOSSES.
+        :param scale: Residual scale, i.e. the typical distance of an inlier plane.
+                      Defaults to a robust estimate (the median absolute distance), updated every iteration.
+        :param iterations: Maximum number of reweighting iterations.
+        :param tolerance: The iterations stop once the point moves less than this.
+        :return: The robust optimal point. If the robust weights leave too few planes to determine a point,
+                 the iterations stop and the previous point is kept.
+        """
+        if loss not in ROBUST_LOSSES:
+            raise ValueError(
+                f"Unknown robust loss '{loss}', expected one of {list(ROBUST_LOSSES)}"
+            )
+        tuning, robust_weights = ROBUST_LOSSES[loss]
+        p = self.minimize_quadric(self.A, self.b)
+        for _ in range(iterations):
+            distances = self.signed_distances(p)
+            # Outliers inflate the scale of the initial least squares distances, so it is re-estimated every iteration
+            residual_scale = (
+                1.4826 * np.median(np.abs(distances))
+                if scale is None
+                else scale
+            )
+            if residual_scale <= 0:
+                break
+            A, b, _ = self.quadric(
+                self.weights
+                * robust_weights(distances / (tuning * residual_scale))
+            )
+            solution, _, rank, _ = np.linalg.lstsq(A, b, rcond=None)
+            # Too few planes keep a weight to pin down a point (e.g. Tukey weights with a scale below every distance),
+            # where the least squares solution would silently fall back to the origin
+            if rank < 3:
+                break
+            previous, p = p, self.center + solution
+            if np.linalg.norm(p - previous) < tolerance:
+                break
+        return p
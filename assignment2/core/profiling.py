@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+__all__ = ["SpanRecorder", "NullRecorder", "NO_SPANS"]
+
+
+class SpanRecorder(object):
+    """
+    Records the wall time (and optionally the memory allocations) of named, possibly nested, stages of a computation.
+
+    Usage:
+    ```
+        recorder = SpanRecorder()
+        with recorder.span("build_laplacian", verts=len(vertices)):
+            ...
+        print(recorder.summary())
+        recorder.save_chrome_trace("trace.json")  # open in chrome://tracing or https://ui.perfetto.dev
+    ```
+    Spans may be recorded from several threads at once.
+    Code which takes an optional recorder should default to NO_SPANS, which records nothing at (almost) no cost.
+    """
+
+    def __init__(self, allocations: bool = False):
+        """
+        :param allocations: Also record the bytes allocated in every span (through tracemalloc, which slows Python
+                            code down considerably; NumPy buffers are traced as well).
+                            If tracemalloc isn't tracing yet, it is started when the first span opens
+                            and stopped again once no span is open.
+                            tracemalloc only keeps a single, process-wide peak, which is only reset when no other span
+                            (nested or on another thread) is open, so `peak_bytes` is exact for spans which don't
+                            overlap any other one (e.g. the outermost one), and an upper bound otherwise.
+                            Allocations of other threads running at the same time are counted as well.
+        """
+        self.allocations = allocations
+        self.spans = []
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._tracing = False
+
+    @contextmanager
+    def span(self, name: str, **sizes) -> Iterator[dict]:
+        """
+        Records the enclosed block as a span.
+
+        :param name: Name of the stage.
+        :param sizes: Problem sizes (or any other JSON-serializable values) to attach to the span.
+        :return: The span's record, so sizes which are only known inside the block can be added to it.
+        """
+        record = {
+            "name": name,
+            "args": dict(sizes),
+            "tid": threading.get_ident(),
+        }
+        if self.allocations:
+            allocated_before = self._open_allocations()
+        start = time.perf_counter_ns()
+        try:
+            yield record
+        finally:
+            record["start"] = start - self._origin
+            record["duration"] = time.perf_counter_ns() - start
+            if self.allocations:
+                current, peak = self._close_allocations()
+                record["args"]["allocated_bytes"] = current - allocated_before
+                record["args"]["peak_bytes"] = peak - allocated_before
+            self.spans.append(record)
+
+    def _open_allocations(self) -> int:
+        """
+        Starts tracing (if nothing traces yet) and resets the peak, unless another span is open.
+
+        :return: The currently traced bytes.
+        """
+        with self._lock:
+            if self._open == 0:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._tracing = True
+                tracemalloc.reset_peak()
+            self._open += 1
+            return tracemalloc.get_traced_memory()[0]
+
+    def _close_allocations(self) -> tuple[int, int]:
+        """
+        Stops tracing once the last span closes, if this recorder started it.
+
+        :return: The currently traced bytes and the peak since the last reset.
+        """
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            self._open -= 1
+            if self._open == 0 and self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+            return current, peak
+
+    def totals(self) -> dict[str, float]:
+        """
+        :return: The total wall time in seconds per span name, in order of first completion.
+        """
+        totals = {}
+        for record in self.spans:
+            totals[record["name"]] = (
+                totals.get(record["name"], 0.0) + record["duration"] * 1e-9
+            )
+        return totals
+
+    def summary(self) -> str:
+        """
+        :return: A one-line breakdown of the wall time per span name, e.g. "numpy_verts 1.2ms, iterations 30.1ms",
+                 with the largest peak per name when recording allocations, e.g. "iterations 30.1ms (peak 2.3MiB)".
+        """
+        peaks = {}
+        for record in self.spans:
+            if "peak_bytes" in record["args"]:
+                peaks[record["name"]] = max(
+                    peaks.get(record["name"], 0), record["args"]["peak_bytes"]
+                )
+        return ", ".join(
+            f"{name} {seconds * 1000:.1f}ms"
+            + (
+                f" (peak {peaks[name] / 2 ** 20:.1f}MiB)"
+                if name in peaks
+                else ""
+            )
+            for name, seconds in self.totals().items()
+        )
+
+    def chrome_trace(self) -> dict:
+        """
+        :return: The spans in the Chrome Trace Event format ("complete" events, timestamps in microseconds).
+        """
+        return {
+            "traceEvents": [
+                {
+                    "name": record["name"],
+                    "ph": "X",
+                    "ts": record["start"] / 1000,
+                    "dur": record["duration"] / 1000,
+                    "pid": os.getpid(),
+                    "tid": record["tid"],
+                    "args": record["args"],
+                }
+                for record in self.spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def save_chrome_trace(self, path: str):
+        """
+        Writes the spans to a Chrome Trace JSON file, see chrome_trace().
+
+        :param path: Path of the JSON file.
+        """
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+
+class NullRecorder(object):
+    """
+    A SpanRecorder which records nothing.
+    """
+
+    spans = []
+
+    def span(self, name: str, **sizes):
+        return nullcontext({"name": name, "args": {}})
+
+    def totals(self) -> dict[str, float]:
+        return {}
+
+    def summary(self) -> str:
+        return ""
+
+
+NO_SPANS = NullRecorder()
@@ -0,0 +1,261 @@
+from typing import Optional
+
+import numpy as np
+
+__all__ = [
+    "triangle_edge_lengths",
+    "triangle_aspect_ratios",
+    "signed_volume",
+    "QUALITY_CHUNK_SIZE",
+    "chunks",
+    "MeshQuality",
+    "mesh_quality",
+    "format_quality",
+]
+
+
+def triangle_edge_lengths(corners: np.ndarray) -> np.ndarray:
+    """
+    :param corners: Corner positions of T triangles as a [t, 3, 3] numpy array.
+    :return: A Tx3 array, where array[t, k] is the length of the edge from corner k to corner k+1 of triangle t.
+    """
+    return np.linalg.norm(np.roll(corners, -1, axis=1) - corners, axis=-1)
+
+
+def triangle_aspect_ratios(
+    corners: np.ndarray, lengths: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Computes the aspect ratio of every triangle, the longest edge times the perimeter over 4 sqrt(3) times the area.
+
+    The ratio is 1 for equilateral triangles and grows as triangles become needles or slivers.
+
+    :param corners: Corner positions of T triangles as a [t, 3, 3] numpy array.
+    :param lengths: The triangles' edge lengths, if already known (see triangle_edge_lengths()).
+    :return: The T aspect ratios, inf for degenerate (zero-area) triangles.
+    """
+    if lengths is None:
+        lengths = triangle_edge_lengths(corners)
+    areas = 0.5 * np.linalg.norm(
+        np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]),
+        axis=-1,
+    )
+    numerator = lengths.max(axis=1, initial=0) * lengths.sum(axis=1)
+    return np.divide(
+        numerator,
+        4 * np.sqrt(3) * areas,
+        out=np.full_like(numerator, np.inf),
+        where=areas > 0,
+    )
+
+
+def signed_volume(corners: np.ndarray) -> float:
+    """
+    :param corners: Corner positions of T triangles as a [t, 3, 3] numpy array.
+    :return: The signed volume enclosed by the triangles, see enclosed_volume().
+    """
+    return (
+        np.einsum(
+            "ij,ij->", corners[:, 0], np.cross(corners[:, 1], corners[:, 2])
+        )
+        / 6
+    )
+
+
+# Number of edges or triangles evaluated at once, small enough for the temporaries to stay in the CPU cache
+QUALITY_CHUNK_SIZE = 1 << 14
+
+
+def chunks(length: int, chunk_size: int) -> list[slice]:
+    return [
+        slice(start, start + chunk_size)
+        for start in range(0, length, chunk_size)
+    ]
+
+
+class MeshQuality(object):
+    """
+    Computes quality reports of a mesh, optionally relative to an earlier state of the same mesh.
+
+    The index arrays (and the original volume) are prepared once, so the report of every smoothing iteration
+    only costs one pass over the edges and one over the triangles.
+    Both passes work on the x, y and z components separately (gathered through the index arrays),
+    in chunks whose temporaries stay in the cache, and only keep running sums, minima and maxima.
+
+    The vertex displacement is measured between corresponding vertices, so its maximum bounds the
+    Hausdorff distance between the two states. Dividing it by the mean edge length makes it independent of
+    the mesh's scale and resolution, e.g. for a convergence test between consecutive iterations.
+    """
+
+    def __init__(
+        self,
+        edges: np.ndarray,
+        triangles: np.ndarray,
+        original: Optional[np.ndarray] = None,
+        chunk_size: int = QUALITY_CHUNK_SIZE,
+    ):
+        """
+        :param edges: Vertex indices of the edges as an Ex2 numpy array.
+        :param triangles: Triangle vertex indices as a Tx3 numpy array.
+        :param original: Optional earlier vertex positions (e.g. the input of smoothing) as an Nx3 numpy array.
+        :param chunk_size: Number of edges or triangles evaluated at once.
+        """
+        self.edges = np.ascontiguousarray(np.reshape(edges, [-1, 2]).T)
+        self.triangles = np.ascontiguousarray(np.reshape(triangles, [-1, 3]).T)
+        self.chunk_size = chunk_size
+        self.original = None
+        if original is not None:
+            self.original = np.asarray(original, dtype=np.float64)
+            self.original_volume = self.triangle_statistics(
+                self.components(self.original)
+            )["volume"]
+
+    @staticmethod
+    def components(vertices: np.ndarray) -> np.ndarray:
+        return np.ascontiguousarray(np.asarray(vertices, dtype=np.float64).T)
+
+    def edge_statistics(self, components: np.ndarray) -> dict[str, float]:
+        x, y, z = components
+        minimum, maximum, total, squares = np.inf, 0.0, 0.0, 0.0
+        for chunk in chunks(self.edges.shape[1], self.chunk_size):
+            i, j = self.edges[0, chunk], self.edges[1, chunk]
+            dx, dy, dz = x[j] - x[i], y[j] - y[i], z[j] - z[i]
+            squared = dx * dx + dy * dy + dz * dz
+            lengths = np.sqrt(squared)
+            minimum = min(minimum, lengths.min())
+            maximum = max(maximum, lengths.max())
+            total += lengths.sum()
+            squares += squared.sum()
+        count = max(self.edges.shape[1], 1)
+        mean = total / count
+        return {
+            "edge_length_min": minimum if self.edges.shape[1] else 0.0,
+            "edge_length_mean": mean,
+            "edge_length_max": maximum,
+            "edge_length_std": np.sqrt(max(squares / count - mean**2, 0.0)),
+        }
+
+    def triangle_statistics(self, components: np.ndarray) -> dict[str, float]:
+        x, y, z = components
+        aspect_total, aspect_max, degenerate, volume = 0.0, 0.0, 0, 0.0
+        for chunk in chunks(self.triangles.shape[1], self.chunk_size):
+            i, j, k = (self.triangles[c, chunk] for c in range(3))
+            ax, ay, az = x[i], y[i], z[i]
+            # Edges from the first corner, and the opposite edge
+            bx, by, bz = x[j] - ax, y[j] - ay, z[j] - az
+            cx, cy, cz = x[k] - ax, y[k] - ay, z[k] - az
+            dx, dy, dz = cx - bx, cy - by, cz - bz
+            lengths = np.sqrt(
+                [
+                    bx * bx + by * by + bz * bz,
+                    dx * dx + dy * dy + dz * dz,
+                    cx * cx + cy * cy + cz * cz,
+                ]
+            )
+            # Twice the area vector, which also gives the volume of the tetrahedron with the origin
+            nx, ny, nz = (
+                by * cz - bz * cy,
+                bz * cx - bx * cz,
+                bx * cy - by * cx,
+            )
+            volume += (ax @ nx + ay @ ny + az @ nz) / 6
+            areas = 0.5 * np.sqrt(nx * nx + ny * ny + nz * nz)
+            regular = areas > 0
+            ratios = (
+                lengths.max(axis=0)[regular]
+                * lengths.sum(axis=0)[regular]
+                / (4 * np.sqrt(3) * areas[regular])
+            )
+            aspect_total += ratios.sum()
+            aspect_max = max(aspect_max, ratios.max(initial=0))
+            degenerate += len(areas) - len(ratios)
+        regular = self.triangles.shape[1] - degenerate
+        return {
+            "aspect_ratio_mean": aspect_total / regular if regular else 0.0,
+            "aspect_ratio_max": aspect_max,
+            "degenerate_triangles": degenerate,
+            "volume": volume,
+        }
+
+    def __call__(self, vertices: np.ndarray) -> dict[str, float]:
+        """
+        :param vertices: Vertex positions as an Nx3 numpy array.
+        :return: The metrics by name:
+                 edge_length_min / _mean / _max / _std, aspect_ratio_mean / _max (over non-degenerate triangles),
+                 degenerate_triangles, volume,
+                 and with an original state: displacement_max / _mean / _rms, relative_displacement and volume_change.
+        """
+        components = self.components(vertices)
+        report = self.edge_statistics(components)
+        report.update(self.triangle_statistics(components))
+        if self.original is not None:
+            difference = np.asarray(vertices, dtype=np.float64) - self.original
+            squared = np.einsum("ij,ij->i", difference, difference)
+            displacement = np.sqrt(squared.max(initial=0))
+            mean_edge_length = report["edge_length_mean"]
+            report.update(
+                {
+                    "displacement_max": displacement,
+                    "displacement_mean": (
+                        np.sqrt(squared).mean() if len(squared) else 0.0
+                    ),
+                    "displacement_rms": (
+                        np.sqrt(squared.mean()) if len(squared) else 0.0
+                    ),
+                    "relative_displacement": (
+                        displacement / mean_edge_length
+                        if mean_edge_length > 0
+                        else 0.0
+                    ),
+                    "volume_change": (
+                        report["volume"] / self.original_volume - 1
+                        if self.original_volume != 0
+                        else 0.0
+                    ),
+                }
+            )
+        return {name: float(value) for name, value in report.items()}
+
+
+def mesh_quality(
+    vertices: np.ndarray,
+    edges: np.ndarray,
+    triangles: np.ndarray,
+    original: Optional[np.ndarray] = None,
+) -> dict[str, float]:
+    """
+    Computes the quality report of a mesh, see MeshQuality.
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :param edges: Vertex indices of the edges as an Ex2 numpy array.
+    :param triangles: Triangle vertex indices as a Tx3 numpy array.
+    :param original: Optional earlier vertex positions (e.g. the input of smoothing) as an Nx3 numpy array.
+    :return: The metrics by name, see MeshQuality.__call__().
+    """
+    return MeshQuality(edges, triangles, original)(vertices)
+
+
+def format_quality(report: dict[str, float]) -> str:
+    """
+    :param report: A quality report, see mesh_quality().
+    :return: A one-line summary of the report, with " | " between its sections.
+    """
+    sections = [
+        f"Edges {report['edge_length_min']:.4g}..{report['edge_length_max']:.4g} "
+        f"(mean {report['edge_length_mean']:.4g}, std {report['edge_length_std']:.3g})",
+        f"Aspect ratio mean {report['aspect_ratio_mean']:.3f}, max {report['aspect_ratio_max']:.3g}"
+        + (
+            f", {report['degenerate_triangles']:.0f} degenerate"
+            if report["degenerate_triangles"]
+            else ""
+        ),
+    ]
+    if "displacement_max" in report:
+        sections += [
+            f"Displacement max {report['displacement_max']:.4g} "
+            f"({report['relative_displacement']:.2f} edges), mean {report['displacement_mean']:.4g}",
+            f"Volume {report['volume_change']:+.2%}",
+        ]
+    else:
+        sections.append(f"Volume {report['volume']:.4g}")
+    return " | ".join(sections)
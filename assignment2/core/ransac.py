@@ -0,0 +1,128 @@
+from typing import Optional
+
+import numpy as np
+
+__all__ = ["fit_plane", "plane_hypotheses", "sample_triples", "ransac_planes"]
+
+
+def fit_plane(points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fits a plane to a set of points in the least squares sense.
+
+    The plane passes through the centroid, and its normal is the direction of least variance,
+    i.e. the eigenvector of the smallest eigenvalue of the points' 3x3 covariance matrix.
+
+    :param points: An Nx3 array of (at least three) points.
+    :return: A tuple (point, normal) of the plane, with a unit normal.
+    """
+    centroid = points.mean(axis=0)
+    centered = points - centroid
+    _, eigenvectors = np.linalg.eigh(centered.T @ centered)
+    return centroid, eigenvectors[:, 0]
+
+
+def plane_hypotheses(
+    points: np.ndarray, samples: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the planes through triples of points, for a whole batch of triples at once.
+
+    :param points: An Nx3 array of points.
+    :param samples: An Hx3 array of point indices, one triple per hypothesis.
+    :return: A tuple (normals, offsets) of the Hx3 unit normals and the H offsets d = q . n of the planes.
+             Degenerate triples (collinear, or repeating a point) get a zero normal and an infinite offset,
+             so no point is ever within any distance of them, and they never have any inliers.
+    """
+    a, b, c = (points[samples[:, i]] for i in range(3))
+    normals = np.cross(b - a, c - a)
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(
+        normals, lengths, out=np.zeros_like(normals), where=lengths > 0
+    )
+    offsets = np.einsum("ij,ij->i", a, normals)
+    offsets[lengths[:, 0] == 0] = np.inf
+    return normals, offsets
+
+
+def sample_triples(rng: np.random.Generator, n: int, count: int) -> np.ndarray:
+    """
+    Draws triples of distinct indices, each uniformly among all such triples.
+
+    :param rng: The random number generator.
+    :param n: Number of indices to draw from, at least 3.
+    :param count: Number of triples.
+    :return: A count x 3 array of indices in [0, n).
+    """
+    # The second and third index are drawn from fewer values and skip the ones drawn before
+    first = rng.integers(0, n, count)
+    second = rng.integers(0, n - 1, count)
+    second += second >= first
+    third = rng.integers(0, n - 2, count)
+    third += third >= np.minimum(first, second)
+    third += third >= np.maximum(first, second)
+    return np.stack([first, second, third], axis=-1)
+
+
+def ransac_planes(
+    points: np.ndarray,
+    max_planes: int = 10,
+    threshold: float = 0.01,
+    min_inliers: int = 100,
+    hypotheses: int = 256,
+    evaluation_size: int = 20_000,
+    seed: Optional[int] = None,
+) -> tuple[list[tuple[np.ndarray, np.ndarray]], np.ndarray]:
+    """
+    Detects multiple planes in a point cloud with RANSAC, one plane after the other.
+
+    For every plane, a batch of hypotheses (planes through random point triples) is scored at once,
+    by counting the inliers among a random subset of the remaining points with a single matrix product.
+    The best hypothesis is refined with a least squares fit to all its inliers (see fit_plane()),
+    whose inliers are then labelled and removed before looking for the next plane.
+
+    :param points: An Nx3 array of points.
+    :param max_planes: Maximum number of planes to detect.
+    :param threshold: Maximum distance of an inlier to its plane.
+    :param min_inliers: Planes with fewer inliers end the detection.
+    :param hypotheses: Number of hypotheses scored per plane.
+    :param evaluation_size: Number of (remaining) points which hypotheses are scored on.
+    :param seed: Seed for the random sampling.
+    :return: A tuple (planes, labels), where planes is a list of (point, normal) tuples
+             and labels holds the index of every point's plane, or -1 for points which belong to none.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    labels = np.full(len(points), -1, dtype=np.int64)
+    remaining = np.arange(len(points))
+    planes = []
+    while len(planes) < max_planes and len(remaining) >= max(min_inliers, 3):
+        # Score all hypotheses on the same subset of the remaining points
+        candidates = points[remaining]
+        samples = sample_triples(rng, len(candidates), hypotheses)
+        normals, offsets = plane_hypotheses(candidates, samples)
+        subset = candidates[
+            rng.choice(
+                len(candidates),
+                min(evaluation_size, len(candidates)),
+                replace=False,
+            )
+        ]
+        scores = np.count_nonzero(
+            np.abs(subset @ normals.T - offsets) < threshold, axis=0
+        )
+        best = np.argmax(scores)
+        inliers = (
+            np.abs(candidates @ normals[best] - offsets[best]) < threshold
+        )
+        if np.count_nonzero(inliers) < max(min_inliers, 3):
+            break
+
+        # Refine the plane with all of its inliers, which may gain a few more
+        point, normal = fit_plane(candidates[inliers])
+        inliers = np.abs((candidates - point) @ normal) < threshold
+        if np.count_nonzero(inliers) < max(min_inliers, 3):
+            break
+        labels[remaining[inliers]] = len(planes)
+        remaining = remaining[~inliers]
+        planes.append((point, normal))
+    return planes, labels
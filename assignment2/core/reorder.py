@@ -0,0 +1,101 @@
+import numpy as np
+from scipy.sparse import csr_array, sparray
+
+from .laplacian import compact_csr
+
+__all__ = [
+    "rcm_order",
+    "spread_bits",
+    "morton_order",
+    "inverse_permutation",
+    "permute_laplacian",
+    "REORDERINGS",
+]
+
+
+def rcm_order(L: sparray) -> np.ndarray:
+    """
+    Computes the reverse Cuthill-McKee ordering of a Laplacian's graph, which minimizes its bandwidth.
+
+    With a small bandwidth the neighbours of every row are close in memory,
+    so a product streams through the vertex array instead of jumping around in it.
+
+    :param L: The NxN sparse Laplacian matrix (only its structure is used).
+    :return: The new vertex order, i.e. order[i] is the old index of the vertex placed at index i.
+    """
+    # Imported on first use, see component_blocks()
+    from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+    return reverse_cuthill_mckee(csr_array(L), symmetric_mode=True).astype(
+        np.int64
+    )
+
+
+def spread_bits(values: np.ndarray) -> np.ndarray:
+    """
+    Inserts two zero bits between each of the lower 21 bits of every value.
+
+    :param values: Unsigned integers below 2**21.
+    :return: The spread values as uint64.
+    """
+    values = values.astype(np.uint64) & np.uint64(0x1FFFFF)
+    for shift, mask in [
+        (32, 0x1F00000000FFFF),
+        (16, 0x1F0000FF0000FF),
+        (8, 0x100F00F00F00F00F),
+        (4, 0x10C30C30C30C30C3),
+        (2, 0x1249249249249249),
+    ]:
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def morton_order(vertices: np.ndarray) -> np.ndarray:
+    """
+    Sorts vertices along a Z-order (Morton) space-filling curve through their bounding box.
+
+    Vertices which are close in space end up close in memory, which only needs the positions (not the graph).
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :return: The new vertex order, i.e. order[i] is the old index of the vertex placed at index i.
+    """
+    if len(vertices) == 0:
+        return np.zeros(0, dtype=np.int64)
+    lower = vertices.min(axis=0)
+    extent = max(np.ptp(vertices, axis=0).max(), np.finfo(np.float64).tiny)
+    cells = ((vertices - lower) / extent * ((1 << 21) - 1)).astype(np.uint64)
+    codes = (
+        spread_bits(cells[:, 0])
+        | (spread_bits(cells[:, 1]) << np.uint64(1))
+        | (spread_bits(cells[:, 2]) << np.uint64(2))
+    )
+    return np.argsort(codes, kind="stable")
+
+
+def inverse_permutation(order: np.ndarray) -> np.ndarray:
+    """
+    :param order: A permutation of the vertex indices.
+    :return: The inverse permutation, i.e. the new index of every old vertex.
+    """
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order), dtype=order.dtype)
+    return inverse
+
+
+def permute_laplacian(L: sparray, order: np.ndarray) -> csr_array:
+    """
+    Renumbers the vertices of a Laplacian, i.e. computes P L P^T for the permutation matrix P of the order.
+
+    :param L: The NxN sparse Laplacian matrix.
+    :param order: The new vertex order, see rcm_order() and morton_order().
+    :return: The permuted Laplacian, with the value and index types of L.
+    """
+    L = csr_array(L)
+    return compact_csr(L[order][:, order], L.dtype)
+
+
+# Vertex orderings by name, each computing the order from the vertex positions and the Laplacian
+REORDERINGS = {
+    "rcm": lambda vertices, L: rcm_order(L),
+    "morton": lambda vertices, L: morton_order(vertices),
+}
@@ -0,0 +1,65 @@
+import numpy as np
+
+__all__ = ["rotation_component", "axis_of_rotation", "angle_of_rotation"]
+
+
+def rotation_component(transformation: np.ndarray) -> np.ndarray:
+    """
+    Finds the rotation component of an affine transformation matrix.
+
+    The input matrix may contain translation and scaling components, but will not contain shear.
+
+    :param transformation: A 4x4 (or 3x3) affine transformation matrix.
+    :return: The 3x3 rotation matrix implied by this transformation.
+    """
+    transformation = np.array(transformation)
+
+    # The translation is contained entirely in the 4th column, so it is dropped when the matrix is made 3x3
+    rotation_scale = transformation[:3, :3]
+    U, _, Vt = np.linalg.svd(rotation_scale)
+    rotation = np.dot(U, Vt)
+    det_rotation = np.linalg.det(rotation)
+    if det_rotation < 0:
+        rotation[:, -1] *= -1
+    return rotation
+
+
+def axis_of_rotation(transformation: np.ndarray) -> np.ndarray:
+    """
+    Finds the axis of rotation for a transformation matrix.
+
+    :param transformation: The 3x3 transformation matrix for which to find the axis of rotation.
+    :return: The normalized axis of rotation.
+    """
+    rotation = rotation_component(transformation)
+    theta = np.arccos((np.trace(rotation) - 1) / 2)
+    axis = np.array([])
+    if np.isclose(theta, np.pi) or np.isclose(theta, 0):
+        # MEMO: in this case, any vector perpendicular to the plane of rotation is valid.
+        axis = np.cross(rotation[0, :], rotation[1, :])
+    else:
+        axis = (
+            np.array(
+                [
+                    rotation[2, 1] - rotation[1, 2],
+                    rotation[0, 2] - rotation[2, 0],
+                    rotation[1, 0] - rotation[0, 1],
+                ]
+            )
+            / 2
+            * np.sin(theta)
+        )
+    axis = axis / np.linalg.norm(axis)
+    return axis
+
+
+def angle_of_rotation(transformation: np.ndarray) -> float:
+    """
+    Finds the angle of rotation for a transformation matrix.
+
+    :param transformation: The 3x3 transformation matrix for which to find the angle of rotation.
+    :return: The angle of rotation in radians.
+    """
+    rotation = rotation_component(transformation)
+
+    return np.arccos((np.trace(rotation) - 1) / 2)
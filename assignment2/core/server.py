@@ -0,0 +1,542 @@
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from .cache import LRUCache
+from .deltas import coordinates_fingerprint
+from .laplacian import combinatorial_laplacian, cotangent_laplacian
+from .planes import SquaredDistanceToPlanes
+from .smoothing import LaplaceSmoother
+
+__all__ = [
+    "FRAME_HEADER",
+    "FRAME_MAGIC",
+    "ARRAY_ALIGNMENT",
+    "MAX_METADATA",
+    "MAX_PAYLOAD",
+    "encode_frame",
+    "decode_frame",
+    "read_frame",
+    "write_frame",
+    "MeshTopologyArrays",
+    "MeshJobServer",
+    "MeshJobClient",
+    "serve",
+]
+
+# Every frame starts with the magic bytes, the length of its JSON metadata and the length of its array payload
+FRAME_HEADER = struct.Struct("<4sIQ")
+FRAME_MAGIC = b"A2MJ"
+# Arrays start at multiples of this in the payload, so the received views are aligned for vectorized loops
+ARRAY_ALIGNMENT = 64
+# Longest accepted metadata, anything longer is a broken or foreign stream
+MAX_METADATA = 1 << 20
+# Longest accepted array payload (4 GiB, e.g. 170M float64 vertices), so a corrupt length can't exhaust the memory
+MAX_PAYLOAD = 1 << 32
+
+
+def encode_frame(metadata: dict, arrays: dict[str, np.ndarray]) -> list:
+    """
+    Lays out a message as a frame: the header, the metadata as JSON (with a descriptor of every array),
+    and the raw bytes of the arrays, each aligned to ARRAY_ALIGNMENT.
+
+    The arrays aren't serialized or concatenated: the result holds views of their memory,
+    to be passed to `writelines()`, so they are only copied into the socket.
+
+    :param metadata: JSON-serializable fields of the message. The key "arrays" is reserved.
+    :param arrays: The arrays of the message by name, of any fixed-size type.
+    :return: The buffers making up the frame.
+    """
+    descriptors, buffers, offset = [], [], 0
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype.hasobject:
+            raise ValueError(
+                f"Array '{name}' of type {array.dtype} can't be sent"
+            )
+        padding = -offset % ARRAY_ALIGNMENT
+        if padding:
+            buffers.append(bytes(padding))
+            offset += padding
+        descriptors.append(
+            {
+                "name": name,
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+        )
+        buffers.append(
+            memoryview(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+        )
+        offset += array.nbytes
+    body = json.dumps({**metadata, "arrays": descriptors}).encode()
+    return [FRAME_HEADER.pack(FRAME_MAGIC, len(body), offset), body, *buffers]
+
+
+def decode_frame(
+    body: bytes, payload: bytes
+) -> tuple[dict, dict[str, np.ndarray]]:
+    """
+    Inverts encode_frame(). The arrays are read-only views of the payload, no array data is copied.
+
+    :param body: The JSON metadata of the frame.
+    :param payload: The array payload of the frame.
+    :return: A tuple (metadata, arrays by name).
+    """
+    metadata = json.loads(body)
+    arrays = {}
+    for descriptor in metadata.pop("arrays", []):
+        dtype = np.dtype(descriptor["dtype"])
+        if dtype.hasobject:
+            raise ValueError(f"Array '{descriptor['name']}' has type {dtype}")
+        shape = tuple(descriptor["shape"])
+        arrays[descriptor["name"]] = np.frombuffer(
+            payload, dtype, int(np.prod(shape)), descriptor["offset"]
+        ).reshape(shape)
+    return metadata, arrays
+
+
+async def read_frame(
+    reader: asyncio.StreamReader,
+) -> Optional[tuple[dict, dict[str, np.ndarray]]]:
+    """
+    Receives one frame, see decode_frame().
+
+    :param reader: The receiving end of the connection.
+    :return: A tuple (metadata, arrays by name), or None if the connection was closed between frames.
+    :raises ValueError: If the header is broken, or announces more than MAX_METADATA or MAX_PAYLOAD bytes.
+    """
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as error:
+        if error.partial:
+            raise
+        return None
+    magic, body_length, payload_length = FRAME_HEADER.unpack(header)
+    if magic != FRAME_MAGIC or body_length > MAX_METADATA:
+        raise ValueError("Not a mesh job frame")
+    if payload_length > MAX_PAYLOAD:
+        raise ValueError(
+            f"Frame payload of {payload_length} bytes exceeds {MAX_PAYLOAD}"
+        )
+    body = await reader.readexactly(body_length)
+    payload = await reader.readexactly(payload_length)
+    return decode_frame(body, payload)
+
+
+async def write_frame(
+    writer: asyncio.StreamWriter,
+    metadata: dict,
+    arrays: Optional[dict[str, np.ndarray]] = None,
+):
+    """
+    Sends one frame, see encode_frame().
+
+    :param writer: The sending end of the connection.
+    :param metadata: JSON-serializable fields of the message.
+    :param arrays: The arrays of the message by name.
+    """
+    writer.writelines(encode_frame(metadata, arrays or {}))
+    await writer.drain()
+
+
+class MeshTopologyArrays(object):
+    """
+    The connectivity of a mesh uploaded to a MeshJobServer, which smoothing requests refer to by its key.
+    """
+
+    def __init__(
+        self,
+        num_verts: int,
+        edges: np.ndarray,
+        triangles: Optional[np.ndarray] = None,
+    ):
+        """
+        :param num_verts: Number of vertices of the mesh.
+        :param edges: Vertex indices of the edges as an Ex2 numpy array.
+        :param triangles: Optional triangle vertex indices as a Tx3 numpy array, needed by the cotangent Laplacian.
+        """
+        self.num_verts = num_verts
+        # Copied, so the cache doesn't keep the whole received frame alive
+        self.edges = np.array(edges, dtype=np.int32).reshape([-1, 2])
+        self.triangles = (
+            None
+            if triangles is None
+            else np.array(triangles, dtype=np.int32).reshape([-1, 3])
+        )
+        self.key = coordinates_fingerprint(
+            np.asarray(num_verts, dtype=np.int64),
+            self.edges,
+            (
+                np.zeros([0, 3], np.int32)
+                if triangles is None
+                else self.triangles
+            ),
+        )
+
+
+class MeshJobServer(object):
+    """
+    Serves smoothing and plane fitting to processes outside Blender over a Unix socket.
+
+    Every request and response is a frame (see encode_frame()) whose metadata names the operation and its parameters.
+    Requests on one connection are answered in order, and concurrent clients use separate connections.
+    The event loop only moves frames; the math runs on a thread pool (the sparse products and the NumPy
+    arithmetic release the GIL), so a large mesh doesn't hold up the requests of other clients.
+
+    Meshes are smoothed in two steps: a client uploads the connectivity once ("topology") and refers to it by key
+    in every "smooth" request, so only the vertex positions travel per request.
+    The topologies and their combinatorial Laplacians are kept in LRU caches, so repeated requests skip building
+    the operator; a request for a dropped topology fails with a KeyError, after which the client uploads it again.
+    Cotangent Laplacians depend on the vertex positions, which change with every request of a smoothing session,
+    so they are built per request rather than evicting the reusable operators from the cache.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cache_size: int = 8):
+        """
+        :param max_workers: Size of the thread pool, defaults to the ThreadPoolExecutor default.
+        :param cache_size: Number of topologies and of combinatorial Laplacians kept.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_workers = max_workers
+        self.topologies = LRUCache(cache_size)
+        self.laplacians = LRUCache(cache_size)
+        self.operations = {
+            "topology": self.upload_topology,
+            "smooth": self.smooth,
+            "planes": self.fit_planes,
+            "stats": self.statistics,
+        }
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def upload_topology(self, params: dict, arrays: dict) -> tuple[dict, dict]:
+        topology = MeshTopologyArrays(
+            int(params["num_verts"]), arrays["edges"], arrays.get("triangles")
+        )
+        self.topologies.put(topology.key, topology)
+        return {"topology": topology.key}, {}
+
+    def laplacian(
+        self,
+        topology: MeshTopologyArrays,
+        laplacian: str,
+        vertices: np.ndarray,
+    ):
+        dtype = np.float32 if vertices.dtype == np.float32 else np.float64
+        if laplacian == "combinatorial":
+            return self.laplacians.get(
+                (topology.key, laplacian, np.dtype(dtype).name),
+                lambda: combinatorial_laplacian(
+                    topology.num_verts, topology.edges, dtype
+                ),
+            )
+        if laplacian == "cotangent":
+            if topology.triangles is None:
+                raise ValueError("The cotangent Laplacian needs triangles")
+            # The weights depend on the geometry, which hardly ever repeats, so they aren't cached
+            return cotangent_laplacian(vertices, topology.triangles, dtype)
+        raise ValueError(
+            f"Unknown Laplacian '{laplacian}', expected 'combinatorial' or 'cotangent'"
+        )
+
+    def smooth(self, params: dict, arrays: dict) -> tuple[dict, dict]:
+        topology = self.topologies.get(params["topology"])
+        vertices = arrays["vertices"]
+        if vertices.shape != (topology.num_verts, 3):
+            raise ValueError(
+                f"Expected {topology.num_verts}x3 vertices, got {vertices.shape}"
+            )
+        L = self.laplacian(
+            topology, params.get("laplacian", "combinatorial"), vertices
+        )
+        smoother = LaplaceSmoother(
+            np.array(vertices, dtype=L.dtype),
+            L,
+            float(params["tau"]),
+            int(params["iterations"]),
+            mu=params.get("mu"),
+        )
+        return {}, {"vertices": smoother.run()}
+
+    def fit_planes(self, params: dict, arrays: dict) -> tuple[dict, dict]:
+        solver = SquaredDistanceToPlanes.from_arrays(
+            arrays["points"], arrays["normals"], arrays.get("weights")
+        )
+        point = solver.optimal_point(params.get("robust"), params.get("scale"))
+        result = {"point": point}
+        if "queries" in arrays:
+            result["nearest"], result["distances"] = solver.nearest_planes(
+                arrays["queries"], int(params.get("k", 1))
+            )
+        distance = float(solver.sum_of_squared_distances(point))
+        return {"sum_of_squared_distances": distance}, result
+
+    def statistics(self, params: dict, arrays: dict) -> tuple[dict, dict]:
+        with self.stats_lock:
+            operations = {
+                name: dict(stats) for name, stats in self.stats.items()
+            }
+        return {
+            "operations": operations,
+            "workers": self.max_workers,
+            "topologies": len(self.topologies),
+            "laplacians": len(self.laplacians),
+            "laplacian_hits": self.laplacians.hits,
+            "laplacian_misses": self.laplacians.misses,
+        }, {}
+
+    def record(self, operation: str, waiting: float, computing: float):
+        with self.stats_lock:
+            stats = self.stats.setdefault(
+                operation, {"count": 0, "waiting": 0.0, "computing": 0.0}
+            )
+            stats["count"] += 1
+            stats["waiting"] += waiting
+            stats["computing"] += computing
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """
+        Answers the requests of one connection until the client closes it.
+        A failing request is answered with its error, only a broken frame closes the connection.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                metadata, arrays = frame
+                operation = metadata.get("op")
+                received = time.perf_counter()
+
+                def run():
+                    started = time.perf_counter()
+                    result = self.operations[operation](
+                        metadata.get("params", {}), arrays
+                    )
+                    self.record(
+                        operation,
+                        started - received,
+                        time.perf_counter() - started,
+                    )
+                    return result
+
+                try:
+                    if operation not in self.operations:
+                        raise ValueError(
+                            f"Unknown operation '{operation}', expected one of {list(self.operations)}"
+                        )
+                    response, result = await loop.run_in_executor(
+                        self.executor, run
+                    )
+                except Exception as error:
+                    response, result = {
+                        "error": str(error),
+                        "type": type(error).__name__,
+                    }, {}
+                await write_frame(writer, response, result)
+        except (
+            ValueError,
+            MemoryError,
+            asyncio.IncompleteReadError,
+            ConnectionError,
+        ):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, path: str) -> asyncio.AbstractServer:
+        """
+        Starts listening on a Unix socket, replacing a stale socket file.
+
+        :param path: Path of the socket file.
+        :return: The listening server, e.g. for `serve_forever()` or `close()`.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        return await asyncio.start_unix_server(self.handle, path=path)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class MeshJobClient(object):
+    """
+    The client side of a MeshJobServer connection, for use from asyncio code.
+    Requests of one client are sent one after the other; use several clients for concurrent requests.
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.lock = asyncio.Lock()
+        # Uploaded topologies by key, to upload them again when the server dropped them
+        self.uploads = {}
+
+    @classmethod
+    async def connect(cls, path: str) -> "MeshJobClient":
+        """
+        :param path: Path of the server's socket file.
+        :return: The connected client.
+        """
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def request(
+        self, operation: str, params: Optional[dict] = None, **arrays
+    ) -> tuple[dict, dict[str, np.ndarray]]:
+        """
+        Sends a request and waits for its response.
+
+        :param operation: Name of the operation, one of the keys of MeshJobServer.operations.
+        :param params: JSON-serializable parameters of the operation.
+        :param arrays: The arrays of the request by name.
+        :return: A tuple (metadata, arrays by name) of the response. The arrays are read-only.
+        :raises KeyError: If the request refers to a topology the server doesn't know (anymore).
+        :raises RuntimeError: If the operation failed on the server for another reason.
+        """
+        async with self.lock:
+            await write_frame(
+                self.writer, {"op": operation, "params": params or {}}, arrays
+            )
+            frame = await read_frame(self.reader)
+        if frame is None:
+            raise ConnectionError("The server closed the connection")
+        metadata, result = frame
+        if "error" in metadata:
+            if metadata["type"] == "KeyError":
+                raise KeyError(metadata["error"])
+            raise RuntimeError(
+                f"'{operation}' failed on the server with {metadata['type']} '{metadata['error']}'"
+            )
+        return metadata, result
+
+    async def upload_topology(
+        self,
+        num_verts: int,
+        edges: np.ndarray,
+        triangles: Optional[np.ndarray] = None,
+    ) -> str:
+        """
+        :param num_verts: Number of vertices of the mesh.
+        :param edges: Vertex indices of the edges as an Ex2 numpy array.
+        :param triangles: Optional triangle vertex indices as a Tx3 numpy array, needed by the cotangent Laplacian.
+        :return: The key to smooth meshes of this topology with, see smooth().
+        """
+        arrays = {"edges": edges}
+        if triangles is not None:
+            arrays["triangles"] = triangles
+        metadata, _ = await self.request(
+            "topology", {"num_verts": num_verts}, **arrays
+        )
+        self.uploads[metadata["topology"]] = (num_verts, edges, triangles)
+        return metadata["topology"]
+
+    async def smooth(
+        self,
+        vertices: np.ndarray,
+        topology: str,
+        tau: float,
+        iterations: int,
+        mu: Optional[float] = None,
+        laplacian: str = "combinatorial",
+    ) -> np.ndarray:
+        """
+        Performs iterative explicit (or Taubin) smoothing on the server, see LaplaceSmoother.
+        Float32 vertices are smoothed in single precision.
+
+        :param vertices: Vertex positions as an Nx3 numpy array.
+        :param topology: The key returned by upload_topology(). Uploaded again if the server dropped it.
+        :param tau: Update weight.
+        :param iterations: Number of smoothing iterations to perform.
+        :param mu: Optional negative step factor of Taubin smoothing, see taubin_mu().
+        :param laplacian: Which Laplacian to smooth with, "combinatorial" or "cotangent".
+        :return: The new positions of the vertices as an Nx3 numpy array.
+        """
+        params = {
+            "topology": topology,
+            "tau": tau,
+            "iterations": iterations,
+            "mu": mu,
+            "laplacian": laplacian,
+        }
+        try:
+            _, result = await self.request("smooth", params, vertices=vertices)
+        except KeyError:
+            if topology not in self.uploads:
+                raise
+            await self.upload_topology(*self.uploads[topology])
+            _, result = await self.request("smooth", params, vertices=vertices)
+        return result["vertices"]
+
+    async def optimal_point(
+        self,
+        points: np.ndarray,
+        normals: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+        robust: Optional[str] = None,
+        scale: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Finds the point minimizing the sum of squared distances to a set of planes on the server,
+        see SquaredDistanceToPlanes.optimal_point().
+
+        :param points: A point on every plane as a kx3 array.
+        :param normals: The normal of every plane as a kx3 array.
+        :param weights: Optional non-negative weight of every plane.
+        :param robust: Optional robust loss, one of the keys of ROBUST_LOSSES.
+        :param scale: Residual scale of the robust loss.
+        :return: The optimal point.
+        """
+        arrays = {"points": points, "normals": normals}
+        if weights is not None:
+            arrays["weights"] = weights
+        _, result = await self.request(
+            "planes", {"robust": robust, "scale": scale}, **arrays
+        )
+        return result["point"]
+
+    async def statistics(self) -> dict:
+        """
+        :return: The number of requests per operation with the seconds spent waiting for and in the thread pool,
+                 and the sizes and hit counts of the server's caches.
+        """
+        metadata, _ = await self.request("stats")
+        return metadata
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def serve(
+    path: str, max_workers: Optional[int] = None, cache_size: int = 8
+):
+    """
+    Runs a MeshJobServer until it is cancelled (e.g. with Ctrl+C).
+
+    :param path: Path of the socket file.
+    :param max_workers: Size of the thread pool, see MeshJobServer.
+    :param cache_size: Number of topologies and of Laplacians kept.
+    """
+    server = MeshJobServer(max_workers, cache_size)
+    listener = await server.start(path)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
@@ -0,0 +1,274 @@
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import coo_array, csr_array, sparray
+
+from .laplacian import localize_laplacian
+from .profiling import NO_SPANS, SpanRecorder
+from .reorder import inverse_permutation, permute_laplacian
+
+__all__ = [
+    "explicit_laplace_smooth",
+    "laplace_step_in_place",
+    "taubin_mu",
+    "taubin_smooth",
+    "localized_explicit_laplace_smooth",
+    "LaplaceSmoother",
+]
+
+
+# !!! This function will be used for automatic grading, don't edit the signature !!!
+def explicit_laplace_smooth(
+    vertices: np.ndarray,
+    L: coo_array,
+    tau: float,
+) -> np.ndarray:
+    """
+    Performs smoothing of a list of vertices given a combinatorial Laplace matrix and a weight Tau.
+
+    Updates are computed using the laplacian matrix and then weighted by Tau before subtracting from the vertices.
+
+        x = x - tau * L @ x
+
+    :param vertices: Vertices to apply offsets to as an Nx3 numpy array.
+    :param L: The NxN sparse laplacian matrix
+    :param tau: Update weight, tau=0 leaves the vertices unchanged, and tau=1 applies the full update.
+    :return: The new positions of the vertices as an Nx3 numpy array.
+    """
+    # A single product with all three columns streams L through memory once (instead of once per coordinate),
+    # and scaling the Nx3 result by tau avoids building a scaled copy of L.
+    # The result keeps the floating point type of the inputs.
+    return vertices - tau * (L @ vertices)
+
+
+def laplace_step_in_place(
+    X: np.ndarray, L: sparray, factor: float
+) -> np.ndarray:
+    """
+    Performs one explicit step x = x - factor * L @ x in place.
+
+    SciPy's public sparse product can't write into a given array, so the product is the only temporary:
+    it is scaled in place and subtracted straight into X.
+
+    :param X: Vertex positions as an Nx3 numpy array, which is overwritten.
+    :param L: The NxN sparse Laplacian matrix.
+    :param factor: The step factor, e.g. tau, or lam and mu of Taubin smoothing.
+    :return: X
+    """
+    LX = L @ X
+    LX *= factor
+    return np.subtract(X, LX, out=X)
+
+
+def taubin_mu(lam: float, pass_band: float = 0.1) -> float:
+    """
+    Computes the negative (inflating) Taubin step factor for a given positive one.
+
+    The filter (I - mu * L)(I - lam * L) passes frequencies below k_PB = 1/lam + 1/mu unchanged,
+    and attenuates the ones above it.
+
+    :param lam: The positive (shrinking) step factor.
+    :param pass_band: The pass-band frequency k_PB, typically between 0.01 and 0.1.
+    :return: The negative step factor mu, with mu < -lam.
+    """
+    return 1 / (pass_band - 1 / lam)
+
+
+def taubin_smooth(
+    vertices: np.ndarray,
+    L: sparray,
+    lam: float,
+    mu: float,
+    iterations: int,
+) -> np.ndarray:
+    """
+    Performs Taubin (lambda|mu) smoothing, which removes noise without shrinking the mesh like explicit smoothing.
+
+    Every iteration is a shrinking step followed by an inflating step with the same Laplacian:
+
+        x = x - lam * L @ x
+        x = x - mu * L @ x
+
+    Both steps of all iterations run in place on a single copy of the vertices, see laplace_step_in_place().
+    The two steps are deliberately not fused into a single product with (I - mu * L)(I - lam * L):
+    that operator couples every vertex with its 2-ring, so it has about 2.7 times the entries of L on a triangle mesh,
+    and one product with it is slower than the two products with L it replaces
+    (0.25s instead of 0.22s for 20 iterations on a 250k-vertex torus).
+
+    :param vertices: Vertex positions as an Nx3 numpy array, which is not modified.
+    :param L: The NxN sparse Laplacian matrix.
+    :param lam: The positive step factor.
+    :param mu: The negative step factor, see taubin_mu().
+    :param iterations: Number of (shrinking and inflating) iteration pairs to perform.
+    :return: The new positions of the vertices as an Nx3 numpy array.
+    """
+    X = np.array(vertices, order="C")
+    for _ in range(iterations):
+        for factor in (lam, mu):
+            laplace_step_in_place(X, L, factor)
+    return X
+
+
+def localized_explicit_laplace_smooth(
+    vertices: np.ndarray,
+    L_local: csr_array,
+    weights: np.ndarray,
+    tau: float,
+    iterations: int,
+    mu: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Performs iterative explicit smoothing of the active vertices of a localized Laplacian.
+
+        x_a = x_a - tau * w * (L_aa @ x_a + L_ab @ x_b)
+
+    The boundary vertices x_b are fixed, so their contribution is computed once up front,
+    and every iteration costs a single product with the (small) active sub-matrix.
+    When `mu` is given, every iteration is followed by an inflating step with mu instead of tau (see taubin_smooth()).
+
+    :param vertices: Local vertex positions, i.e. the active followed by the boundary vertices, as an Mx3 numpy array.
+    :param L_local: The local Laplacian, as returned by localize_laplacian().
+    :param weights: Per-vertex weights of the active vertices.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations to perform.
+    :param mu: Optional negative step factor of Taubin smoothing.
+    :return: The new positions of the active vertices.
+    """
+    num_active = L_local.shape[0]
+    L_aa = L_local[:, :num_active]
+    fixed = L_local[:, num_active:] @ vertices[num_active:]
+    steps = [
+        (factor * weights[:, None]).astype(vertices.dtype)
+        for factor in ([tau] if mu is None else [tau, mu])
+    ]
+    X = vertices[:num_active]
+    for _ in range(iterations):
+        for step in steps:
+            X = X - step * (L_aa @ X + fixed)
+    return X
+
+
+class LaplaceSmoother(object):
+    """
+    Iterative explicit Laplace smoothing of a vertex array, which can be advanced a few iterations at a time.
+
+    When per-vertex weights are given, only the weighted region (plus `halo` rings) is iterated,
+    see localize_laplacian(), and a region which is already localized (see region_laplacian()) can be passed as `local`.
+    When `mu` is given, every iteration is a Taubin shrinking and inflating step pair, see taubin_smooth().
+    When a vertex `order` is given, the vertices and the Laplacian are renumbered before smoothing
+    (for cache locality, see reorder.py), and coordinates() undoes the renumbering.
+    """
+
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        L: sparray,
+        tau: float,
+        iterations: int,
+        weights: Optional[np.ndarray] = None,
+        halo: int = 0,
+        recorder: SpanRecorder = NO_SPANS,
+        mu: Optional[float] = None,
+        order: Optional[np.ndarray] = None,
+        local: Optional[tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    ):
+        """
+        :param vertices: Vertex positions as an Nx3 numpy array, which is not modified.
+        :param L: The NxN sparse Laplacian matrix, or the local Laplacian of the region when `local` is given.
+        :param tau: Update weight.
+        :param iterations: Number of smoothing iterations to perform.
+        :param weights: Optional per-vertex smoothing weights as a numpy array of shape [n].
+        :param halo: Number of rings around the weighted region which are smoothed with falling-off weights.
+        :param recorder: Records the time spent localizing and iterating.
+        :param mu: Optional negative step factor of Taubin smoothing, see taubin_mu().
+        :param order: Optional vertex order to smooth in, see rcm_order() and morton_order().
+        :param local: Optional (active, boundary, active_weights) of the local Laplacian L, see localize_laplacian(),
+                      instead of `weights` and `halo`. `order` is ignored, since only the region is iterated.
+        """
+        self.original = vertices
+        self.order = None if local is not None else order
+        if self.order is not None:
+            with recorder.span("permute_laplacian", nnz=L.nnz):
+                self.inverse = inverse_permutation(order)
+                vertices = vertices[order]
+                L = permute_laplacian(L, order)
+                if weights is not None:
+                    weights = weights[order]
+        self.tau = tau
+        self.mu = mu
+        self.iterations = iterations
+        self.completed = 0
+        self.recorder = recorder
+        if local is not None:
+            self.active, boundary, self.weights = local
+            self.L = L
+            self.X = vertices[np.concatenate([self.active, boundary])]
+        elif weights is None:
+            self.active = None
+            self.L = L
+            self.X = vertices
+        else:
+            with recorder.span("localize_laplacian", halo=halo) as span:
+                self.active, boundary, self.L, self.weights = (
+                    localize_laplacian(L, weights, halo)
+                )
+                self.X = vertices[np.concatenate([self.active, boundary])]
+                span["args"]["active_verts"] = len(self.active)
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.iterations
+
+    def step(self, iterations: int = 1) -> int:
+        """
+        Performs (at most) the given number of the remaining smoothing iterations.
+
+        :param iterations: Maximum number of iterations to perform.
+        :return: The number of iterations which were actually performed.
+        """
+        iterations = min(iterations, self.iterations - self.completed)
+        with self.recorder.span(
+            "iterations",
+            iterations=iterations,
+            verts=len(self.X),
+            nnz=self.L.nnz,
+        ):
+            if self.active is None and self.mu is not None:
+                self.X = taubin_smooth(
+                    self.X, self.L, self.tau, self.mu, iterations
+                )
+            elif self.active is None:
+                for _ in range(iterations):
+                    self.X = explicit_laplace_smooth(self.X, self.L, self.tau)
+            else:
+                X_active = localized_explicit_laplace_smooth(
+                    self.X,
+                    self.L,
+                    self.weights,
+                    self.tau,
+                    iterations,
+                    self.mu,
+                )
+                self.X = np.concatenate([X_active, self.X[len(self.active) :]])
+        self.completed += iterations
+        return iterations
+
+    def run(self) -> np.ndarray:
+        """
+        Performs all remaining smoothing iterations, see step().
+
+        :return: The smoothed coordinates of all vertices.
+        """
+        self.step(self.iterations - self.completed)
+        return self.coordinates()
+
+    def coordinates(self) -> np.ndarray:
+        """
+        :return: The current coordinates of all vertices, as an Nx3 numpy array.
+        """
+        if self.active is None:
+            return self.X if self.order is None else self.X[self.inverse]
+        active = self.active if self.order is None else self.order[self.active]
+        coordinates = self.original.copy()
+        coordinates[active] = self.X[: len(self.active)]
+        return coordinates
@@ -0,0 +1,356 @@
+import hashlib
+from typing import Optional
+
+import numpy as np
+import scipy.linalg
+from scipy.sparse import csr_array, diags_array, identity, sparray
+from scipy.sparse.linalg import LinearOperator, eigsh, splu
+
+from .cache import LRUCache
+from .profiling import NO_SPANS, SpanRecorder
+
+__all__ = [
+    "DENSE_EIGENPROBLEM_SIZE",
+    "stiffness_and_mass",
+    "laplacian_eigenpairs",
+    "explicit_gains",
+    "SpectralBasis",
+    "topology_key",
+    "SpectralBasisCache",
+    "SPECTRAL_BASES",
+    "SpectralSmoother",
+    "cached_spectral_basis",
+]
+
+# Below this many vertices the eigenproblem is solved densely, which is faster than Lanczos iterations
+DENSE_EIGENPROBLEM_SIZE = 512
+
+
+def stiffness_and_mass(W: sparray) -> tuple[csr_array, np.ndarray, np.ndarray]:
+    """
+    Splits the normalized Laplacian L = I - D^(-1)W of a weight matrix into a symmetric generalized eigenproblem.
+
+    L itself isn't symmetric, but L = D^(-1)K with the symmetric stiffness matrix K = D - W,
+    so the eigenvectors of L solve K x = lambda D x and are orthonormal with respect to D.
+    Negative weights are clamped to zero, as cotangent_laplacian() does.
+    Vertices without any weight are left out of the problem (L leaves them in place).
+
+    :param W: The symmetric NxN weight matrix, e.g. the adjacency matrix or the cotangent weights.
+    :return: A tuple (K, mass, free), where `free` holds the indices of the vertices with a non-zero weight,
+             K is the stiffness matrix restricted to them and `mass` is the diagonal of D restricted to them.
+    """
+    W = csr_array(W, dtype=np.float64)
+    W.data = np.maximum(W.data, 0)
+    degrees = np.asarray(W.sum(axis=1)).ravel()
+    free = np.flatnonzero(degrees > 0)
+    W = W[free][:, free]
+    return diags_array(degrees[free]) - W, degrees[free], free
+
+
+def laplacian_eigenpairs(
+    K: sparray, mass: np.ndarray, k: int, sigma: float = -1e-6
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the k smallest eigenvalues (lowest frequencies) of K x = lambda diag(mass) x and their eigenvectors.
+
+    The problem is scaled to the symmetric standard one S y = lambda y with S = M^(-1/2) K M^(-1/2) and x = M^(-1/2) y,
+    which is solved with Lanczos iterations in shift-invert mode around `sigma`, i.e. on (S - sigma I)^(-1).
+    That turns the smallest eigenvalues into the largest ones, which converge in a few iterations.
+    S - sigma I is factorized once (with a fill-reducing ordering for symmetric matrices), so every iteration
+    is a pair of triangular solves. K is singular (constant vectors have eigenvalue 0),
+    so sigma is slightly negative to keep S - sigma I invertible. Small problems are solved densely.
+
+    :param K: The symmetric NxN stiffness matrix, see stiffness_and_mass().
+    :param mass: The positive diagonal of the mass matrix as a numpy array of shape [n].
+    :param k: Number of eigenpairs, at most N.
+    :param sigma: Shift of the shift-invert mode.
+    :return: A tuple (eigenvalues, eigenvectors) of the k ascending eigenvalues and the Nxk mass-orthonormal eigenvectors.
+    """
+    n = len(mass)
+    if k == 0:
+        return np.zeros(0), np.zeros((n, 0))
+    scale = 1 / np.sqrt(mass)
+    S = csr_array(diags_array(scale) @ K @ diags_array(scale))
+    if n <= max(DENSE_EIGENPROBLEM_SIZE, k + 1):
+        eigenvalues, eigenvectors = scipy.linalg.eigh(
+            S.toarray(), subset_by_index=[0, k - 1]
+        )
+    else:
+        factorization = splu(
+            (S - sigma * identity(n, format="csr")).tocsc(),
+            permc_spec="MMD_AT_PLUS_A",
+            options={"SymmetricMode": True},
+        )
+        eigenvalues, eigenvectors = eigsh(
+            S,
+            k,
+            sigma=sigma,
+            which="LM",
+            OPinv=LinearOperator(
+                (n, n), matvec=factorization.solve, dtype=np.float64
+            ),
+        )
+        order = np.argsort(eigenvalues)
+        eigenvalues, eigenvectors = eigenvalues[order], eigenvectors[:, order]
+    # Round-off may push the zero eigenvalues slightly below zero
+    return np.maximum(eigenvalues, 0), scale[:, None] * eigenvectors
+
+
+def explicit_gains(
+    eigenvalues: np.ndarray,
+    tau: float,
+    iterations: int,
+    mu: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Computes how much explicit Laplace (or Taubin) smoothing scales every frequency of a mesh.
+
+    An explicit step x = x - tau L x scales the eigenvector of eigenvalue lambda by (1 - tau lambda),
+    so `iterations` steps scale it by (1 - tau lambda)^iterations (times (1 - mu lambda)^iterations for Taubin steps).
+
+    :param eigenvalues: Eigenvalues of the Laplacian as a numpy array.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations.
+    :param mu: Optional negative step factor of Taubin smoothing, see taubin_mu().
+    :return: The gain of every frequency, with the shape of `eigenvalues`.
+    """
+    response = 1 - tau * eigenvalues
+    if mu is not None:
+        response *= 1 - mu * eigenvalues
+    return response**iterations
+
+
+class SpectralBasis(object):
+    """
+    The lowest frequencies (eigenvectors of the Laplacian) of a mesh, for filtering its coordinates.
+
+    Computing the basis is expensive, but then filtering the coordinates with any gains is a projection onto
+    the k eigenvectors and a reconstruction from them, O(nk), see filter().
+    Frequencies above the k lowest are dropped, i.e. the basis also acts as an ideal low-pass filter.
+    The basis only depends on the weight matrix, so it is shared through a cache, see cached_spectral_basis().
+    """
+
+    def __init__(
+        self,
+        W: sparray,
+        k: int,
+        dtype: np.dtype = np.float64,
+        recorder: SpanRecorder = NO_SPANS,
+    ):
+        """
+        :param W: The symmetric NxN weight matrix of the Laplacian, see stiffness_and_mass().
+        :param k: Number of eigenvectors, at most the number of vertices with any weight.
+        :param dtype: Floating point type the eigenvectors are stored in (they are always computed in double precision).
+        :param recorder: Records the time spent in the eigensolver.
+        """
+        self.num_verts = W.shape[0]
+        K, mass, self.free = stiffness_and_mass(W)
+        k = min(k, len(self.free))
+        with recorder.span("eigenpairs", verts=len(self.free), k=k):
+            self.eigenvalues, eigenvectors = laplacian_eigenpairs(K, mass, k)
+        self.eigenvectors = eigenvectors.astype(dtype)
+        self.mass = mass.astype(dtype)
+
+    @property
+    def k(self) -> int:
+        return len(self.eigenvalues)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (
+                self.eigenvectors,
+                self.eigenvalues,
+                self.mass,
+                self.free,
+            )
+        )
+
+    def project(self, vertices: np.ndarray) -> np.ndarray:
+        """
+        :param vertices: Vertex positions as an Nx3 numpy array.
+        :return: The kx3 spectral coefficients of the vertices with any weight.
+        """
+        X = vertices[self.free]
+        return self.eigenvectors.T @ (self.mass[:, None] * X)
+
+    def reconstruct(
+        self,
+        vertices: np.ndarray,
+        coefficients: np.ndarray,
+        gains: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        :param vertices: Original vertex positions as an Nx3 numpy array, which vertices without weight keep.
+        :param coefficients: The kx3 spectral coefficients, see project().
+        :param gains: Optional factor of every frequency as a numpy array of shape [k].
+        :return: The reconstructed vertex positions as an Nx3 numpy array.
+        """
+        if gains is not None:
+            coefficients = (
+                gains[:, None].astype(coefficients.dtype) * coefficients
+            )
+        reconstructed = vertices.copy()
+        reconstructed[self.free] = self.eigenvectors @ coefficients
+        return reconstructed
+
+    def filter(
+        self, vertices: np.ndarray, gains: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Scales every frequency of the coordinates by its gain, see explicit_gains().
+
+        :param vertices: Vertex positions as an Nx3 numpy array.
+        :param gains: Optional factor of every frequency as a numpy array of shape [k].
+        :return: The filtered vertex positions as an Nx3 numpy array.
+        """
+        return self.reconstruct(vertices, self.project(vertices), gains)
+
+
+def topology_key(W: sparray, k: int, dtype: np.dtype) -> str:
+    """
+    :return: A digest of a weight matrix's structure and values, which identifies its spectral basis.
+    """
+    W = csr_array(W)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(W.shape, dtype=np.int64).tobytes())
+    for array in (W.indptr, W.indices, W.data):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return f"{digest.hexdigest()}-{k}-{np.dtype(dtype).name}"
+
+
+class SpectralBasisCache(LRUCache):
+    """
+    A small thread-safe LRU cache of spectral bases with a memory budget, keyed by topology_key().
+
+    Repeating a filter with other settings on the same mesh (e.g. when redoing an operator) reuses the basis.
+    A basis holds k dense vectors per vertex (800 MB for 100 double precision eigenvectors of a 1M vertex mesh),
+    so the budget rather than the number of bases usually bounds the cache.
+    """
+
+    def __init__(self, size: int = 4, budget: int = 1 << 30):
+        """
+        :param size: Maximum number of bases kept, the least recently used one is dropped first.
+        :param budget: Maximum number of bytes of all bases, a basis exceeding it alone isn't kept at all.
+        """
+        super().__init__(size=size, budget=budget)
+
+    def basis(
+        self,
+        W: sparray,
+        k: int,
+        dtype: np.dtype = np.float64,
+        recorder: SpanRecorder = NO_SPANS,
+    ) -> SpectralBasis:
+        """
+        Returns the cached basis of the weight matrix, or computes (and caches) it.
+
+        :param W: The symmetric NxN weight matrix of the Laplacian.
+        :param k: Number of eigenvectors.
+        :param dtype: Floating point type of the eigenvectors.
+        :param recorder: Records the time spent hashing W and computing the basis.
+        :return: The spectral basis.
+        """
+        with recorder.span("topology_key", nnz=W.nnz):
+            key = topology_key(W, k, dtype)
+        return self.get(key, lambda: SpectralBasis(W, k, dtype, recorder))
+
+
+SPECTRAL_BASES = SpectralBasisCache()
+
+
+class SpectralSmoother(object):
+    """
+    Explicit Laplace (or Taubin) smoothing evaluated in a spectral basis instead of iterated.
+
+    Has the interface of LaplaceSmoother, but an iteration only advances a counter:
+    coordinates() scales the k spectral coefficients by the gains of all completed iterations (see explicit_gains())
+    and reconstructs the vertices, so any number of iterations costs O(nk).
+    Frequencies above the basis are dropped, so the result matches iterated smoothing once those have decayed.
+    """
+
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        basis: SpectralBasis,
+        tau: float,
+        iterations: int,
+        weights: Optional[np.ndarray] = None,
+        recorder: SpanRecorder = NO_SPANS,
+        mu: Optional[float] = None,
+    ):
+        """
+        :param vertices: Vertex positions as an Nx3 numpy array, which is not modified.
+        :param basis: The spectral basis of the mesh's Laplacian, see cached_spectral_basis().
+        :param tau: Update weight.
+        :param iterations: Number of smoothing iterations to perform.
+        :param weights: Optional per-vertex weights in [0, 1], which blend between the original and smoothed positions.
+        :param recorder: Records the time spent projecting and reconstructing.
+        :param mu: Optional negative step factor of Taubin smoothing, see taubin_mu().
+        """
+        self.original = vertices
+        self.basis = basis
+        self.tau = tau
+        self.mu = mu
+        self.weights = weights
+        self.iterations = iterations
+        self.completed = 0
+        self.recorder = recorder
+        with recorder.span("project", verts=len(vertices), k=basis.k):
+            self.coefficients = basis.project(vertices)
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.iterations
+
+    def step(self, iterations: int = 1) -> int:
+        """
+        Performs (at most) the given number of the remaining smoothing iterations, which is free.
+
+        :param iterations: Maximum number of iterations to perform.
+        :return: The number of iterations which were actually performed.
+        """
+        iterations = min(iterations, self.iterations - self.completed)
+        self.completed += iterations
+        return iterations
+
+    def run(self) -> np.ndarray:
+        """
+        Performs all remaining smoothing iterations, see step().
+
+        :return: The smoothed coordinates of all vertices.
+        """
+        self.step(self.iterations - self.completed)
+        return self.coordinates()
+
+    def coordinates(self) -> np.ndarray:
+        """
+        :return: The current coordinates of all vertices, as an Nx3 numpy array.
+        """
+        with self.recorder.span(
+            "reconstruct", verts=len(self.original), k=self.basis.k
+        ):
+            gains = explicit_gains(
+                self.basis.eigenvalues, self.tau, self.completed, self.mu
+            )
+            smoothed = self.basis.reconstruct(
+                self.original, self.coefficients, gains
+            )
+            if self.weights is not None:
+                weights = self.weights[:, None].astype(smoothed.dtype)
+                smoothed = self.original + weights * (smoothed - self.original)
+        return smoothed
+
+
+def cached_spectral_basis(
+    W: sparray,
+    k: int,
+    dtype: np.dtype = np.float64,
+    recorder: SpanRecorder = NO_SPANS,
+    cache: SpectralBasisCache = SPECTRAL_BASES,
+) -> SpectralBasis:
+    """
+    Returns the spectral basis of a weight matrix from the shared cache, see SpectralBasisCache.basis().
+    """
+    return cache.basis(W, k, dtype, recorder)
@@ -0,0 +1,1370 @@
+import asyncio
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+import numpy as np
+from scipy.sparse import csr_array
+from scipy.sparse.linalg import spsolve
+
+from .cache import LRUCache
+from .components import component_blocks, component_parallel_smooth
+from .deltas import CoordinateDelta, DeltaCache, coordinates_fingerprint
+from .geodesics import HeatGeodesics, cached_heat_geodesics, geodesic_falloff
+from .laplacian import (
+    combinatorial_laplacian,
+    cotangent_laplacian,
+    cotangent_weights,
+    edge_adjacency,
+    enclosed_volume,
+    grow_region,
+    localize_laplacian,
+    mass_matrix,
+    pin_laplacian,
+    region_laplacian,
+)
+from .multigrid import MultigridHierarchy, MultigridSmoother, aggregate
+from .out_of_core import (
+    VERTICES,
+    out_of_core_laplace_smooth,
+    save_combinatorial_laplacian,
+    write_array,
+)
+from .planes import SquaredDistanceToPlanes
+from .profiling import NO_SPANS, SpanRecorder
+from .quality import format_quality, mesh_quality, triangle_aspect_ratios
+from .ransac import fit_plane, ransac_planes, sample_triples
+from .reorder import (
+    REORDERINGS,
+    inverse_permutation,
+    morton_order,
+    permute_laplacian,
+    rcm_order,
+)
+from .rotation import angle_of_rotation, axis_of_rotation, rotation_component
+from .server import (
+    FRAME_HEADER,
+    FRAME_MAGIC,
+    MAX_PAYLOAD,
+    MeshJobClient,
+    MeshJobServer,
+    decode_frame,
+    encode_frame,
+    read_frame,
+)
+from .smoothing import (
+    LaplaceSmoother,
+    explicit_laplace_smooth,
+    taubin_mu,
+    taubin_smooth,
+)
+from .spectral import (
+    SpectralBasis,
+    SpectralBasisCache,
+    SpectralSmoother,
+    topology_key,
+)
+from .topology import MeshTopology, pinned_vertices
+
+# A unit cube as plain arrays, so these tests don't need Blender
+CUBE_VERTICES = np.array(
+    [[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)],
+    dtype=np.float64,
+)
+CUBE_EDGES = np.array(
+    [
+        [i, j]
+        for i in range(8)
+        for j in range(i + 1, 8)
+        if bin(i ^ j).count("1") == 1
+    ]
+)
+CUBE_TRIANGLES = np.array(
+    [
+        [0, 1, 3], [0, 3, 2],
+        [4, 6, 7], [4, 7, 5],
+        [0, 4, 5], [0, 5, 1],
+        [2, 3, 7], [2, 7, 6],
+        [0, 2, 6], [0, 6, 4],
+        [1, 5, 7], [1, 7, 3],
+    ]
+)  # fmt: skip
+
+
+def grid_edges(size: int) -> np.ndarray:
+    # Edges of a size x size grid of vertices, numbered row by row
+    index = np.arange(size * size).reshape(size, size)
+    return np.concatenate(
+        [
+            np.stack([index[:, :-1].ravel(), index[:, 1:].ravel()], axis=1),
+            np.stack([index[:-1].ravel(), index[1:].ravel()], axis=1),
+        ]
+    )
+
+
+def grid_triangles(size: int) -> np.ndarray:
+    # Two triangles per cell of a size x size grid of vertices, counter-clockwise seen from +z
+    index = np.arange(size * size).reshape(size, size)
+    a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+    c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+    return np.concatenate(
+        [np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)]
+    )
+
+
+def rotation_matrix(axis, angle) -> np.ndarray:
+    axis = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    K = np.array(
+        [
+            [0, -axis[2], axis[1]],
+            [axis[2], 0, -axis[0]],
+            [-axis[1], axis[0], 0],
+        ]
+    )
+    return np.eye(3) + np.sin(angle) * K + (1 - np.cos(angle)) * K @ K
+
+
+class TestCoreLaplacian(unittest.TestCase):
+
+    def test_combinatorial_laplacian_cube(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        self.assertEqual(L.shape, (8, 8))
+        self.assertEqual(L[0, 0], 1)
+        self.assertAlmostEqual(L[0, 1], -1 / 3)
+        self.assertTrue(np.allclose(L.sum(axis=1), 0))
+
+    def test_cotangent_laplacian_cube(self):
+        L = cotangent_laplacian(CUBE_VERTICES, CUBE_TRIANGLES)
+        self.assertTrue(
+            np.allclose(
+                L.toarray(), combinatorial_laplacian(8, CUBE_EDGES).toarray()
+            )
+        )
+
+    def test_mass_matrix_cube(self):
+        M = mass_matrix(CUBE_VERTICES, CUBE_TRIANGLES)
+        self.assertAlmostEqual(M.diagonal().sum(), 6)
+
+    def test_localize_laplacian_halo(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        weights = np.zeros(8)
+        weights[0] = 1.0
+        active, boundary, L_local, active_weights = localize_laplacian(
+            L, weights, halo=1
+        )
+        self.assertEqual(list(active), [0, 1, 2, 4])
+        self.assertEqual(list(boundary), [3, 5, 6])
+        self.assertEqual(L_local.shape, (4, 7))
+        self.assertTrue(np.allclose(active_weights, [1, 0.5, 0.5, 0.5]))
+
+    def test_region_laplacian_matches_localized_laplacian(self):
+        weights = np.zeros(8)
+        weights[0] = 1.0
+
+        def global_rows(active, boundary, L_local):
+            rows = np.zeros((len(active), 8))
+            rows[:, np.concatenate([active, boundary])] = L_local.toarray()
+            return rows
+
+        for L, elements, vertices in (
+            (combinatorial_laplacian(8, CUBE_EDGES), CUBE_EDGES, None),
+            (
+                cotangent_laplacian(CUBE_VERTICES, CUBE_TRIANGLES),
+                CUBE_TRIANGLES,
+                CUBE_VERTICES,
+            ),
+        ):
+            active, boundary, L_local, _ = localize_laplacian(L, weights, 1)
+            self.assertTrue(
+                np.array_equal(grow_region(L, weights, 1)[0], active)
+            )
+            self.assertTrue(
+                np.allclose(
+                    global_rows(
+                        active,
+                        *region_laplacian(active, elements, 8, vertices),
+                    ),
+                    global_rows(active, boundary, L_local),
+                )
+            )
+
+
+class TestCoreSmoothing(unittest.TestCase):
+
+    def test_explicit_laplace_smooth_preserves_centroid(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        smoothed = explicit_laplace_smooth(CUBE_VERTICES, L, 0.5)
+        self.assertTrue(
+            np.allclose(smoothed.mean(axis=0), CUBE_VERTICES.mean(axis=0))
+        )
+        self.assertLess(np.ptp(smoothed, axis=0).max(), 1)
+
+    def test_smoother_steps_match_run(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        stepped = LaplaceSmoother(CUBE_VERTICES, L, 0.5, 5)
+        while not stepped.done:
+            stepped.step(2)
+        self.assertEqual(stepped.completed, 5)
+        self.assertTrue(
+            np.allclose(
+                stepped.coordinates(),
+                LaplaceSmoother(CUBE_VERTICES, L, 0.5, 5).run(),
+            )
+        )
+
+    def test_localized_smoother_only_moves_region(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        weights = np.zeros(8)
+        weights[[0, 7]] = 1.0
+        smoothed = LaplaceSmoother(CUBE_VERTICES, L, 0.5, 1, weights).run()
+        expected = explicit_laplace_smooth(CUBE_VERTICES, L, 0.5)
+        self.assertTrue(np.allclose(smoothed[[0, 7]], expected[[0, 7]]))
+        self.assertTrue(np.allclose(smoothed[1:7], CUBE_VERTICES[1:7]))
+
+    def test_enclosed_volume_cube(self):
+        self.assertAlmostEqual(
+            enclosed_volume(CUBE_VERTICES, CUBE_TRIANGLES), 1.0
+        )
+
+    def test_taubin_smooth_matches_explicit_steps(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        mu = taubin_mu(0.5)
+        expected = CUBE_VERTICES
+        for _ in range(3):
+            expected = explicit_laplace_smooth(expected, L, 0.5)
+            expected = explicit_laplace_smooth(expected, L, mu)
+        smoothed = taubin_smooth(CUBE_VERTICES, L, 0.5, mu, 3)
+        self.assertTrue(np.allclose(smoothed, expected))
+
+        single = taubin_smooth(
+            CUBE_VERTICES.astype(np.float32),
+            combinatorial_laplacian(8, CUBE_EDGES, np.float32),
+            0.5,
+            mu,
+            3,
+        )
+        self.assertEqual(single.dtype, np.float32)
+        self.assertTrue(np.allclose(single, expected, atol=1e-5))
+
+    def test_taubin_shrinks_less_than_explicit(self):
+        # At equal cost, i.e. one Taubin iteration per two explicit iterations
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        explicit = LaplaceSmoother(CUBE_VERTICES, L, 0.5, 10).run()
+        taubin = LaplaceSmoother(
+            CUBE_VERTICES, L, 0.5, 5, mu=taubin_mu(0.5)
+        ).run()
+        self.assertGreater(
+            enclosed_volume(taubin, CUBE_TRIANGLES),
+            100 * enclosed_volume(explicit, CUBE_TRIANGLES),
+        )
+
+    def test_localized_taubin_matches_global(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        mu = taubin_mu(0.5)
+        stepped = LaplaceSmoother(CUBE_VERTICES, L, 0.5, 4, mu=mu)
+        while not stepped.done:
+            stepped.step(3)
+        localized = LaplaceSmoother(
+            CUBE_VERTICES, L, 0.5, 4, np.ones(8), mu=mu
+        ).run()
+        self.assertTrue(
+            np.allclose(
+                stepped.coordinates(),
+                taubin_smooth(CUBE_VERTICES, L, 0.5, mu, 4),
+            )
+        )
+        self.assertTrue(np.allclose(localized, stepped.coordinates()))
+
+
+class TestCoreOutOfCore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_saved_laplacian_matches_combinatorial_laplacian(self):
+        indptr, indices, data = save_combinatorial_laplacian(
+            self.directory.name, 8, CUBE_EDGES, chunk_size=5
+        )
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        saved = csr_array(
+            (np.asarray(data), np.asarray(indices), np.asarray(indptr)),
+            shape=(8, 8),
+        )
+        self.assertTrue(np.allclose(saved.toarray(), L.toarray()))
+
+    def test_chunked_smoothing_matches_in_memory_smoothing(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        save_combinatorial_laplacian(self.directory.name, 8, CUBE_EDGES)
+        write_array(self.directory.name, VERTICES, CUBE_VERTICES)
+        for mu in [None, taubin_mu(0.5)]:
+            expected = LaplaceSmoother(CUBE_VERTICES, L, 0.5, 3, mu=mu).run()
+            for chunk_size in [1, 3, 8]:
+                smoothed = out_of_core_laplace_smooth(
+                    self.directory.name, 0.5, 3, chunk_size, mu
+                )
+                self.assertTrue(np.allclose(smoothed, expected))
+
+
+class TestCoreReorder(unittest.TestCase):
+
+    def bandwidth(self, L):
+        rows, cols = L.nonzero()
+        return np.abs(rows - cols).max()
+
+    def test_rcm_reduces_bandwidth_of_scrambled_path(self):
+        scramble = np.random.default_rng(0).permutation(100)
+        path = np.stack([scramble[:-1], scramble[1:]], axis=1)
+        L = combinatorial_laplacian(100, path)
+        ordered = permute_laplacian(L, rcm_order(L))
+        self.assertGreater(self.bandwidth(L), 10)
+        self.assertEqual(self.bandwidth(ordered), 1)
+
+    def test_morton_order_follows_space(self):
+        points = np.array([[1, 1, 1], [0, 0, 0], [1, 0, 0], [0.1, 0, 0]])
+        self.assertEqual(list(morton_order(points)), [1, 3, 2, 0])
+        order = np.array([2, 0, 3, 1])
+        self.assertTrue(
+            np.all(order[inverse_permutation(order)] == np.arange(4))
+        )
+
+    def test_reordered_smoothing_matches_mesh_order(self):
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        weights = np.zeros(8)
+        weights[[0, 7]] = 1.0
+        for name, reorder in REORDERINGS.items():
+            order = reorder(CUBE_VERTICES, L)
+            for kwargs in [{}, {"weights": weights}, {"mu": taubin_mu(0.5)}]:
+                expected = LaplaceSmoother(CUBE_VERTICES, L, 0.5, 3, **kwargs)
+                reordered = LaplaceSmoother(
+                    CUBE_VERTICES, L, 0.5, 3, order=order, **kwargs
+                )
+                self.assertTrue(
+                    np.allclose(reordered.run(), expected.run()), name
+                )
+
+
+class TestCoreMultigrid(unittest.TestCase):
+
+    def test_aggregates_are_neighbourhoods(self):
+        edges = grid_edges(30)
+        W = edge_adjacency(900, edges).tocsr()
+        aggregates = aggregate(W)
+        self.assertTrue(100 <= aggregates.max() + 1 <= 450)
+        # Every aggregate is a root and (some of) its neighbours
+        for index in np.unique(aggregates):
+            members = np.flatnonzero(aggregates == index)
+            adjacent = W[members][:, members].toarray() + np.eye(len(members))
+            self.assertTrue(np.any(np.all(adjacent > 0, axis=1)))
+
+    def test_prolongation_keeps_constants(self):
+        hierarchy = MultigridHierarchy(
+            edge_adjacency(900, grid_edges(30)), min_size=16
+        )
+        self.assertGreater(len(hierarchy), 2)
+        self.assertEqual(hierarchy.sizes[0], 900)
+        for P in hierarchy.prolongation[1:]:
+            self.assertTrue(np.allclose(P @ np.ones(P.shape[1]), 1))
+
+    def test_cycles_converge_to_implicit_step(self):
+        rng = np.random.default_rng(0)
+        edges = grid_edges(40)
+        # An isolated vertex, which has to stay in place
+        vertices = rng.random((1601, 3))
+        hierarchy = MultigridHierarchy(
+            edge_adjacency(1601, edges), min_size=32
+        )
+        L = combinatorial_laplacian(1601, edges)
+        expected = spsolve(
+            csr_array(np.eye(1601) + 20.0 * L.toarray()).tocsc(), vertices
+        )
+        errors = [
+            np.abs(
+                MultigridSmoother(vertices, hierarchy, 20.0, cycles).run()
+                - expected
+            ).max()
+            for cycles in range(1, 6)
+        ]
+        self.assertTrue(np.all(np.diff(np.log(errors)) < np.log(0.5)))
+        self.assertLess(errors[-1], 1e-4)
+        self.assertTrue(np.allclose(expected[1600], vertices[1600]))
+
+    def test_steps_and_weights(self):
+        vertices = np.random.default_rng(1).random((400, 3))
+        hierarchy = MultigridHierarchy(
+            edge_adjacency(400, grid_edges(20)), min_size=16
+        )
+        weights = np.zeros(400)
+        weights[:10] = 1.0
+        smoother = MultigridSmoother(vertices, hierarchy, 5.0, 3, weights)
+        self.assertEqual(smoother.step(2), 2)
+        self.assertEqual(smoother.step(2), 1)
+        self.assertTrue(smoother.done)
+        smoothed = smoother.coordinates()
+        self.assertTrue(np.all(smoothed[10:] == vertices[10:]))
+        self.assertFalse(np.allclose(smoothed[:10], vertices[:10]))
+
+
+class TestCoreSpectral(unittest.TestCase):
+
+    def test_full_basis_matches_iterated_smoothing(self):
+        # With all eigenvectors nothing is dropped, so the spectral result is exact
+        vertices = np.concatenate([CUBE_VERTICES, [[5.0, 5.0, 5.0]]])
+        edges = CUBE_EDGES
+        for W, L in [
+            (
+                edge_adjacency(9, edges),
+                combinatorial_laplacian(9, edges),
+            ),
+            (
+                cotangent_weights(vertices, CUBE_TRIANGLES),
+                cotangent_laplacian(vertices, CUBE_TRIANGLES),
+            ),
+        ]:
+            basis = SpectralBasis(W, 100)
+            self.assertEqual(basis.k, 8)
+            self.assertTrue(np.allclose(basis.filter(vertices), vertices))
+            for mu in [None, taubin_mu(0.5)]:
+                expected = LaplaceSmoother(vertices, L, 0.5, 7, mu=mu).run()
+                smoothed = SpectralSmoother(vertices, basis, 0.5, 7, mu=mu)
+                self.assertTrue(np.allclose(smoothed.run(), expected))
+                # The isolated vertex stays in place
+                self.assertTrue(np.all(smoothed.coordinates()[8] == 5.0))
+
+    def test_lanczos_eigenvalues_of_ring(self):
+        # The normalized Laplacian of a ring has the eigenvalues 1 - cos(2 pi j / n)
+        n = 1000
+        ring = np.stack([np.arange(n), (np.arange(n) + 1) % n], axis=1)
+        basis = SpectralBasis(edge_adjacency(n, ring), 5)
+        expected = 1 - np.cos(2 * np.pi * np.array([0, 1, 1, 2, 2]) / n)
+        self.assertTrue(np.allclose(basis.eigenvalues, expected, atol=1e-9))
+        L = combinatorial_laplacian(n, ring)
+        self.assertTrue(
+            np.allclose(
+                L @ basis.eigenvectors,
+                basis.eigenvectors * basis.eigenvalues,
+                atol=1e-9,
+            )
+        )
+
+    def test_steps_and_weights(self):
+        basis = SpectralBasis(edge_adjacency(8, CUBE_EDGES), 8)
+        weights = np.zeros(8)
+        weights[0] = 0.5
+        smoother = SpectralSmoother(CUBE_VERTICES, basis, 0.5, 10, weights)
+        self.assertEqual(smoother.step(4), 4)
+        self.assertEqual(smoother.step(10), 6)
+        self.assertTrue(smoother.done)
+        smoothed = smoother.coordinates()
+        self.assertTrue(np.all(smoothed[1:] == CUBE_VERTICES[1:]))
+        full = SpectralSmoother(CUBE_VERTICES, basis, 0.5, 10).run()
+        self.assertTrue(
+            np.allclose(smoothed[0], (CUBE_VERTICES[0] + full[0]) / 2)
+        )
+
+    def test_cache_reuses_basis_per_topology(self):
+        cache = SpectralBasisCache(size=2)
+        W = edge_adjacency(8, CUBE_EDGES)
+        basis = cache.basis(W, 4)
+        self.assertIs(cache.basis(edge_adjacency(8, CUBE_EDGES), 4), basis)
+        self.assertIsNot(cache.basis(W, 3), basis)
+        self.assertIsNot(cache.basis(2 * W, 4), basis)
+        self.assertIsNot(cache.basis(W, 4), basis)
+
+    def test_cache_budget(self):
+        W = edge_adjacency(8, CUBE_EDGES)
+        basis = SpectralBasis(W, 4)
+        self.assertEqual(
+            basis.nbytes,
+            basis.eigenvectors.nbytes
+            + basis.eigenvalues.nbytes
+            + basis.mass.nbytes
+            + basis.free.nbytes,
+        )
+        cache = SpectralBasisCache(budget=basis.nbytes)
+        self.assertIs(
+            cache.get(topology_key(W, 4, np.float64), lambda: basis), basis
+        )
+        cache.basis(W, 3)
+        # Only the most recent basis fits the budget
+        self.assertEqual(len(cache), 1)
+        self.assertLessEqual(cache.nbytes, basis.nbytes)
+        # A basis exceeding the budget alone is returned, but not kept
+        self.assertEqual(
+            len(SpectralBasisCache(budget=0).basis(W, 4).eigenvalues), 4
+        )
+
+
+class TestCorePlanes(unittest.TestCase):
+
+    def test_cube_of_planes(self):
+        solver = SquaredDistanceToPlanes(
+            [
+                (np.zeros(3), np.array([1, 0, 0])),
+                (np.zeros(3), np.array([0, 1, 0])),
+                (np.zeros(3), np.array([0, 0, 1])),
+                (np.ones(3), np.array([-1, 0, 0])),
+                (np.ones(3), np.array([0, -1, 0])),
+                (np.ones(3), np.array([0, 0, -1])),
+            ]
+        )
+        self.assertAlmostEqual(
+            solver.sum_of_squared_distances([0.5, 0.5, 0.5]), 1.5
+        )
+        self.assertTrue(np.allclose(solver.optimal_point(), 0.5))
+
+    def test_empty_planes(self):
+        solver = SquaredDistanceToPlanes([])
+        self.assertEqual(solver.sum_of_squared_distances(np.zeros(3)), 0)
+        self.assertTrue(np.allclose(solver.optimal_point(), 0))
+        indices, distances = solver.nearest_planes(np.zeros((4, 3)), k=2)
+        self.assertEqual(indices.shape, (4, 0))
+
+    def test_weighted_quadric_matches_per_plane_distances(self):
+        rng = np.random.default_rng(0)
+        planes = list(zip(rng.normal(size=(20, 3)), rng.normal(size=(20, 3))))
+        weights = rng.uniform(0, 2, 20)
+        solver = SquaredDistanceToPlanes(planes, weights)
+        for point in rng.normal(size=(10, 3)):
+            self.assertAlmostEqual(
+                solver.sum_of_squared_distances(point),
+                weights @ solver.signed_distances(point) ** 2,
+            )
+        # The weighted optimum is a stationary point of the weighted sum
+        optimum = solver.optimal_point()
+        gradient = (
+            2 * (weights * solver.signed_distances(optimum)) @ solver.normals
+        )
+        self.assertTrue(np.allclose(gradient, 0))
+
+    def test_robust_optimal_point_ignores_outlier_planes(self):
+        # Ten planes through (1, 2, 3), give or take some noise, and two planes far away from it
+        rng = np.random.default_rng(0)
+        corner = np.array([1.0, 2.0, 3.0])
+        inliers = [
+            (corner + rng.normal(0, 0.01, 3), normal)
+            for normal in rng.normal(size=(10, 3))
+        ]
+        outliers = [(corner + 5, np.ones(3)), (corner - 4, [1, 0, 0])]
+        solver = SquaredDistanceToPlanes(inliers + outliers)
+        least_squares_error = np.linalg.norm(solver.optimal_point() - corner)
+        self.assertGreater(least_squares_error, 0.5)
+        for loss in ["huber", "tukey"]:
+            robust = solver.optimal_point(robust=loss)
+            self.assertLess(np.linalg.norm(robust - corner), 0.05, loss)
+        with self.assertRaises(ValueError):
+            solver.optimal_point(robust="cauchy")
+
+    def test_robust_optimal_point_keeps_point_without_weighted_planes(self):
+        # With a scale far below every distance, Tukey weights all planes with 0
+        rng = np.random.default_rng(0)
+        solver = SquaredDistanceToPlanes(
+            list(zip(rng.normal(0, 5, (10, 3)), rng.normal(size=(10, 3))))
+        )
+        robust = solver.robust_optimal_point("tukey", scale=0.01)
+        self.assertTrue(np.allclose(robust, solver.optimal_point()))
+
+    def test_optimal_point_ignores_planes_without_weight(self):
+        # Only two planes count, so any point on the line x = y = 0 is optimal
+        solver = SquaredDistanceToPlanes.from_arrays(
+            np.ones((3, 3)), np.eye(3), [1, 1, 0]
+        )
+        point = solver.optimal_point()
+        np.testing.assert_allclose(point[:2], [1, 1])
+        self.assertAlmostEqual(solver.sum_of_squared_distances(point), 0)
+
+    def test_sum_of_squared_distances_far_from_origin(self):
+        rng = np.random.default_rng(0)
+        points = 1e5 + rng.normal(size=(20, 3))
+        normals = rng.normal(size=(20, 3))
+        solver = SquaredDistanceToPlanes.from_arrays(points, normals)
+        point = 1e5 + rng.normal(size=3)
+        self.assertAlmostEqual(
+            solver.sum_of_squared_distances(point),
+            np.sum(np.square(solver.signed_distances(point))),
+            places=7,
+        )
+        optimum = solver.optimal_point()
+        self.assertAlmostEqual(
+            solver.sum_of_squared_distances(optimum),
+            np.sum(np.square(solver.signed_distances(optimum))),
+            places=7,
+        )
+
+    def test_state_round_trip(self):
+        rng = np.random.default_rng(0)
+        points, normals = rng.normal(size=(2, 30, 3))
+        solver = SquaredDistanceToPlanes.from_arrays(
+            points, normals, rng.uniform(0, 1, 30)
+        )
+        self.assertEqual(len(solver.planes), 30)
+        with tempfile.TemporaryFile() as file:
+            solver.save(file, colors=np.ones((30, 3)))
+            file.seek(0)
+            loaded = SquaredDistanceToPlanes.load(file)
+            file.seek(0)
+            self.assertIn("colors", np.load(file))
+        for name in SquaredDistanceToPlanes.STATE:
+            self.assertTrue(
+                np.array_equal(getattr(loaded, name), getattr(solver, name))
+            )
+        point = rng.normal(size=3)
+        self.assertEqual(
+            loaded.sum_of_squared_distances(point),
+            solver.sum_of_squared_distances(point),
+        )
+        self.assertTrue(
+            np.allclose(loaded.optimal_point(), solver.optimal_point())
+        )
+        # States saved before the quadric was centered hold it relative to the origin
+        state = solver.state()
+        state.pop("center")
+        origin = SquaredDistanceToPlanes.from_state(state)
+        state["A"], state["b"], c = origin.quadric(solver.weights)
+        state["c"] = c
+        origin = SquaredDistanceToPlanes.from_state(state)
+        self.assertAlmostEqual(
+            origin.sum_of_squared_distances(point),
+            solver.sum_of_squared_distances(point),
+        )
+
+    def test_per_plane_queries(self):
+        # Planes x = 0 and y = 2, with unnormalized normals
+        solver = SquaredDistanceToPlanes(
+            [
+                (np.zeros(3), np.array([2, 0, 0])),
+                (np.array([0, 2, 0]), np.array([0, -3, 0])),
+            ]
+        )
+        points = np.array([[1, 0, 5], [-3, 1.5, 0]])
+        self.assertTrue(
+            np.allclose(solver.signed_distances(points), [[1, 2], [-3, 0.5]])
+        )
+        self.assertTrue(
+            np.allclose(solver.signed_distances(points[0]), [1, 2])
+        )
+        self.assertTrue(
+            np.allclose(
+                solver.projections(points),
+                [
+                    [[0, 0, 5], [1, 2, 5]],
+                    [[0, 1.5, 0], [-3, 2, 0]],
+                ],
+            )
+        )
+        self.assertEqual(solver.projections(points[1]).shape, (2, 3))
+
+    def test_nearest_planes(self):
+        rng = np.random.default_rng(0)
+        normals = rng.normal(size=(50, 3))
+        solver = SquaredDistanceToPlanes(
+            list(zip(rng.uniform(-1, 1, (50, 3)), normals))
+        )
+        points = rng.uniform(-1, 1, (100, 3))
+        indices, distances = solver.nearest_planes(points, k=3, chunk_size=350)
+        all_distances = solver.signed_distances(points)
+        expected = np.argsort(np.abs(all_distances), axis=1)[:, :3]
+        self.assertTrue(np.all(indices == expected))
+        self.assertTrue(
+            np.allclose(
+                distances, np.take_along_axis(all_distances, expected, axis=1)
+            )
+        )
+
+
+def points_on_plane(rng, count, point, normal, noise=0.0) -> np.ndarray:
+    # Uniformly spread points of a 2x2 square on a plane, with gaussian noise along the normal
+    normal = np.asarray(normal, dtype=np.float64) / np.linalg.norm(normal)
+    u = np.cross(normal, [1, 0, 0] if abs(normal[0]) < 0.9 else [0, 1, 0])
+    u /= np.linalg.norm(u)
+    v = np.cross(normal, u)
+    s, t, offset = rng.uniform(-1, 1, (3, count, 1))
+    return point + s * u + t * v + offset * noise * normal
+
+
+class TestCoreRansac(unittest.TestCase):
+
+    def test_fit_plane(self):
+        rng = np.random.default_rng(0)
+        point, normal = fit_plane(
+            points_on_plane(rng, 50, [1, 2, 3], [0, 3, 4])
+        )
+        self.assertAlmostEqual(abs(normal @ [0, 0.6, 0.8]), 1)
+        self.assertAlmostEqual(normal @ (point - [1, 2, 3]), 0)
+
+    def test_detects_planes_among_outliers(self):
+        rng = np.random.default_rng(0)
+        normals = np.array([[0, 0, 1], [1, 0, 0.2], [0, 1, 0]])
+        points = np.concatenate(
+            [
+                points_on_plane(rng, 3000, [0, 0, 0], normals[0], 0.002),
+                points_on_plane(rng, 2000, [0, 0, 0.5], normals[1], 0.002),
+                points_on_plane(rng, 1000, [0.3, 0, 0], normals[2], 0.002),
+                rng.uniform(-1, 1, (500, 3)),
+            ]
+        )
+        planes, labels = ransac_planes(
+            points, threshold=0.01, min_inliers=200, seed=0
+        )
+        self.assertEqual(len(planes), 3)
+        for (_, normal), expected in zip(planes, normals):
+            expected = expected / np.linalg.norm(expected)
+            self.assertAlmostEqual(abs(normal @ expected), 1, places=3)
+        self.assertGreater(np.mean(labels[:3000] == 0), 0.95)
+        self.assertGreater(np.mean(labels[-500:] == -1), 0.9)
+
+    def test_degenerate_triples_never_win(self):
+        # Few points make triples with a repeated point likely, which used to be inliers of every point
+        rng = np.random.default_rng(0)
+        normals = np.array([[0.0, 0, 1], [1, 0, 0]])
+        points = np.concatenate(
+            [
+                points_on_plane(rng, 150, [0, 0, 0], normals[0]),
+                points_on_plane(rng, 150, [0.5, 0, 0], normals[1]),
+            ]
+        )
+        for seed in range(20):
+            planes, labels = ransac_planes(
+                points,
+                threshold=0.01,
+                min_inliers=50,
+                hypotheses=64,
+                seed=seed,
+            )
+            self.assertEqual(len(planes), 2)
+            for _, normal in planes:
+                self.assertAlmostEqual(np.max(np.abs(normals @ normal)), 1)
+            self.assertTrue(np.all(labels >= 0))
+
+    def test_sample_triples(self):
+        triples = sample_triples(np.random.default_rng(0), 3, 1000)
+        np.testing.assert_array_equal(
+            np.sort(triples, axis=1), [[0, 1, 2]] * 1000
+        )
+
+
+class TestCoreRotation(unittest.TestCase):
+
+    def test_rotation_component_removes_scale_and_translation(self):
+        rotation = rotation_matrix([1, 2, 3], 0.7)
+        transformation = np.eye(4)
+        transformation[:3, :3] = rotation * 2.5
+        transformation[:3, 3] = [1, 2, 3]
+        self.assertTrue(
+            np.allclose(rotation_component(transformation), rotation)
+        )
+
+    def test_axis_and_angle(self):
+        axis = np.array([1, 2, 3]) / np.linalg.norm([1, 2, 3])
+        rotation = rotation_matrix(axis, 0.7)
+        self.assertTrue(np.allclose(axis_of_rotation(rotation), axis))
+        self.assertAlmostEqual(angle_of_rotation(rotation), 0.7)
+
+
+class TestCoreProfiling(unittest.TestCase):
+
+    def test_nested_spans(self):
+        recorder = SpanRecorder()
+        with recorder.span("outer", verts=8):
+            with recorder.span("inner") as span:
+                span["args"]["nnz"] = 32
+        self.assertEqual(list(recorder.totals()), ["inner", "outer"])
+        inner, outer = recorder.spans
+        self.assertEqual(inner["args"], {"nnz": 32})
+        self.assertEqual(outer["args"], {"verts": 8})
+        self.assertLessEqual(outer["start"], inner["start"])
+        self.assertGreaterEqual(outer["duration"], inner["duration"])
+
+    def test_allocations(self):
+        recorder = SpanRecorder(allocations=True)
+        with recorder.span("allocate"):
+            buffer = np.ones(1_000_000)
+        self.assertGreaterEqual(
+            recorder.spans[0]["args"]["allocated_bytes"], buffer.nbytes
+        )
+
+    def test_allocations_stop_tracing(self):
+        recorder = SpanRecorder(allocations=True)
+        with recorder.span("outer"):
+            with recorder.span("inner"):
+                self.assertTrue(tracemalloc.is_tracing())
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIn("peak", recorder.summary())
+        # Tracing started by someone else is left running
+        tracemalloc.start()
+        try:
+            with recorder.span("traced"):
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_chrome_trace(self):
+        recorder = SpanRecorder()
+        L = combinatorial_laplacian(8, CUBE_EDGES)
+        LaplaceSmoother(CUBE_VERTICES, L, 0.5, 3, recorder=recorder).run()
+        events = recorder.chrome_trace()["traceEvents"]
+        self.assertEqual([event["name"] for event in events], ["iterations"])
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["args"]["iterations"], 3)
+
+    def test_no_spans(self):
+        with NO_SPANS.span("anything", verts=1) as span:
+            span["args"] = {}
+        self.assertEqual(NO_SPANS.spans, [])
+        self.assertEqual(NO_SPANS.summary(), "")
+
+
+class TestCoreQuality(unittest.TestCase):
+
+    def test_cube_quality(self):
+        report = mesh_quality(CUBE_VERTICES, CUBE_EDGES, CUBE_TRIANGLES)
+        self.assertEqual(report["edge_length_min"], 1.0)
+        self.assertEqual(report["edge_length_max"], 1.0)
+        self.assertAlmostEqual(report["edge_length_std"], 0.0)
+        # Right isosceles triangles: sqrt(2) * (2 + sqrt(2)) / (4 sqrt(3) / 2)
+        self.assertAlmostEqual(
+            report["aspect_ratio_mean"], (np.sqrt(2) + 1) / np.sqrt(3)
+        )
+        self.assertAlmostEqual(report["volume"], 1.0)
+        self.assertNotIn("displacement_max", report)
+
+    def test_quality_relative_to_original(self):
+        scaled = 2 * (CUBE_VERTICES - 0.5) + 0.5
+        report = mesh_quality(
+            scaled, CUBE_EDGES, CUBE_TRIANGLES, original=CUBE_VERTICES
+        )
+        self.assertAlmostEqual(report["displacement_max"], np.sqrt(3) / 2)
+        self.assertAlmostEqual(report["displacement_rms"], np.sqrt(3) / 2)
+        self.assertAlmostEqual(report["relative_displacement"], np.sqrt(3) / 4)
+        self.assertAlmostEqual(report["volume_change"], 7.0)
+        self.assertIn("Volume +700.00%", format_quality(report))
+
+    def test_aspect_ratios(self):
+        corners = np.array(
+            [
+                [[0, 0, 0], [1, 0, 0], [0.5, np.sqrt(3) / 2, 0]],
+                [[0, 0, 0], [1, 0, 0], [2, 0, 0]],
+            ]
+        )
+        ratios = triangle_aspect_ratios(corners)
+        self.assertAlmostEqual(ratios[0], 1.0)
+        self.assertEqual(ratios[1], np.inf)
+        report = mesh_quality(
+            corners.reshape([-1, 3]),
+            np.zeros((0, 2), dtype=np.int32),
+            np.array([[0, 1, 2], [3, 4, 5]]),
+        )
+        self.assertEqual(report["degenerate_triangles"], 1)
+        self.assertEqual(report["edge_length_max"], 0.0)
+
+
+class TestCoreTopology(unittest.TestCase):
+    def test_cube_topology(self):
+        topology = MeshTopology.from_triangles(8, CUBE_TRIANGLES)
+        half_edges = np.arange(len(topology.loops))
+        np.testing.assert_array_equal(topology.twin[topology.twin], half_edges)
+        # Twins run in opposite directions
+        np.testing.assert_array_equal(
+            topology.loops[topology.next[topology.twin]], topology.loops
+        )
+        np.testing.assert_array_equal(
+            topology.next[topology.next[topology.next]], half_edges
+        )
+        self.assertEqual(len(topology.edges), 18)
+        self.assertEqual(len(topology.boundary_edges()), 0)
+        np.testing.assert_array_equal(topology.triangles(), CUBE_TRIANGLES)
+        A = edge_adjacency(8, topology.edges).tocsr()
+        self.assertEqual(abs(topology.adjacency() - A).sum(), 0)
+        for vertex in range(8):
+            np.testing.assert_array_equal(
+                topology.neighbours(vertex),
+                A.indices[A.indptr[vertex] : A.indptr[vertex + 1]],
+            )
+        np.testing.assert_array_equal(topology.degree, A.sum(axis=1))
+        # Small meshes get compact indices, see compact_csr()
+        self.assertEqual(topology.neighbour_offsets.dtype, np.int32)
+
+    def test_polygons_with_boundary_and_loose_edges(self):
+        # Two quads sharing an edge, plus a loose edge and a face edge passed again
+        faces = [np.array([0, 1, 4, 3]), np.array([1, 2, 5, 4])]
+        topology = MeshTopology.from_faces(
+            8, faces, edges=np.array([[6, 7], [4, 1]])
+        )
+        self.assertEqual(topology.num_faces, 2)
+        self.assertEqual(len(topology.edges), 8)
+        np.testing.assert_array_equal(
+            topology.degree, [2, 3, 2, 2, 3, 2, 1, 1]
+        )
+        np.testing.assert_array_equal(topology.neighbours(6), [7])
+        np.testing.assert_array_equal(
+            np.sort(topology.edge_faces), [0, 1, 1, 1, 1, 1, 1, 2]
+        )
+        # Only the shared edge 1-4 has twins
+        paired = np.flatnonzero(topology.twin >= 0)
+        np.testing.assert_array_equal(np.sort(topology.loops[paired]), [1, 4])
+        np.testing.assert_array_equal(
+            topology.boundary_vertices(), [0, 1, 2, 3, 4, 5]
+        )
+        self.assertEqual(len(topology.triangles()), 4)
+
+
+class TestCorePins(unittest.TestCase):
+    def test_cube_features(self):
+        topology = MeshTopology.from_triangles(8, CUBE_TRIANGLES)
+        angles = topology.dihedral_angles(CUBE_VERTICES)
+        # 12 cube edges at right angles, 6 flat face diagonals
+        self.assertEqual(np.sum(np.isclose(angles, np.pi / 2)), 12)
+        self.assertEqual(np.sum(np.isclose(angles, 0)), 6)
+        np.testing.assert_array_equal(
+            pinned_vertices(CUBE_VERTICES, topology, "features"), np.arange(8)
+        )
+        self.assertEqual(
+            len(
+                pinned_vertices(
+                    CUBE_VERTICES, topology, "features", np.radians(100)
+                )
+            ),
+            0,
+        )
+        with self.assertRaises(ValueError):
+            pinned_vertices(CUBE_VERTICES, topology, "corners")
+
+    def test_pinned_boundary_stays_in_place(self):
+        # A noisy 10x10 grid of quads, whose 36 boundary vertices are pinned
+        size = 10
+        x, y = np.meshgrid(np.arange(size), np.arange(size))
+        rng = np.random.default_rng(0)
+        vertices = np.stack(
+            [x.ravel(), y.ravel(), rng.normal(0, 0.1, size * size)], axis=-1
+        )
+        index = np.arange(size * size).reshape(size, size)
+        faces = list(
+            np.stack(
+                [
+                    index[:-1, :-1].ravel(),
+                    index[:-1, 1:].ravel(),
+                    index[1:, 1:].ravel(),
+                    index[1:, :-1].ravel(),
+                ],
+                axis=-1,
+            )
+        )
+        topology = MeshTopology.from_faces(size * size, faces)
+        pinned = pinned_vertices(vertices, topology, "boundary")
+        self.assertEqual(len(pinned), 4 * (size - 1))
+        L = combinatorial_laplacian(size * size, topology.edges)
+        L_pinned = pin_laplacian(L, pinned)
+        self.assertEqual(L_pinned.nnz, L.nnz - 4 * (size - 1) * 4 + 4)
+        smoothed = LaplaceSmoother(vertices, L_pinned, 0.5, 20).run()
+        np.testing.assert_array_equal(smoothed[pinned], vertices[pinned])
+        free = np.setdiff1d(np.arange(size * size), pinned)
+        # The interior flattens towards the boundary's mean height
+        self.assertLess(
+            np.abs(smoothed[free, 2]).max(), np.abs(vertices[free, 2]).max()
+        )
+        # A flat grid has no sharp features
+        self.assertEqual(
+            len(pinned_vertices(vertices * [1, 1, 0], topology, "features")),
+            0,
+        )
+
+
+class TestCoreComponents(unittest.TestCase):
+    def shells(self, sizes):
+        # Disjoint grids of the given sizes, shifted apart
+        vertices, edges, offset = [], [], 0
+        rng = np.random.default_rng(0)
+        for shell, size in enumerate(sizes):
+            x, y = np.meshgrid(np.arange(size), np.arange(size))
+            grid = np.stack(
+                [x.ravel(), y.ravel(), rng.normal(0, 0.1, size * size)],
+                axis=-1,
+            )
+            vertices.append(grid + 10.0 * shell)
+            edges.append(grid_edges(size) + offset)
+            offset += size * size
+        return np.concatenate(vertices), np.concatenate(edges)
+
+    def test_component_blocks(self):
+        vertices, edges = self.shells([3, 20, 2, 2, 10])
+        L = combinatorial_laplacian(len(vertices), edges)
+        order, offsets = component_blocks(L, min_block_size=200)
+        # The 20x20 grid first, then the small shells batched into one block
+        np.testing.assert_array_equal(offsets, [0, 400, len(vertices)])
+        np.testing.assert_array_equal(np.sort(order), np.arange(len(vertices)))
+        self.assertTrue(np.all(order[:400] >= 9) and np.all(order[:400] < 409))
+        _, offsets = component_blocks(L, min_block_size=1)
+        np.testing.assert_array_equal(np.diff(offsets), [400, 100, 9, 4, 4])
+
+    def test_component_parallel_smooth_matches_serial(self):
+        vertices, edges = self.shells([3, 20, 2, 2, 10])
+        L = combinatorial_laplacian(len(vertices), edges)
+        for mu in [None, taubin_mu(0.5)]:
+            expected = LaplaceSmoother(vertices, L, 0.5, 10, mu=mu).run()
+            for min_block_size in [1, 100, 10_000]:
+                smoothed = component_parallel_smooth(
+                    vertices,
+                    L,
+                    0.5,
+                    10,
+                    mu=mu,
+                    max_workers=3,
+                    min_block_size=min_block_size,
+                )
+                np.testing.assert_allclose(smoothed, expected, atol=1e-12)
+
+
+class TestCoreCache(unittest.TestCase):
+    def test_size(self):
+        cache = LRUCache(size=2)
+        self.assertEqual(cache.get("a", lambda: 1), 1)
+        self.assertEqual(cache.get("a", lambda: 2), 1)
+        cache.put("b", 2)
+        cache.get("a")
+        # The least recently used entry is dropped
+        cache.put("c", 3)
+        self.assertEqual(len(cache), 2)
+        with self.assertRaises(KeyError):
+            cache.get("b")
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_budget(self):
+        arrays = [np.zeros(100, dtype=np.uint8) for _ in range(3)]
+        cache = LRUCache(budget=250)
+        for key, array in enumerate(arrays):
+            self.assertTrue(cache.put(key, array))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nbytes, 200)
+        self.assertFalse(cache.put(3, np.zeros(300, dtype=np.uint8)))
+        cache.resize(100)
+        self.assertIs(cache.get(2), arrays[2])
+        self.assertEqual(cache.nbytes, 100)
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+
+class TestCoreDeltas(unittest.TestCase):
+    def setUp(self):
+        size = 30
+        x, y = np.meshgrid(np.arange(size), np.arange(size))
+        rng = np.random.default_rng(0)
+        self.original = np.stack(
+            [x.ravel(), y.ravel(), rng.normal(0, 0.1, size * size)], axis=-1
+        ).astype(np.float32)
+        L = combinatorial_laplacian(size * size, grid_edges(size))
+        self.smoothed = LaplaceSmoother(self.original, L, 0.5, 10).run()
+
+    def test_round_trip(self):
+        for quantize in [False, True]:
+            for compress in [False, True]:
+                delta = CoordinateDelta(
+                    self.original, self.smoothed, quantize, compress
+                )
+                restored = delta.apply(self.original)
+                error = np.abs(restored - self.smoothed).max(axis=0)
+                self.assertTrue(np.all(error <= delta.error + 1e-6))
+                if quantize:
+                    self.assertTrue(np.all(delta.error > 0))
+        # Float32 deltas are half, int16 ones a quarter of the positions
+        self.assertEqual(
+            CoordinateDelta(self.original, self.smoothed).nbytes,
+            self.smoothed.nbytes // 2,
+        )
+        self.assertEqual(
+            CoordinateDelta(self.original, self.smoothed, True).nbytes,
+            self.smoothed.nbytes // 4,
+        )
+        with self.assertRaises(ValueError):
+            CoordinateDelta(self.original, self.smoothed).apply(
+                self.original[1:]
+            )
+
+    def test_compression(self):
+        # Unchanged vertices compress to (almost) nothing
+        partly = self.original.astype(np.float64)
+        partly[:100] = self.smoothed[:100]
+        delta = CoordinateDelta(self.original, partly, compress=True)
+        self.assertLess(delta.nbytes, partly.nbytes // 10)
+        np.testing.assert_allclose(
+            delta.apply(self.original), partly, atol=1e-6
+        )
+        unchanged = CoordinateDelta(self.original, self.original, True, True)
+        np.testing.assert_array_equal(
+            unchanged.apply(self.original), self.original
+        )
+
+    def test_cache(self):
+        delta = CoordinateDelta(self.original, self.smoothed)
+        cache = DeltaCache(budget=2 * delta.nbytes)
+        keys = [(coordinates_fingerprint(self.original), i) for i in range(3)]
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertTrue(cache.put(keys[0], delta))
+        self.assertTrue(cache.put(keys[1], delta))
+        self.assertIs(cache.get(keys[0]), delta)
+        # The least recently used delta is dropped
+        self.assertTrue(cache.put(keys[2], delta))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nbytes, 2 * delta.nbytes)
+        self.assertFalse(DeltaCache(budget=1).put(keys[0], delta))
+        # Shrinking the budget drops the least recently used deltas right away
+        cache.resize(delta.nbytes)
+        self.assertEqual(len(cache), 1)
+        self.assertIs(cache.get(keys[2]), delta)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_fingerprint(self):
+        fingerprint = coordinates_fingerprint(self.original)
+        self.assertEqual(
+            fingerprint, coordinates_fingerprint(self.original.copy())
+        )
+        moved = self.original.copy()
+        moved[0, 0] += 1e-3
+        self.assertNotEqual(fingerprint, coordinates_fingerprint(moved))
+        self.assertNotEqual(
+            fingerprint,
+            coordinates_fingerprint(self.original.astype(np.float64)),
+        )
+
+
+class TestCoreServer(unittest.TestCase):
+    def test_frame_round_trip(self):
+        arrays = {
+            "vertices": np.arange(12, dtype=np.float32).reshape(4, 3),
+            "edges": np.array([[0, 1], [1, 2]], dtype=np.int32),
+            "transposed": np.arange(6.0).reshape(2, 3).T,
+            "empty": np.zeros([0, 3]),
+        }
+        buffers = encode_frame({"op": "test", "params": {"a": 1}}, arrays)
+        payload = b"".join(buffers[2:])
+        metadata, decoded = decode_frame(buffers[1], payload)
+        self.assertEqual(metadata, {"op": "test", "params": {"a": 1}})
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(decoded[name], array)
+            self.assertEqual(decoded[name].dtype, array.dtype)
+        # Views of the payload, aligned for vectorized loops
+        self.assertFalse(decoded["vertices"].flags.owndata)
+        self.assertEqual(
+            (decoded["edges"].ctypes.data - decoded["vertices"].ctypes.data)
+            % 64,
+            0,
+        )
+        with self.assertRaises(ValueError):
+            encode_frame({}, {"objects": np.array([None])})
+
+    def test_oversized_frame(self):
+        async def read(payload_length):
+            reader = asyncio.StreamReader()
+            reader.feed_data(FRAME_HEADER.pack(FRAME_MAGIC, 2, payload_length))
+            reader.feed_data(b"{}")
+            reader.feed_eof()
+            return await read_frame(reader)
+
+        # The announced length is rejected before anything is allocated
+        with self.assertRaises(ValueError):
+            asyncio.run(read(MAX_PAYLOAD + 1))
+        self.assertEqual(asyncio.run(read(0)), ({}, {}))
+
+    def serve(self, test):
+        # Runs a coroutine test(client, server) against a server on a temporary socket
+        async def run(path):
+            server = MeshJobServer(max_workers=2, cache_size=2)
+            listener = await server.start(path)
+            client = await MeshJobClient.connect(path)
+            try:
+                await test(client, server)
+            finally:
+                await client.close()
+                listener.close()
+                await listener.wait_closed()
+                server.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(os.path.join(directory, "jobs.sock")))
+
+    def test_smooth(self):
+        size = 10
+        x, y = np.meshgrid(np.arange(size), np.arange(size))
+        rng = np.random.default_rng(0)
+        vertices = np.stack(
+            [x.ravel(), y.ravel(), rng.normal(0, 0.1, size * size)], axis=-1
+        )
+        edges = grid_edges(size)
+        L = combinatorial_laplacian(size * size, edges)
+
+        async def test(client, server):
+            topology = await client.upload_topology(size * size, edges)
+            for mu in [None, taubin_mu(0.5)]:
+                smoothed = await client.smooth(vertices, topology, 0.5, 10, mu)
+                np.testing.assert_allclose(
+                    smoothed,
+                    LaplaceSmoother(vertices, L, 0.5, 10, mu=mu).run(),
+                )
+            single = await client.smooth(
+                vertices.astype(np.float32), topology, 0.5, 10
+            )
+            self.assertEqual(single.dtype, np.float32)
+            # One Laplacian per precision, and the dropped topology is uploaded again
+            for key in range(2):
+                await client.upload_topology(size * size, edges[key:])
+            await client.smooth(vertices, topology, 0.5, 1)
+            stats = await client.statistics()
+            self.assertEqual(stats["operations"]["smooth"]["count"], 4)
+            self.assertEqual(stats["laplacian_misses"], 2)
+            self.assertEqual(stats["laplacian_hits"], 2)
+            with self.assertRaises(KeyError):
+                await client.smooth(vertices, "unknown", 0.5, 1)
+            with self.assertRaises(RuntimeError):
+                await client.smooth(vertices[1:], topology, 0.5, 1)
+            with self.assertRaises(RuntimeError):
+                await client.request("unknown")
+
+        self.serve(test)
+
+    def test_smooth_cotangent(self):
+        size = 10
+        x, y = np.meshgrid(np.arange(size), np.arange(size))
+        rng = np.random.default_rng(0)
+        vertices = np.stack(
+            [x.ravel(), y.ravel(), rng.normal(0, 0.1, size * size)], axis=-1
+        )
+        edges, triangles = grid_edges(size), grid_triangles(size)
+        L = cotangent_laplacian(vertices, triangles)
+
+        async def test(client, server):
+            topology = await client.upload_topology(
+                size * size, edges, triangles
+            )
+            combinatorial = await client.smooth(vertices, topology, 0.5, 1)
+            for _ in range(2):
+                smoothed = await client.smooth(
+                    vertices, topology, 0.5, 10, laplacian="cotangent"
+                )
+                np.testing.assert_allclose(
+                    smoothed, LaplaceSmoother(vertices, L, 0.5, 10).run()
+                )
+            # Cotangent Laplacians depend on the geometry, so they don't evict the combinatorial one
+            self.assertFalse(np.allclose(smoothed, combinatorial))
+            await client.smooth(vertices, topology, 0.5, 1)
+            stats = await client.statistics()
+            self.assertEqual(stats["laplacians"], 1)
+            self.assertEqual(stats["laplacian_misses"], 1)
+            self.assertEqual(stats["laplacian_hits"], 1)
+
+        self.serve(test)
+
+    def test_planes(self):
+        rng = np.random.default_rng(0)
+        points = rng.normal(size=(20, 3))
+        normals = rng.normal(size=(20, 3))
+        solver = SquaredDistanceToPlanes.from_arrays(points, normals)
+
+        async def test(client, server):
+            point = await client.optimal_point(points, normals)
+            np.testing.assert_allclose(point, solver.optimal_point())
+            robust = await client.optimal_point(
+                points, normals, robust="huber"
+            )
+            np.testing.assert_allclose(robust, solver.optimal_point("huber"))
+            queries = rng.normal(size=(5, 3))
+            metadata, result = await client.request(
+                "planes",
+                {"k": 2},
+                points=points,
+                normals=normals,
+                queries=queries,
+            )
+            indices, _ = solver.nearest_planes(queries, 2)
+            np.testing.assert_array_equal(result["nearest"], indices)
+            self.assertGreaterEqual(metadata["sum_of_squared_distances"], 0)
+
+        self.serve(test)
+
+
+class TestCoreGeodesics(unittest.TestCase):
+    def setUp(self):
+        self.size = 41
+        x, y = np.meshgrid(
+            np.linspace(0, 1, self.size), np.linspace(0, 1, self.size)
+        )
+        self.vertices = np.stack(
+            [x.ravel(), y.ravel(), np.zeros(self.size * self.size)], axis=-1
+        )
+        self.triangles = grid_triangles(self.size)
+        self.spacing = 1 / (self.size - 1)
+
+    def test_distances_on_plane(self):
+        geodesics = HeatGeodesics(self.vertices, self.triangles)
+        center = (self.size * self.size) // 2
+        distances = geodesics.distances([center])
+        exact = np.linalg.norm(self.vertices - self.vertices[center], axis=1)
+        self.assertEqual(distances[center], 0)
+        self.assertLess(np.abs(distances - exact).max(), 1.5 * self.spacing)
+        # Every further query from other sources reuses the factorizations
+        corners = [0, self.size * self.size - 1]
+        distances = geodesics.distances(corners)
+        exact = np.linalg.norm(
+            self.vertices[:, np.newaxis] - self.vertices[corners], axis=-1
+        ).min(axis=1)
+        self.assertLess(np.abs(distances - exact).max(), 1.5 * self.spacing)
+        with self.assertRaises(ValueError):
+            geodesics.distances([])
+
+    def test_unreachable_vertices(self):
+        # A second, shifted grid and a vertex outside every triangle
+        count = len(self.vertices)
+        vertices = np.concatenate(
+            [self.vertices, self.vertices + [2, 0, 0], [[5, 5, 5]]]
+        )
+        triangles = np.concatenate([self.triangles, self.triangles + count])
+        distances = HeatGeodesics(vertices, triangles).distances([0, count])
+        self.assertTrue(np.all(np.isfinite(distances[:-1])))
+        self.assertEqual(distances[-1], np.inf)
+        np.testing.assert_allclose(
+            distances[:count], distances[count:-1], atol=1e-9
+        )
+        distances = HeatGeodesics(vertices, triangles).distances([0])
+        self.assertTrue(np.all(np.isinf(distances[count:])))
+
+    def test_cached_solver(self):
+        cache = LRUCache()
+        geodesics = cached_heat_geodesics(
+            self.vertices, self.triangles, cache=cache
+        )
+        self.assertIs(
+            cached_heat_geodesics(
+                self.vertices.copy(), self.triangles, cache=cache
+            ),
+            geodesics,
+        )
+        self.assertIsNot(
+            cached_heat_geodesics(
+                self.vertices, self.triangles, 2.0, cache=cache
+            ),
+            geodesics,
+        )
+
+    def test_cache_budget(self):
+        geodesics = HeatGeodesics(self.vertices, self.triangles)
+        # The factors hold at least the nonzeros of both (symmetric) systems
+        self.assertGreater(geodesics.nbytes, 2 * 7 * len(self.vertices) * 8)
+        cache = LRUCache(budget=geodesics.nbytes)
+        cached_heat_geodesics(self.vertices, self.triangles, cache=cache)
+        cached_heat_geodesics(self.vertices, self.triangles, 2.0, cache=cache)
+        self.assertEqual(len(cache), 1)
+
+    def test_falloff(self):
+        distances = np.array([0.0, 0.5, 1.0, 2.0, np.inf])
+        for falloff in ["smooth", "sphere", "root", "linear", "sharp"]:
+            weights = geodesic_falloff(distances, 1.0, falloff)
+            self.assertEqual(weights[0], 1)
+            self.assertTrue(0 < weights[1] < 1)
+            np.testing.assert_array_equal(weights[2:], 0)
+        np.testing.assert_array_equal(
+            geodesic_falloff(distances, 1.0, "constant"), [1, 1, 0, 0, 0]
+        )
+        with self.assertRaises(ValueError):
+            geodesic_falloff(distances, 1.0, "unknown")
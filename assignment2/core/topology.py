@@ -0,0 +1,308 @@
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import coo_array, csr_array
+
+from .laplacian import compact_csr
+
+__all__ = [
+    "FEATURE_ANGLE",
+    "face_offsets",
+    "MeshTopology",
+    "PINS",
+    "pinned_vertices",
+]
+
+# Dihedral angle above which an edge counts as a sharp feature (Blender's default auto smooth angle)
+FEATURE_ANGLE = np.radians(30)
+
+
+def face_offsets(faces: list[np.ndarray]) -> np.ndarray:
+    """
+    :param faces: A list of vertex index arrays, one per polygon.
+    :return: The F + 1 offsets of the polygons in `numpy.concatenate(faces)`.
+    """
+    return np.concatenate(
+        [[0], np.cumsum([len(face) for face in faces], dtype=np.int64)]
+    )
+
+
+class MeshTopology(object):
+    """
+    Array-backed connectivity of a polygon mesh, built once from its face arrays without any per-element Python objects.
+
+    The faces are given as one flat array of corner ("loop") vertex indices plus the offset of every face in it,
+    which is exactly how Blender stores them (`Mesh.loops` / `Mesh.polygons.loop_start`).
+    Every loop h is also the half-edge from `loops[h]` to `loops[next[h]]`, so the half-edge arrays are indexed by loop:
+        - next[h]: the following half-edge of the same face,
+        - twin[h]: the opposite half-edge of the neighbouring face, or -1 on boundary and non-manifold edges,
+        - face[h]: the face the half-edge belongs to,
+        - edge[h]: the index of its undirected edge in `edges`.
+    The vertex -> neighbour relation is stored in CSR form (`neighbour_offsets`, `neighbour_indices`), sorted by vertex,
+    so the degree and the neighbours of a vertex are O(1) lookups, and adjacency() wraps the same arrays as a sparse matrix.
+    """
+
+    def __init__(
+        self,
+        num_verts: int,
+        loops: np.ndarray,
+        offsets: np.ndarray,
+        edges: Optional[np.ndarray] = None,
+    ):
+        """
+        :param num_verts: Number of vertices of the mesh.
+        :param loops: Vertex indices of the corners of all faces, face after face.
+        :param offsets: The F + 1 offsets of the faces in `loops`; face f has the corners loops[offsets[f]:offsets[f + 1]].
+        :param edges: Optional additional edges as an Ex2 numpy array, e.g. all edges of a Blender mesh,
+                      so loose edges (which belong to no face) are part of the topology as well.
+        """
+        self.num_verts = num_verts
+        self.loops = np.asarray(loops, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        sizes = np.diff(self.offsets)
+        half_edges = len(self.loops)
+
+        self.face = np.repeat(
+            np.arange(len(sizes), dtype=np.int32), sizes
+        ).astype(np.int32)
+        self.next = np.arange(1, half_edges + 1, dtype=np.int32)
+        # The last corner of every face wraps around to its first one
+        self.next[self.offsets[1:][sizes > 0] - 1] = self.offsets[:-1][
+            sizes > 0
+        ]
+
+        # Undirected edges as (smaller, larger) vertex index keys, doubled so
+        # that the extra edges sort behind the half-edges of the same edge
+        targets = self.loops[self.next]
+        keys = 2 * (
+            np.minimum(self.loops, targets).astype(np.int64) * num_verts
+            + np.maximum(self.loops, targets)
+        )
+        if edges is not None and len(edges):
+            edges = np.asarray(edges, dtype=np.int64).reshape([-1, 2])
+            extra = edges.min(axis=1) * num_verts + edges.max(axis=1)
+            keys = np.concatenate([keys, 2 * extra + 1])
+        # One sort groups the half-edges (and extra edges) of every undirected edge
+        order = np.argsort(keys)
+        keys = keys[order] // 2
+        starts = np.diff(keys, prepend=-1) != 0
+        first = np.flatnonzero(starts)
+        self.edges = np.stack(
+            [keys[first] // num_verts, keys[first] % num_verts], axis=-1
+        ).astype(np.int32)
+        edge = np.empty(len(keys), dtype=np.int32)
+        edge[order] = np.cumsum(starts) - 1
+        self.edge = edge[:half_edges]
+
+        # Number of faces around every edge: 0 for loose edges, 1 on the boundary, 2 inside a manifold
+        self.edge_faces = np.bincount(self.edge, minlength=len(self.edges))
+        # Pair up the two half-edges of every manifold edge, which are next to each other in the sorted order
+        manifold = first[self.edge_faces == 2]
+        self.twin = np.full(half_edges, -1, dtype=np.int32)
+        self.twin[order[manifold]] = order[manifold + 1]
+        self.twin[order[manifold + 1]] = order[manifold]
+
+        # Both directions of every edge, sorted by (vertex, neighbour) into CSR form,
+        # with int32 indices unless there are too many half-edges for them (see compact_csr())
+        adjacency = compact_csr(
+            coo_array(
+                (
+                    np.ones(2 * len(self.edges), dtype=np.int8),
+                    (self.edges.T.ravel(), self.edges[:, ::-1].T.ravel()),
+                ),
+                shape=(num_verts, num_verts),
+            ),
+            np.int8,
+        )
+        self.neighbour_indices = adjacency.indices
+        self.neighbour_offsets = adjacency.indptr
+        self.degree = np.diff(self.neighbour_offsets)
+
+    @classmethod
+    def from_faces(
+        cls,
+        num_verts: int,
+        faces: list[np.ndarray],
+        edges: Optional[np.ndarray] = None,
+    ) -> "MeshTopology":
+        """
+        :param num_verts: Number of vertices of the mesh.
+        :param faces: A list of vertex index arrays, one per polygon (see load_obj()).
+        :param edges: Optional additional edges, see __init__().
+        :return: The topology of the mesh.
+        """
+        loops = np.concatenate(faces) if faces else np.zeros(0, dtype=np.int32)
+        return cls(num_verts, loops, face_offsets(faces), edges)
+
+    @classmethod
+    def from_triangles(
+        cls,
+        num_verts: int,
+        triangles: np.ndarray,
+        edges: Optional[np.ndarray] = None,
+    ) -> "MeshTopology":
+        """
+        :param num_verts: Number of vertices of the mesh.
+        :param triangles: Triangle vertex indices as a Tx3 numpy array.
+        :param edges: Optional additional edges, see __init__().
+        :return: The topology of the mesh.
+        """
+        triangles = np.asarray(triangles).reshape([-1, 3])
+        offsets = np.arange(0, 3 * len(triangles) + 1, 3)
+        return cls(num_verts, triangles.ravel(), offsets, edges)
+
+    @property
+    def num_faces(self) -> int:
+        return len(self.offsets) - 1
+
+    def neighbours(self, vertex: int) -> np.ndarray:
+        """
+        :param vertex: Index of a vertex.
+        :return: The sorted indices of the vertices sharing an edge with it (a view, don't modify).
+        """
+        return self.neighbour_indices[
+            self.neighbour_offsets[vertex] : self.neighbour_offsets[vertex + 1]
+        ]
+
+    def adjacency(self, dtype: np.dtype = np.float64) -> csr_array:
+        """
+        Wraps the neighbour arrays as the symmetric adjacency matrix of the mesh, see edge_adjacency().
+        No sorting or duplicate summation is needed, since the CSR arrays are already canonical.
+
+        :param dtype: Type of the stored values.
+        :return: An NxN sparse CSR matrix with A_ij = 1 if an edge exists between i and j.
+        """
+        return csr_array(
+            (
+                np.ones(len(self.neighbour_indices), dtype=dtype),
+                self.neighbour_indices,
+                self.neighbour_offsets,
+            ),
+            shape=(self.num_verts, self.num_verts),
+        )
+
+    def boundary_edges(self) -> np.ndarray:
+        """
+        :return: The edges with exactly one adjacent face as an Ex2 numpy array.
+        """
+        return self.edges[self.edge_faces == 1]
+
+    def edge_vertices(self, mask: np.ndarray) -> np.ndarray:
+        """
+        :param mask: A boolean mask of the edges.
+        :return: The sorted indices of all vertices of the masked edges.
+        """
+        marked = np.zeros(self.num_verts, dtype=bool)
+        marked[self.edges[mask]] = True
+        return np.flatnonzero(marked)
+
+    def boundary_vertices(self) -> np.ndarray:
+        """
+        :return: The sorted indices of all vertices on a boundary edge.
+        """
+        return self.edge_vertices(self.edge_faces == 1)
+
+    def triangles(self) -> np.ndarray:
+        """
+        Splits every (convex) face into a fan of triangles around its first corner, see fan_triangulate().
+
+        :return: A Tx3 numpy array of triangle vertex indices.
+        """
+        # Every corner except the first and last one of its face spans a triangle with the first corner
+        corner = np.arange(len(self.loops)) - self.offsets[self.face]
+        sizes = np.diff(self.offsets)[self.face]
+        spans = np.flatnonzero((corner >= 1) & (corner <= sizes - 2))
+        return np.stack(
+            [
+                self.loops[self.offsets[self.face[spans]]],
+                self.loops[spans],
+                self.loops[self.next[spans]],
+            ],
+            axis=-1,
+        )
+
+    def face_normals(self, vertices: np.ndarray) -> np.ndarray:
+        """
+        Computes the normal of every face with Newell's method, which also handles non-planar polygons.
+
+        :param vertices: Vertex positions as an Nx3 numpy array.
+        :return: A 3xF numpy array (one row per component) of face normals, scaled by twice the face areas.
+        """
+        x, y, z = np.ascontiguousarray(np.asarray(vertices, np.float64).T)
+        i, j = self.loops, self.loops[self.next]
+        # The cross products of consecutive corners, summed per face
+        return np.stack(
+            [
+                np.bincount(self.face, a, minlength=self.num_faces)
+                for a in (
+                    y[i] * z[j] - z[i] * y[j],
+                    z[i] * x[j] - x[i] * z[j],
+                    x[i] * y[j] - y[i] * x[j],
+                )
+            ]
+        )
+
+    def dihedral_angles(self, vertices: np.ndarray) -> np.ndarray:
+        """
+        Computes the angle between the normals of the two faces of every manifold edge,
+        0 for flat regions and pi for folded-over faces.
+
+        :param vertices: Vertex positions as an Nx3 numpy array.
+        :return: The E angles in radians, NaN for edges without exactly two faces.
+        """
+        nx, ny, nz = self.face_normals(vertices)
+        # One half-edge per manifold edge
+        half_edges = np.flatnonzero(self.twin > np.arange(len(self.twin)))
+        f, g = self.face[half_edges], self.face[self.twin[half_edges]]
+        cx = ny[f] * nz[g] - nz[f] * ny[g]
+        cy = nz[f] * nx[g] - nx[f] * nz[g]
+        cz = nx[f] * ny[g] - ny[f] * nx[g]
+        angles = np.full(len(self.edges), np.nan)
+        angles[self.edge[half_edges]] = np.arctan2(
+            np.sqrt(cx * cx + cy * cy + cz * cz),
+            nx[f] * nx[g] + ny[f] * ny[g] + nz[f] * nz[g],
+        )
+        return angles
+
+    def feature_vertices(
+        self, vertices: np.ndarray, angle: float = FEATURE_ANGLE
+    ) -> np.ndarray:
+        """
+        :param vertices: Vertex positions as an Nx3 numpy array.
+        :param angle: Dihedral angle in radians above which an edge is sharp.
+        :return: The sorted indices of all vertices on a sharp edge.
+        """
+        return self.edge_vertices(self.dihedral_angles(vertices) > angle)
+
+
+# Vertices to pin while smoothing by name, each computed from the vertex positions, the topology and the feature angle
+PINS = {
+    "boundary": lambda vertices, topology, angle: topology.boundary_vertices(),
+    "features": lambda vertices, topology, angle: topology.feature_vertices(
+        vertices, angle
+    ),
+    "boundary_and_features": lambda vertices, topology, angle: np.union1d(
+        topology.boundary_vertices(),
+        topology.feature_vertices(vertices, angle),
+    ),
+}
+
+
+def pinned_vertices(
+    vertices: np.ndarray,
+    topology: MeshTopology,
+    pin: str,
+    angle: float = FEATURE_ANGLE,
+) -> np.ndarray:
+    """
+    Finds the vertices which smoothing should leave in place, see pin_laplacian().
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :param topology: The topology of the mesh.
+    :param pin: One of the keys of PINS ("boundary", "features" or "boundary_and_features").
+    :param angle: Dihedral angle in radians above which an edge is a sharp feature.
+    :return: The sorted indices of the pinned vertices.
+    """
+    if pin not in PINS:
+        raise ValueError(f"Unknown pin '{pin}', expected one of {list(PINS)}")
+    return PINS[pin](vertices, topology, angle).astype(np.int32)
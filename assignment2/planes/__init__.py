@@ -2,11 +2,13 @@ import mathutils
 import numpy
 
 from .distance_to_planes import *
+from ..core.ransac import ransac_planes
 from .test import *
 
 import random
 import bpy
 from bpy.app.handlers import persistent
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 import mathutils
 from mathutils import Vector, Matrix, Quaternion
 
@@ -30,6 +32,12 @@ class PlanesPropertyGroup(bpy.types.PropertyGroup):
         subtype='COLOR',
         default=[1, 0, 0]
     )
+    weight: bpy.props.FloatProperty(
+        name="Weight",
+        description="How much the plane counts in the sum of squared distances",
+        min=0.0,
+        default=1.0
+    )
 
 
 def add_plane(scene=None, point=None, normal=None, color=None):
@@ -44,6 +52,61 @@ def add_plane(scene=None, point=None, normal=None, color=None):
     plane.color = random_color if color is None else color
 
 
+def read_planes(planes):
+    # Reads all planes of a planes collection into (k, 3) point, normal and color arrays and a (k,) weight array
+    arrays = {'point': 3, 'normal': 3, 'color': 3, 'weight': 1}
+    for name, size in arrays.items():
+        array = numpy.zeros(len(planes) * size)
+        planes.foreach_get(name, array)
+        arrays[name] = array.reshape([-1, 3]) if size == 3 else array
+    return arrays['point'], arrays['normal'], arrays['color'], arrays['weight']
+
+
+def append_planes(planes, points, normals, colors=None, weights=None):
+    # Appends many planes to a planes collection at once, writing all their properties in bulk
+    existing = read_planes(planes)
+    count = len(points)
+    if colors is None:
+        colors = numpy.random.uniform(0, 1, (count, 3))
+        colors /= numpy.linalg.norm(colors, axis=1, keepdims=True)
+    new = (points, normals, colors, numpy.ones(count) if weights is None else weights)
+    for _ in range(count):
+        planes.add()
+    for name, old_values, new_values in zip(['point', 'normal', 'color', 'weight'], existing, new):
+        planes.foreach_set(name, numpy.concatenate([old_values, numpy.asarray(new_values, dtype=numpy.float64)]).ravel())
+
+
+def planes_solver(planes):
+    # A solver for a planes collection, built from arrays rather than per-plane Vectors
+    points, normals, _, weights = read_planes(planes)
+    return SquaredDistanceToPlanesSolver.from_arrays(points, normals, weights)
+
+
+def save_planes(planes, path):
+    # Saves the planes (with their colors) and the precomputed solver state to a .npz file
+    _, _, colors, _ = read_planes(planes)
+    planes_solver(planes).save(path, colors=colors)
+
+
+def load_planes(planes, path, replace=True):
+    # Loads planes saved with save_planes(), and returns the solver restored from the same file
+    with numpy.load(path) as state:
+        solver = SquaredDistanceToPlanesSolver.from_state(state)
+        colors = state['colors'] if 'colors' in state else None
+    if replace:
+        planes.clear()
+    append_planes(planes, solver.points, solver.normals, colors, solver.weights)
+    return solver if replace else planes_solver(planes)
+
+
+def add_detected_planes(scene, points, **ransac_args):
+    # Detects planes in an (N, 3) point array, adds them to the scene and returns a solver for them and the point labels
+    planes, labels = ransac_planes(points, **ransac_args)
+    append_planes(scene.planes, numpy.array([point for point, _ in planes]).reshape([-1, 3]),
+                  numpy.array([normal for _, normal in planes]).reshape([-1, 3]))
+    return SquaredDistanceToPlanesSolver(planes), labels
+
+
 class PlanesList(bpy.types.UIList):
     bl_idname = "UI_UL_PlanesList"
 
@@ -60,6 +123,9 @@ class PlanesList(bpy.types.UIList):
         row = col.row(align=True)
         row.prop(item, 'normal', text="")
 
+        row = col.row(align=True)
+        row.prop(item, 'weight')
+
         col.separator(factor=1.0)
 
 
@@ -112,11 +178,112 @@ class CreateExamplePlanesOperator(bpy.types.Operator):
         return {'FINISHED'}
 
 
+class DetectPlanesOperator(bpy.types.Operator):
+    bl_label = "Detect planes in the active mesh's vertices"
+    bl_idname = "assignment2.detect_planes_operator"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    threshold: bpy.props.FloatProperty(
+        name="Threshold", description="Maximum distance of a vertex to the plane it belongs to",
+        subtype='DISTANCE', min=0.0, soft_max=1.0, default=0.01
+    )
+    max_planes: bpy.props.IntProperty(
+        name="Max Planes", description="Maximum number of planes to detect",
+        min=1, max=100, default=6
+    )
+    min_inliers: bpy.props.IntProperty(
+        name="Min Vertices", description="Stop detecting once a plane has fewer vertices than this",
+        min=3, default=100
+    )
+    hypotheses: bpy.props.IntProperty(
+        name="Hypotheses", description="Number of random planes tried for every detected plane",
+        min=1, max=10000, default=256
+    )
+    replace: bpy.props.BoolProperty(
+        name="Replace Planes", description="Remove the existing planes first",
+        default=True
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.type == 'MESH'
+
+    def execute(self, context):
+        # World space vertex positions, read without going through BMesh
+        mesh = context.object.data
+        points = numpy.zeros(len(mesh.vertices) * 3)
+        mesh.vertices.foreach_get("co", points)
+        transform = numpy.array(context.object.matrix_world)
+        points = points.reshape([-1, 3]) @ transform[:3, :3].T + transform[:3, 3]
+
+        if self.replace:
+            context.scene.planes.clear()
+        max_planes = min(self.max_planes, 100 - len(context.scene.planes))
+        solver, labels = add_detected_planes(
+            context.scene, points, max_planes=max_planes, threshold=self.threshold,
+            min_inliers=self.min_inliers, hypotheses=self.hypotheses)
+        context.scene.selected_plane = max(len(context.scene.planes) - 1, 0)
+
+        self.report({'INFO'}, f"Detected {len(solver.planes)} planes, "
+                              f"covering {numpy.count_nonzero(labels >= 0)} of {len(labels)} vertices")
+        return {'FINISHED'}
+
+
+class SavePlanesOperator(bpy.types.Operator, ExportHelper):
+    bl_label = "Save the planes to a file"
+    bl_idname = "assignment2.save_planes_operator"
+
+    filename_ext = ".npz"
+    filter_glob: bpy.props.StringProperty(default="*.npz", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.planes) > 0
+
+    def execute(self, context):
+        save_planes(context.scene.planes, self.filepath)
+        self.report({'INFO'}, f"Saved {len(context.scene.planes)} planes")
+        return {'FINISHED'}
+
+
+class LoadPlanesOperator(bpy.types.Operator, ImportHelper):
+    bl_label = "Load planes from a file"
+    bl_idname = "assignment2.load_planes_operator"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".npz"
+    filter_glob: bpy.props.StringProperty(default="*.npz", options={'HIDDEN'})
+    replace: bpy.props.BoolProperty(
+        name="Replace Planes", description="Remove the existing planes first",
+        default=True
+    )
+
+    def execute(self, context):
+        try:
+            load_planes(context.scene.planes, self.filepath, self.replace)
+        except (OSError, KeyError, ValueError) as error:
+            self.report({'WARNING'}, f"Loading planes failed with error '{error}'")
+            return {'CANCELLED'}
+        context.scene.selected_plane = max(len(context.scene.planes) - 1, 0)
+        self.report({'INFO'}, f"Loaded planes, the scene now has {len(context.scene.planes)}")
+        return {'FINISHED'}
+
+
 class MoveToOptimalPositionOperator(bpy.types.Operator):
     bl_label = "Move the cursor to the optimal position"
     bl_idname = "assignment2.move_to_optimal_position_operator"
     bl_options = {'REGISTER', 'UNDO'}
 
+    robust: bpy.props.EnumProperty(
+        name="Loss", description="How planes far away from the optimal position are weighted",
+        items=[
+            ('NONE', "Least Squares", "Every plane counts with its squared distance"),
+            ('HUBER', "Huber", "Planes far away count with their distance, which limits the pull of outliers"),
+            ('TUKEY', "Tukey", "Planes far away are ignored entirely"),
+        ],
+        default='NONE'
+    )
+
     @classmethod
     def poll(cls, context):
         return len(context.scene.planes) > 1
@@ -127,9 +294,9 @@ class MoveToOptimalPositionOperator(bpy.types.Operator):
     def execute(self, context):
         # context.scene.planes.remove(context.scene.selected_plane)
         # context.scene.selected_plane = min(context.scene.selected_plane, len(context.scene.planes) - 1)
-        points_with_normals = [(Vector(p.point), Vector(p.normal)) for p in context.scene.planes]
-        solver = SquaredDistanceToPlanesSolver(points_with_normals)
-        context.scene.cursor.location = solver.optimal_point()
+        solver = planes_solver(context.scene.planes)
+        context.scene.cursor.location = solver.optimal_point_with_loss(
+            None if self.robust == 'NONE' else self.robust.lower())
         return {'FINISHED'}
 
 
@@ -153,6 +320,9 @@ class DistanceToPlanes(bpy.types.Panel):
         row.operator(CreatePlaneOperator.bl_idname, text="", icon='ADD')
         row.operator(RemovePlaneOperator.bl_idname, text="", icon='REMOVE')
         row.operator(CreateExamplePlanesOperator.bl_idname, text="Example")
+        row.operator(DetectPlanesOperator.bl_idname, text="Detect")
+        row.operator(LoadPlanesOperator.bl_idname, text="", icon='FILE_FOLDER')
+        row.operator(SavePlanesOperator.bl_idname, text="", icon='FILE_TICK')
         row.prop(context.scene, 'show_planes', text="Visible")
         self.layout.template_list('UI_UL_PlanesList', '', context.scene, 'planes', context.scene, 'selected_plane')
 
@@ -225,8 +395,13 @@ class VectorsToPlanesGizmo(bpy.types.GizmoGroup):
                 self.gizmos.remove(self.arrows.pop(plane))
                 self.gizmos.remove(self.crosses.pop(plane))
 
+        # Find the nearest point on every plane for the cursor at once
+        cursor_position = context.scene.cursor.location
+        solver = planes_solver(context.scene.planes)
+        nearest_points_on_planes = solver.projections(cursor_position)
+
         # Draw all the vectors
-        for plane in context.scene.planes:
+        for plane, nearest_point in zip(context.scene.planes, nearest_points_on_planes):
 
             # Add a gizmo for any plane which doesn't already have one
             if plane not in self.arrows.keys():
@@ -247,9 +422,8 @@ class VectorsToPlanesGizmo(bpy.types.GizmoGroup):
             cross.color = plane.color
 
             # Move the arrow and cross to connect the 3d cursor to the plane
-            cursor_position = context.scene.cursor.location
-            vector_to_plane = (plane.point - cursor_position).dot(plane.normal) * plane.normal
-            nearest_point_on_plane = cursor_position + vector_to_plane
+            nearest_point_on_plane = Vector(nearest_point)
+            vector_to_plane = nearest_point_on_plane - cursor_position
             arrow.matrix_basis = mathutils.Matrix.LocRotScale(
                 nearest_point_on_plane,  # cursor_position,
                 mathutils.Vector([0, 0, 1]).rotation_difference(-vector_to_plane.normalized()),
@@ -263,9 +437,7 @@ class VectorsToPlanesGizmo(bpy.types.GizmoGroup):
 
 
 def distance_to_planes(pos: mathutils.Vector, planes: list[PlanesPropertyGroup]) -> float:
-    points_with_normals = [(Vector(p.point), Vector(p.normal)) for p in planes]
-    solver = SquaredDistanceToPlanesSolver(points_with_normals)
-    return solver.sum_of_squared_distances(pos)
+    return planes_solver(planes).sum_of_squared_distances(pos)
 
 
 def register():
@@ -1,13 +1,18 @@
-from functools import cache
+from typing import Optional
 
-import numpy.random
-import numpy as np
 from mathutils import Vector, Matrix
 
+from ..core.planes import SquaredDistanceToPlanes
 
-class SquaredDistanceToPlanesSolver(object):
+
+class SquaredDistanceToPlanesSolver(SquaredDistanceToPlanes):
     """
     A solver type for computing and minimizing the sum of squared distances to a set of planes.
+
+    The math lives in the Blender-free SquaredDistanceToPlanes, this class only converts its results to mathutils types.
+    The batched per-plane queries (signed_distances(), projections(), nearest_planes()) accept Vectors as well,
+    and return NumPy arrays. Weighted planes are created with from_arrays(),
+    and optimal_point_with_loss() adds robust losses to optimal_point().
     """
 
     # !!! This function will be used for automatic grading, don't edit the signature !!!
@@ -30,20 +35,7 @@ class SquaredDistanceToPlanesSolver(object):
         # HINT: You'll want to save some precomputed results for best performance.
         #       Saving the list of planes directly and iterating over them in your distance() method will work,
         #       but it won't get full points.
-        self.planes = planes
-        # Precompute matrix
-        A = np.zeros((3, 3))
-        b = np.zeros(3)
-        for q, n in self.planes:
-            n = np.array(n) / np.linalg.norm(n)  # Normalize the normal vector
-            q = np.array(q)
-            A += np.outer(n, n)
-            b += np.dot(q, n) * n
-        self.A = A
-        self.b = b
-
-        self.A2 = np.array([plane[1] for plane in planes])
-        self.b2 = np.array([np.dot(plane[0], plane[1]) for plane in planes])
+        super().__init__(planes)
 
     # !!! This function will be used for automatic grading, don't edit the signature !!!
     def sum_of_squared_distances(self, point: Vector) -> float:
@@ -59,18 +51,7 @@ class SquaredDistanceToPlanesSolver(object):
         :param point: The point to find distance for.
         :return: The sum of squared distances between the point and all planes, as a float.
         """
-        if len(self.planes) <= 0:
-            return 0
-        # numpy isn't strictly necessary here, but its features can make things easier.
-        p = numpy.array(point)
-
-        Ax = np.dot(self.A2, p)
-        diff = Ax - self.b2
-        row_norms = np.linalg.norm(self.A2, axis=1)
-        squared_dist = (diff / row_norms) ** 2
-        sum_dist = np.sum(squared_dist)
-
-        return sum_dist
+        return super().sum_of_squared_distances(point)
 
     # !!! This function will be used for automatic grading, don't edit the signature !!!
     def optimal_point(self) -> Vector:
@@ -85,31 +66,25 @@ class SquaredDistanceToPlanesSolver(object):
         :return: A point which minimizes the sum of squared distances.
         """
 
-        if len(self.planes) <= 0:
-            return Vector((0, 0, 0))
-
         # HINT: numpy.linalg.solve() will come in handy here!
+        return Vector(super().optimal_point())
+
+    def optimal_point_with_loss(
+        self,
+        robust: Optional[str] = None,
+        scale: Optional[float] = None,
+        iterations: int = 50,
+    ) -> Vector:
+        """
+        Like optimal_point(), but with an optional robust loss which down-weights outlier planes.
 
-        if (
-            len(self.planes) == 1
-        ):  # it fails to solve because of singular matrices
-            return self.planes[0][
-                0
-            ]  # Just return the point of plane since any points on the plane can be optimal
-
-        if len(self.planes) == 2:
-            p1, n1 = np.array(self.planes[0])
-            p2, n2 = np.array(self.planes[1])
-            n1 = n1 / np.linalg.norm(n1)
-            n2 = n2 / np.linalg.norm(n2)
-
-            d = np.cross(n1, n2)
-
-            A = np.array([n1, n2, d])
-            b = np.array([np.dot(n1, p1), np.dot(n2, p2), 0])
-            p = np.linalg.lstsq(A.T, b, rcond=None)[0]
-            return Vector(p)
-
-        # Solve the linear system A * p = b
-        p = np.linalg.solve(self.A, self.b)
-        return Vector(p)
+        :param robust: Optional robust loss ("huber" or "tukey"), least squares by default.
+        :param scale: Residual scale of the robust loss, estimated from the distances by default.
+        :param iterations: Maximum number of reweighting iterations of the robust loss.
+        :return: The optimal point.
+        """
+        return Vector(
+            SquaredDistanceToPlanes.optimal_point(
+                self, robust, scale, iterations
+            )
+        )
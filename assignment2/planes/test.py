@@ -2,6 +2,7 @@ import unittest
 import numpy as np
 import numpy.random
 from mathutils import Matrix, Vector
+import bpy
 from .distance_to_planes import SquaredDistanceToPlanesSolver
 
 
@@ -112,3 +113,87 @@ class TestDistanceToPlanes(unittest.TestCase):
                 )
             ),
         )
+
+    def test_projections_of_vector(self):
+        solver = SquaredDistanceToPlanesSolver(
+            [
+                (Vector((0, 0, 1)), Vector((0, 0, 2))),
+                (Vector((1, 0, 0)), Vector((1, 0, 0))),
+            ]
+        )
+        cursor = Vector((3, 2, 5))
+        self.assertTrue(np.allclose(solver.signed_distances(cursor), [4, 2]))
+        self.assertTrue(
+            np.allclose(solver.projections(cursor), [[3, 2, 1], [1, 2, 5]])
+        )
+        indices, _ = solver.nearest_planes([cursor], k=1)
+        self.assertEqual(indices[0, 0], 1)
+
+    def test_detected_planes_are_added_to_the_scene(self):
+        from . import add_detected_planes
+
+        scene = bpy.context.scene
+        scene.planes.clear()
+        rng = numpy.random.default_rng(0)
+        floor = np.concatenate(
+            [rng.uniform(-1, 1, (2000, 2)), np.zeros((2000, 1))], axis=1
+        )
+        wall = np.concatenate(
+            [np.ones((1000, 1)), rng.uniform(-1, 1, (1000, 2))], axis=1
+        )
+        solver, labels = add_detected_planes(
+            scene, np.concatenate([floor, wall]), min_inliers=500, seed=0
+        )
+        self.assertEqual(len(scene.planes), 2)
+        self.assertEqual(len(solver.planes), 2)
+        self.assertAlmostEqual(abs(scene.planes[0].normal.z), 1, places=5)
+        self.assertAlmostEqual(abs(scene.planes[1].normal.x), 1, places=5)
+        self.assertTrue(np.all(labels[:2000] == 0))
+        self.assertAlmostEqual(solver.sum_of_squared_distances(Vector()), 1)
+        scene.planes.clear()
+
+    def test_weighted_planes(self):
+        planes = [
+            (Vector((0, 0, 0)), Vector((1, 0, 0))),
+            (Vector((0, 0, 0)), Vector((0, 1, 0))),
+            (Vector((0, 0, 0)), Vector((0, 0, 1))),
+            (Vector((1, 0, 0)), Vector((1, 0, 0))),
+        ]
+        solver = SquaredDistanceToPlanesSolver.from_arrays(
+            [point for point, _ in planes],
+            [normal for _, normal in planes],
+            [1, 1, 1, 3],
+        )
+        self.assertAlmostEqual(
+            solver.sum_of_squared_distances(Vector((0, 1, 1))), 5.0
+        )
+        optimum = solver.optimal_point()
+        self.assertIsInstance(optimum, Vector)
+        self.assertAlmostEqual(optimum.x, 0.75)
+        self.assertIsInstance(solver.optimal_point_with_loss("huber"), Vector)
+        self.assertEqual(solver.optimal_point_with_loss(), optimum)
+
+    def test_save_and_load_planes(self):
+        import os
+        import tempfile
+
+        from . import add_plane, load_planes, planes_solver, save_planes
+
+        scene = bpy.context.scene
+        scene.planes.clear()
+        for _ in range(5):
+            add_plane(scene)
+        scene.planes[2].weight = 3.0
+        expected = planes_solver(scene.planes)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "planes.npz")
+            save_planes(scene.planes, path)
+            scene.planes.clear()
+            solver = load_planes(scene.planes, path)
+            self.assertEqual(len(scene.planes), 5)
+            self.assertAlmostEqual(scene.planes[2].weight, 3.0)
+            self.assertIsInstance(solver, SquaredDistanceToPlanesSolver)
+            self.assertEqual(solver.optimal_point(), expected.optimal_point())
+            load_planes(scene.planes, path, replace=False)
+            self.assertEqual(len(scene.planes), 10)
+        scene.planes.clear()
@@ -2,9 +2,11 @@ import math
 from typing import Optional
 
 import numpy
-import numpy as np
 from mathutils import Matrix, Vector
 
+# The math lives in the Blender-free core, this module only converts between mathutils and numpy types.
+from ..core import rotation as rotation_core
+
 
 # !!! This function will be used for automatic grading, don't edit the signature !!!
 def rotation_component(transformation: Matrix) -> Matrix:
@@ -16,18 +18,9 @@ def rotation_component(transformation: Matrix) -> Matrix:
     :param transformation: A 4x4 affine transformation matrix.
     :return: The 3x3 rotation matrix implied by this transformation.
     """
-
-    # Converting to numpy may make some of your math more convenient!
-    transformation = numpy.array(transformation)
-
-    # HINT: The translation is contained entirely in the 4th column, so it will be dropped when you make the matrix 3x3
-    rotation_scale = transformation[:3, :3]
-    U, _, Vt = np.linalg.svd(rotation_scale)
-    rotation = np.dot(U, Vt)
-    det_rotation = np.linalg.det(rotation)
-    if det_rotation < 0:
-        rotation[:, -1] *= -1
-    return Matrix(rotation)
+    return Matrix(
+        rotation_core.rotation_component(numpy.array(transformation))
+    )
 
 
 # !!! This function will be used for automatic grading, don't edit the signature !!!
@@ -40,27 +33,7 @@ def axis_of_rotation(transformation: Matrix) -> Vector:
 
     :param transformation: The 3x3 transformation matrix for which to find the axis of rotation.
     """
-    rotation = np.array(rotation_component(transformation))
-    theta = np.arccos((np.trace(rotation) - 1) / 2)
-    axis = np.array([])
-    if np.isclose(theta, np.pi) or np.isclose(theta, 0):
-        # MEMO: in this case, any vector perpendicular to the plane of rotation is valid.
-        print("special case!!!!!!!")
-        axis = np.cross(rotation[0, :], rotation[1, :])
-    else:
-        axis = (
-            np.array(
-                [
-                    rotation[2, 1] - rotation[1, 2],
-                    rotation[0, 2] - rotation[2, 0],
-                    rotation[1, 0] - rotation[0, 1],
-                ]
-            )
-            / 2
-            * np.sin(theta)
-        )
-    axis = axis / np.linalg.norm(axis)
-    return Vector(axis)
+    return Vector(rotation_core.axis_of_rotation(numpy.array(transformation)))
 
 
 # !!! This function will be used for automatic grading, don't edit the signature !!!
@@ -74,7 +47,4 @@ def angle_of_rotation(transformation: Matrix) -> float:
     :param transformation: The 3x3 transformation matrix for which to find the angle of rotation.
     :return: The angle of rotation in radians.
     """
-    # TODO: This should return the angle of rotation
-    rotation = np.array(rotation_component(transformation))
-
-    return np.arccos((np.trace(rotation) - 1) / 2)
+    return rotation_core.angle_of_rotation(numpy.array(transformation))
@@ -1,16 +1,21 @@
+import time
+
 import mathutils
+import numpy as np
 
 from .explicit_laplace_smoothing import *
+from .batch import *
 from .test import *
+from ..core.deltas import SMOOTHING_DELTAS
 
 import bpy
 import bmesh
 
 
-class ExplicitLaplaceSmoothing(bpy.types.Operator):
-    bl_idname = "object.explicit_laplace_smoothing"
-    bl_label = "Mesh Smoothing with Combinatorial Laplace Coordinates"
-    bl_options = {'REGISTER', 'UNDO'}
+class ExplicitLaplaceSmoothingProperties(object):
+    # The properties and helpers shared by both smoothing operators.
+    # Blender only registers the annotated properties of plain mixins like this one,
+    # the ones an operator inherits from another (registered) operator class are skipped
 
     # Input parameters
     tau: bpy.props.FloatProperty(
@@ -21,50 +26,326 @@ class ExplicitLaplaceSmoothing(bpy.types.Operator):
         name="Iterations", description="Maximum number of iterations",
         min=1, max=200, default=5
     )
+    laplacian: bpy.props.EnumProperty(
+        name="Laplacian", description="Which Laplace operator to smooth with",
+        items=[
+            ('combinatorial', "Combinatorial", "Uniform 1/deg weights, independent of the geometry"),
+            ('cotangent', "Cotangent", "Geometric cotangent weights, robust to irregular sampling"),
+        ],
+        default='combinatorial'
+    )
+    method: bpy.props.EnumProperty(
+        name="Method", description="How every iteration updates the vertices",
+        items=[
+            ('LAPLACE', "Laplace", "Explicit Laplace steps, which shrink the mesh with every iteration"),
+            ('TAUBIN', "Taubin λ|μ", "A shrinking step followed by an inflating one, which preserves the volume"),
+            ('SPECTRAL', "Spectral", "Laplace steps evaluated in the mesh's lowest frequencies, "
+                                     "which costs the same for any number of iterations"),
+            ('MULTIGRID', "Multigrid", "One implicit step as smooth as the given iterations, solved on a hierarchy of "
+                                       "coarser meshes, which removes large bumps with few products"),
+        ],
+        default='LAPLACE'
+    )
+    pass_band: bpy.props.FloatProperty(
+        name="Pass-Band", description="Taubin pass-band frequency, features below it are kept",
+        min=0.001, max=0.5, step=0.01, default=0.1
+    )
+    eigenvectors: bpy.props.IntProperty(
+        name="Eigenvectors", description="Number of frequencies kept by spectral smoothing, higher ones are removed. "
+                                         "The basis is cached, so smoothing the same mesh again is fast",
+        min=2, max=2000, default=100
+    )
+    cycles: bpy.props.IntProperty(
+        name="V-Cycles", description="Number of multigrid cycles, each one reduces the remaining error about tenfold",
+        min=1, max=50, default=3
+    )
+    precision: bpy.props.EnumProperty(
+        name="Precision", description="Floating point precision of the Laplacian and coordinates while smoothing",
+        items=[
+            ('DOUBLE', "Double", "64-bit floats, exact reference results"),
+            ('SINGLE', "Single", "32-bit floats with 32-bit indices, about half the memory traffic on large meshes"),
+        ],
+        default='DOUBLE'
+    )
+    reorder: bpy.props.EnumProperty(
+        name="Vertex Order", description="Renumber the vertices while smoothing, for faster products on scanned meshes",
+        items=[
+            ('NONE', "Mesh Order", "Smooth in the order of the mesh's vertices"),
+            ('RCM', "Reverse Cuthill-McKee", "Order by the mesh's connectivity, minimizing the Laplacian's bandwidth"),
+            ('MORTON', "Space-Filling Curve", "Order by position along a Z-order curve"),
+        ],
+        default='NONE'
+    )
+    pin: bpy.props.EnumProperty(
+        name="Keep in Place", description="Vertices which smoothing leaves where they are",
+        items=[
+            ('NONE', "Nothing", "Smooth every vertex"),
+            ('BOUNDARY', "Boundary", "Pin the vertices of open boundaries, so the mesh doesn't shrink away from them"),
+            ('FEATURES', "Sharp Edges", "Pin the vertices of edges whose faces meet at more than the feature angle"),
+            ('BOUNDARY_AND_FEATURES', "Boundary and Sharp Edges", "Pin the vertices of boundaries and sharp edges"),
+        ],
+        default='NONE'
+    )
+    feature_angle: bpy.props.FloatProperty(
+        name="Feature Angle", description="Angle between the faces of an edge above which the edge counts as sharp",
+        subtype='ANGLE', min=0.0, max=np.pi, default=FEATURE_ANGLE
+    )
+    restrict_to: bpy.props.EnumProperty(
+        name="Restrict to", description="Which vertices of the mesh to smooth",
+        items=[
+            ('ALL', "Whole Mesh", "Smooth every vertex of the mesh"),
+            ('SELECTION', "Selection", "Only smooth the selected vertices"),
+            ('VERTEX_GROUP', "Vertex Group", "Only smooth the vertices of a vertex group, scaled by their weights"),
+            ('GEODESIC', "Geodesic Falloff", "Smooth the selected vertices, fading out with the distance "
+                                             "along the surface (heat method)"),
+        ],
+        default='ALL'
+    )
+    vertex_group: bpy.props.StringProperty(
+        name="Vertex Group", description="Vertex group which weights the smoothing"
+    )
+    falloff_radius: bpy.props.FloatProperty(
+        name="Falloff Radius", description="Distance along the surface from the selection at which smoothing stops",
+        subtype='DISTANCE', min=0.0, soft_max=10.0, default=0.5
+    )
+    falloff: bpy.props.EnumProperty(
+        name="Falloff", description="How smoothing fades out between the selection and the falloff radius",
+        items=[
+            ('SMOOTH', "Smooth", "Smooth falloff", 'SMOOTHCURVE', 0),
+            ('SPHERE', "Sphere", "Spherical falloff", 'SPHERECURVE', 1),
+            ('ROOT', "Root", "Root falloff", 'ROOTCURVE', 2),
+            ('LINEAR', "Linear", "Linear falloff", 'LINCURVE', 3),
+            ('SHARP', "Sharp", "Sharp falloff", 'SHARPCURVE', 4),
+            ('CONSTANT', "Constant", "Full smoothing up to the radius", 'NOCURVE', 5),
+        ],
+        default='SMOOTH'
+    )
+    halo: bpy.props.IntProperty(
+        name="Falloff Rings", description="Number of rings around the region over which the smoothing fades out",
+        min=0, max=32, default=0
+    )
+    out_of_core: bpy.props.BoolProperty(
+        name="Out of Core", description="Keep the Laplacian and coordinates in temporary files while smoothing, "
+                                        "for meshes which don't fit in memory (whole mesh, combinatorial Laplacian only)",
+        default=False
+    )
+    chunk_size: bpy.props.IntProperty(
+        name="Chunk Size", description="Number of vertices smoothed at once out of core, which bounds the memory use",
+        min=1024, default=1 << 20
+    )
+
+    cache_results: bpy.props.EnumProperty(
+        name="Result Cache", description="Keep the displacement of every smoothed mesh, so redoing the operator "
+                                         "with the same settings re-applies it instead of smoothing again. "
+                                         "Every run then hashes the mesh (about 0.2s per million vertices) "
+                                         "and the kept displacements stay in memory until the budget is met",
+        items=[
+            ('OFF', "Off", "Always smooth again"),
+            ('FLOAT', "Float Deltas", "Keep 32-bit float displacements, exact to Blender's precision"),
+            ('QUANTIZED', "Quantized Deltas", "Keep 16-bit integer displacements, half the size, "
+                                              "with an error below 1/65534 of the largest displacement"),
+        ],
+        default='OFF'
+    )
+    cache_budget: bpy.props.IntProperty(
+        name="Cache Budget", description="Memory kept for cached results of all meshes (in MiB), "
+                                         "the least recently used ones are dropped first",
+        min=1, max=1 << 16, default=256, subtype='UNSIGNED'
+    )
+    compress_results: bpy.props.BoolProperty(
+        name="Compress Cache", description="Deflate the cached displacements, which makes them smaller "
+                                           "(most of all with pinned vertices) but slower to store",
+        default=False
+    )
+
+    report_quality: bpy.props.BoolProperty(
+        name="Quality Report", description="Measure edge lengths, triangle shapes, displacement and volume change "
+                                           "of the smoothed meshes",
+        default=False
+    )
+
+    profile: bpy.props.BoolProperty(
+        name="Profile", description="Record the time spent in every stage and show it in the status",
+        default=False
+    )
+    profile_allocations: bpy.props.BoolProperty(
+        name="Profile Allocations", description="When profiling, also record the peak memory allocated in every stage "
+                                                "(through tracemalloc, which slows smoothing down considerably)",
+        default=False
+    )
+    trace_path: bpy.props.StringProperty(
+        name="Trace File", description="When profiling, also save the stages as a Chrome trace JSON file",
+        subtype='FILE_PATH', default=""
+    )
 
     # Output parameters
     status: bpy.props.StringProperty(
         name="Smoothing Status", default="Status not set"
     )
+    quality: bpy.props.StringProperty(
+        name="Quality Report", default=""
+    )
 
     @classmethod
     def poll(self, context):
-        # Explicit Laplace Smoothing is only available when a mesh is selected
-        return (
-                context.view_layer.objects.active is not None
-                and context.view_layer.objects.active.type == 'MESH'
-        )
+        # Explicit Laplace Smoothing is only available when at least one mesh is selected
+        return any(obj.type == 'MESH' for obj in self.target_objects(context))
 
-    def invoke(self, context, event):
-        return self.execute(context)
+    @staticmethod
+    def target_objects(context):
+        # All selected objects and the active one, keeping only one object per (shared) mesh datablock
+        objects = list(context.selected_objects)
+        if context.view_layer.objects.active is not None:
+            objects.append(context.view_layer.objects.active)
+        unique_meshes = {obj.data: obj for obj in objects if obj.type == 'MESH'}
+        return list(unique_meshes.values())
 
     def execute(self, context):
 
-        active_object = context.view_layer.objects.active
+        objects = self.target_objects(context)
+        recorder = SpanRecorder(self.profile_allocations) if self.profile else NO_SPANS
+        if self.out_of_core:
+            return self.execute_out_of_core(objects, recorder)
 
-        # Produce BMesh types to work with
-        active = bmesh.new()
-        active.from_mesh(active_object.data)
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, 2 * len(objects))
 
-        # Smooth active mesh
-        try:
-            smoothed_mesh = iterative_explicit_laplace_smooth(
-                active,
-                self.tau,
-                self.iterations)
-        except Exception as error:
-            self.report({'WARNING'}, f"Explicit Laplace Smoothing failed with error '{error}'")
+        # Reading meshes touches Blender data, so it happens on the main thread
+        jobs, keys, failures, cached = {}, {}, [], 0
+        for obj in objects:
+            try:
+                key = self.delta_key(obj.data)
+                if key is not None and apply_cached_delta(obj.data, key, recorder=recorder):
+                    cached += 1
+                    continue
+                job = SmoothingJob(
+                    obj.data,
+                    self.tau,
+                    self.iterations,
+                    laplacian=self.laplacian,
+                    weights=None if self.restrict_to == 'ALL' else (lambda data, obj=obj: self.region_weights(obj, data)),
+                    halo=self.halo,
+                    dtype=self.dtype,
+                    recorder=recorder,
+                    mu=self.mu,
+                    reorder=self.vertex_order,
+                    spectral=self.spectral,
+                    multigrid=self.multigrid,
+                    pin=self.pinned,
+                    feature_angle=self.feature_angle)
+                jobs[job], keys[job] = obj, key
+            except Exception as error:
+                failures.append((obj.name, error))
+
+        # Smooth all meshes concurrently
+        for job, error in run_concurrently(list(jobs), progress=window_manager.progress_update):
+            failures.append((jobs.pop(job).name, error))
+
+        # Update meshes with smoothed data, again on the main thread
+        for i, job in enumerate(jobs, start=len(objects) + 1):
+            job.apply()
+            self.store_delta(job, keys[job])
+            window_manager.progress_update(i)
+        window_manager.progress_end()
+        self.report_quality_of(jobs)
+
+        for name, error in failures:
+            self.report({'WARNING'}, f"Explicit Laplace Smoothing of '{name}' failed with error '{error}'")
+        smoothed = len(jobs) + cached
+        if not smoothed:
             return {'CANCELLED'}
 
-        self.status = (f"Applied {self.iterations} iterations (ε={self.tau:.2f})")
+        self.status = (f"Applied {self.iterations} {self.laplacian} {self.method.lower()} iterations "
+                       f"(ε={self.tau:.2f}) to {smoothed} mesh{'es' if smoothed > 1 else ''}"
+                       + (f" ({cached} from cache)" if cached else ""))
+        self.report_profile(recorder)
 
-        # Update mesh with smoothed data
-        smoothed_mesh.to_mesh(active_object.data)
-        active_object.data.update()
+        return {'FINISHED'}
 
+    def execute_out_of_core(self, objects, recorder):
+        # The files are streamed block by block, so meshes are smoothed one after the other on the main thread
+        smoothed = 0
+        for obj in objects:
+            try:
+                out_of_core_smooth_mesh(
+                    obj.data, self.tau, self.iterations, chunk_size=self.chunk_size, mu=self.mu, recorder=recorder)
+                smoothed += 1
+            except Exception as error:
+                self.report({'WARNING'}, f"Explicit Laplace Smoothing of '{obj.name}' failed with error '{error}'")
+        if not smoothed:
+            return {'CANCELLED'}
 
+        self.status = (f"Applied {self.iterations} out-of-core {self.method.lower()} iterations "
+                       f"(ε={self.tau:.2f}) to {smoothed} mesh{'es' if smoothed > 1 else ''}")
+        self.report_profile(recorder)
         return {'FINISHED'}
 
+    def delta_key(self, data):
+        # Identifies the mesh and every setting which changes the result, or None if the result can't be cached.
+        # Selections and vertex group weights aren't part of the fingerprint, and the quality report needs a job
+        if self.cache_results == 'OFF' or self.restrict_to != 'ALL' or self.report_quality:
+            return None
+        return (mesh_fingerprint(data), self.laplacian, self.method, self.tau, self.iterations, self.mu,
+                self.spectral, self.multigrid, self.precision, self.vertex_order, self.pinned,
+                self.feature_angle if self.pin in {'FEATURES', 'BOUNDARY_AND_FEATURES'} else None)
+
+    def store_delta(self, job, key):
+        if key is not None:
+            SMOOTHING_DELTAS.resize(self.cache_budget << 20)
+            job.store_delta(key, quantize=self.cache_results == 'QUANTIZED', compress=self.compress_results)
+
+    def report_quality_of(self, jobs):
+        # One line per mesh, with " | " between the sections (see format_quality())
+        if not self.report_quality:
+            self.quality = ""
+            return
+        self.quality = "\n".join(f"{job.data.name}: {format_quality(job.quality())}" for job in jobs)
+
+    def report_profile(self, recorder):
+        if not self.profile:
+            return
+        self.status += f" | {recorder.summary()}"
+        if self.trace_path:
+            try:
+                recorder.save_chrome_trace(bpy.path.abspath(self.trace_path))
+            except OSError as error:
+                self.report({'WARNING'}, f"Saving the trace failed with error '{error}'")
+
+    @property
+    def mu(self):
+        return taubin_mu(self.tau, self.pass_band) if self.method == 'TAUBIN' else None
+
+    @property
+    def spectral(self):
+        return self.eigenvectors if self.method == 'SPECTRAL' else None
+
+    @property
+    def multigrid(self):
+        return self.cycles if self.method == 'MULTIGRID' else None
+
+    @property
+    def vertex_order(self):
+        return None if self.reorder == 'NONE' else self.reorder.lower()
+
+    @property
+    def pinned(self):
+        return None if self.pin == 'NONE' else self.pin.lower()
+
+    @property
+    def dtype(self):
+        return np.float32 if self.precision == 'SINGLE' else np.float64
+
+    def region_weights(self, obj, data):
+        if self.restrict_to == 'SELECTION':
+            weights = np.zeros(len(data.vertices))
+            weights[selected_vertices(data)] = 1.0
+            return weights
+        if self.restrict_to == 'GEODESIC':
+            return geodesic_weights(data, selected_vertices(data), self.falloff_radius, self.falloff.lower())
+        if self.vertex_group not in obj.vertex_groups:
+            raise ValueError(f"Object has no vertex group '{self.vertex_group}'")
+        return vertex_group_weights(data, obj.vertex_groups[self.vertex_group].index)
+
     def draw(self, context):
         layout = self.layout
 
@@ -73,14 +354,211 @@ class ExplicitLaplaceSmoothing(bpy.types.Operator):
         row.label(text="Object to smooth: ")
         row.separator()
         row.prop(context.view_layer.objects, 'active', text="", expand=True, emboss=False)
+        other_objects = len(self.target_objects(context)) - 1
+        if other_objects > 0:
+            layout.label(text=f"... and {other_objects} more selected mesh{'es' if other_objects > 1 else ''}")
         layout.separator()
 
         # Convergence parameters
+        layout.prop(self, 'laplacian')
+        layout.prop(self, 'method')
+        if self.method == 'TAUBIN':
+            layout.prop(self, 'pass_band')
+        if self.method == 'SPECTRAL' and not self.out_of_core:
+            layout.prop(self, 'eigenvectors')
+        if self.method == 'MULTIGRID' and not self.out_of_core:
+            layout.prop(self, 'cycles')
+        layout.prop(self, 'precision')
+        if not self.out_of_core and self.method in {'LAPLACE', 'TAUBIN'}:
+            layout.prop(self, 'reorder')
+            layout.prop(self, 'pin')
+            if self.pin in {'FEATURES', 'BOUNDARY_AND_FEATURES'}:
+                layout.prop(self, 'feature_angle')
         layout.prop(self, 'iterations')
         layout.prop(self, 'tau')
+        layout.separator()
+
+        # Out-of-core smoothing always uses the whole mesh
+        layout.prop(self, 'out_of_core')
+        if self.out_of_core:
+            layout.prop(self, 'chunk_size')
+        layout.separator()
+
+        # Region parameters
+        if not self.out_of_core:
+            layout.prop(self, 'restrict_to')
+            if self.restrict_to == 'VERTEX_GROUP':
+                layout.prop_search(self, 'vertex_group', context.view_layer.objects.active, 'vertex_groups')
+            if self.restrict_to == 'GEODESIC':
+                layout.prop(self, 'falloff_radius')
+                layout.prop(self, 'falloff')
+            if self.restrict_to != 'ALL' and self.method in {'LAPLACE', 'TAUBIN'}:
+                layout.prop(self, 'halo')
+            layout.separator()
+
+        # Result cache
+        if not self.out_of_core:
+            layout.prop(self, 'cache_results')
+            if self.cache_results != 'OFF':
+                layout.prop(self, 'compress_results')
+                layout.prop(self, 'cache_budget')
+            if len(SMOOTHING_DELTAS):
+                row = layout.row()
+                row.label(text=f"{len(SMOOTHING_DELTAS)} cached, {SMOOTHING_DELTAS.nbytes / (1 << 20):.1f} MiB")
+                row.operator(ClearSmoothingCache.bl_idname, text="Clear")
+            layout.separator()
+
+        # Profiling
+        layout.prop(self, 'profile')
+        if self.profile:
+            layout.prop(self, 'profile_allocations')
+            layout.prop(self, 'trace_path')
 
         layout.prop(self, 'status', text="Status", emboss=False)
 
+        # Quality report
+        if not self.out_of_core:
+            layout.prop(self, 'report_quality')
+        if self.report_quality and self.quality:
+            box = layout.box()
+            for line in self.quality.split("\n"):
+                name, sections = line.split(": ", 1)
+                box.label(text=name, icon='MESH_DATA')
+                for section in sections.split(" | "):
+                    box.label(text=section)
+
+
+class ClearSmoothingCache(bpy.types.Operator):
+    bl_idname = "object.clear_smoothing_cache"
+    bl_label = "Clear Smoothing Result Cache"
+    bl_description = "Free the memory of all cached smoothing results"
+
+    def execute(self, context):
+        self.report({'INFO'}, f"Freed {SMOOTHING_DELTAS.nbytes / (1 << 20):.1f} MiB of cached smoothing results")
+        SMOOTHING_DELTAS.clear()
+        return {'FINISHED'}
+
+
+class ExplicitLaplaceSmoothing(ExplicitLaplaceSmoothingProperties, bpy.types.Operator):
+    bl_idname = "object.explicit_laplace_smoothing"
+    bl_label = "Mesh Smoothing with Combinatorial Laplace Coordinates"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def invoke(self, context, event):
+        return self.execute(context)
+
     @staticmethod
     def menu_func(menu, context):
         menu.layout.operator(ExplicitLaplaceSmoothing.bl_idname)
+
+
+class ModalExplicitLaplaceSmoothing(ExplicitLaplaceSmoothingProperties, bpy.types.Operator):
+    bl_idname = "object.modal_explicit_laplace_smoothing"
+    bl_label = "Interactive Mesh Smoothing with Laplace Coordinates"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    iterations: bpy.props.IntProperty(
+        name="Iterations", description="Maximum number of iterations",
+        min=1, max=10000, default=50
+    )
+    time_budget: bpy.props.FloatProperty(
+        name="Time Budget", description="Time spent smoothing per timer tick, the rest is left to the UI",
+        subtype='TIME_ABSOLUTE', unit='TIME_ABSOLUTE',
+        min=0.001, max=1.0, default=0.03
+    )
+
+    _timer = None
+    _jobs = None
+    _keys = None
+    _recorder = NO_SPANS
+
+    def invoke(self, context, event):
+        if self.out_of_core:
+            # Streaming from disk can't be previewed, so it runs to completion like the non-interactive operator
+            return self.execute(context)
+
+        self._recorder = SpanRecorder(self.profile_allocations) if self.profile else NO_SPANS
+        try:
+            objects = self.target_objects(context)
+            self._keys = [self.delta_key(obj.data) for obj in objects]
+            self._jobs = [
+                SmoothingJob(
+                    obj.data,
+                    self.tau,
+                    self.iterations,
+                    laplacian=self.laplacian,
+                    weights=None if self.restrict_to == 'ALL' else (lambda data, obj=obj: self.region_weights(obj, data)),
+                    halo=self.halo,
+                    dtype=self.dtype,
+                    recorder=self._recorder,
+                    mu=self.mu,
+                    reorder=self.vertex_order,
+                    spectral=self.spectral,
+                    multigrid=self.multigrid,
+                    pin=self.pinned,
+                    feature_angle=self.feature_angle)
+                for obj in objects
+            ]
+        except Exception as error:
+            self.report({'WARNING'}, f"Explicit Laplace Smoothing failed with error '{error}'")
+            return {'CANCELLED'}
+
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(self.time_budget / 2, window=context.window)
+        window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type in {'ESC', 'RIGHTMOUSE'}:
+            for job in self._jobs:
+                job.restore()
+            self.finish(context)
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            # Keep the viewport navigable while smoothing
+            return {'PASS_THROUGH'}
+
+        # Run single iterations round-robin until this tick's time budget is used up
+        deadline = time.perf_counter() + self.time_budget
+        pending = [job for job in self._jobs if not job.done]
+        while pending and time.perf_counter() < deadline:
+            for job in pending:
+                job.step(1)
+            pending = [job for job in pending if not job.done]
+
+        # Preview the intermediate result through the fast coordinate path
+        for job in self._jobs:
+            job.preview()
+        # Multigrid jobs count V-cycles instead of iterations
+        completed = min(job.completed for job in self._jobs)
+        total = max(job.iterations for job in self._jobs)
+        quality = f" | {format_quality(self._jobs[0].quality())}" if self.report_quality else ""
+        context.workspace.status_text_set(
+            f"Smoothing: {completed}/{total} iterations (Esc/Right Mouse to cancel and restore){quality}")
+
+        if pending:
+            return {'RUNNING_MODAL'}
+
+        self.status = (f"Applied {self.iterations} {self.laplacian} {self.method.lower()} iterations "
+                       f"(ε={self.tau:.2f}) to {len(self._jobs)} mesh{'es' if len(self._jobs) > 1 else ''}")
+        # Redoing from the panel executes the non-interactive path, which finds the result in the cache
+        for job, key in zip(self._jobs, self._keys):
+            self.store_delta(job, key)
+        self.report_quality_of(self._jobs)
+        self.report_profile(self._recorder)
+        self.finish(context)
+        return {'FINISHED'}
+
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        context.workspace.status_text_set(None)
+        self._timer, self._jobs, self._keys = None, None, None
+
+    def draw(self, context):
+        super().draw(context)
+        self.layout.prop(self, 'time_budget')
+
+    @staticmethod
+    def menu_func(menu, context):
+        menu.layout.operator(ModalExplicitLaplaceSmoothing.bl_idname)
@@ -0,0 +1,324 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Hashable, Optional
+
+import bmesh
+import bpy
+import numpy as np
+
+from ..core.deltas import SMOOTHING_DELTAS, CoordinateDelta, DeltaCache
+from ..core.multigrid import MultigridHierarchy, MultigridSmoother
+from ..core.profiling import NO_SPANS, SpanRecorder
+from ..core.quality import MeshQuality
+from ..core.reorder import REORDERINGS
+from ..core.smoothing import LaplaceSmoother
+from ..core.spectral import SpectralSmoother, cached_spectral_basis
+from ..core.topology import FEATURE_ANGLE
+from .explicit_laplace_smoothing import (
+    build_laplacian,
+    build_laplacian_weights,
+    build_region_laplacian,
+    pin_mesh_laplacian,
+    read_coordinates,
+    read_topology,
+    read_triangles,
+    write_coordinates,
+)
+
+
+class SmoothingJob(object):
+    """
+    Explicit Laplace (or Taubin) smoothing of a single mesh datablock, split into thread-safe and thread-unsafe parts.
+    With `spectral`, the iterations are evaluated in the mesh's (cached) spectral basis by a SpectralSmoother instead,
+    and with `multigrid` they are replaced by an equally strong implicit step, solved by a MultigridSmoother.
+
+    Blender data may only be touched from the main thread, so the job is executed in three steps:
+        - __init__() reads the mesh and builds the (localized) Laplacian (main thread),
+        - run() / step() advance the LaplaceSmoother (or SpectralSmoother), which only works on NumPy / SciPy arrays (any thread),
+        - apply() / preview() / restore() write coordinates back into the mesh datablock (main thread).
+    """
+
+    def __init__(
+        self,
+        data: bpy.types.Mesh,
+        tau: float,
+        iterations: int,
+        laplacian: str = "combinatorial",
+        weights: Optional[Callable[[bpy.types.Mesh], np.ndarray]] = None,
+        halo: int = 0,
+        dtype: np.dtype = np.float64,
+        recorder: SpanRecorder = NO_SPANS,
+        mu: Optional[float] = None,
+        reorder: Optional[str] = None,
+        spectral: Optional[int] = None,
+        multigrid: Optional[int] = None,
+        pin: Optional[str] = None,
+        feature_angle: float = FEATURE_ANGLE,
+    ):
+        """
+        Reads the mesh and prepares the smoothing operator.
+
+        :param data: The mesh datablock to smooth.
+        :param tau: Update weight.
+        :param iterations: Number of smoothing iterations to perform.
+        :param laplacian: Which Laplacian to smooth with, one of the keys of LAPLACIANS.
+        :param weights: Optional function returning per-vertex smoothing weights for the mesh datablock.
+                        When given, only the weighted region (plus `halo` rings) is smoothed,
+                        and only its part of the Laplacian is built, see build_region_laplacian().
+        :param halo: Number of rings around the weighted region which are smoothed with falling-off weights.
+        :param dtype: Floating point type used for the Laplacian and the coordinates during smoothing.
+        :param recorder: Records the time spent in every stage of the job.
+        :param mu: Optional negative step factor, which turns every iteration into a Taubin step pair.
+        :param reorder: Optional vertex ordering to smooth in for better cache locality, one of the keys of REORDERINGS.
+                        The mesh itself keeps its vertex order. Ignored with `weights`, which only iterate the region.
+        :param spectral: Optional number of eigenvectors to smooth in the spectral basis with, see SpectralSmoother.
+                         The region weights then blend between the original and smoothed positions (without halo),
+                         and `reorder` is ignored.
+        :param multigrid: Optional number of V-cycles to solve the implicit step (I + tau * iterations * L) X = X_0 with,
+                          see MultigridSmoother. Every V-cycle counts as one iteration of the job.
+                          Region weights are blended as with `spectral`, `mu` and `reorder` are ignored.
+        :param pin: Optional vertices to keep in place, one of the keys of PINS (folded into the Laplacian,
+                    see pin_mesh_laplacian()). Ignored by `spectral` and `multigrid`.
+        :param feature_angle: Dihedral angle in radians above which an edge is a sharp feature, when pinning features.
+        """
+        self.data = data
+        self.recorder = recorder
+        self.measure = None
+        with recorder.span("read_coordinates", verts=len(data.vertices)):
+            vertices = read_coordinates(data, dtype)
+        with recorder.span("region_weights"):
+            region = None if weights is None else weights(data)
+        if region is not None and spectral is None and multigrid is None:
+            # Only the rows of the region (plus its halo) are assembled, without a BMesh or a Laplacian of the whole mesh
+            active, boundary, L_local, active_weights = build_region_laplacian(
+                data,
+                region,
+                halo,
+                laplacian,
+                dtype,
+                vertices,
+                pin,
+                feature_angle,
+                recorder,
+            )
+            self.smoother = LaplaceSmoother(
+                vertices,
+                L_local,
+                tau,
+                iterations,
+                recorder=recorder,
+                mu=mu,
+                local=(active, boundary, active_weights),
+            )
+            return
+        with recorder.span("bmesh_from_mesh"):
+            mesh = bmesh.new()
+            mesh.from_mesh(data)
+        try:
+            if spectral is not None:
+                basis = cached_spectral_basis(
+                    build_laplacian_weights(mesh, laplacian, recorder),
+                    spectral,
+                    dtype,
+                    recorder,
+                )
+                self.smoother = SpectralSmoother(
+                    vertices,
+                    basis,
+                    tau,
+                    iterations,
+                    weights=region,
+                    recorder=recorder,
+                    mu=mu,
+                )
+                return
+            if multigrid is not None:
+                hierarchy = MultigridHierarchy(
+                    build_laplacian_weights(mesh, laplacian, recorder),
+                    dtype=dtype,
+                    recorder=recorder,
+                )
+                self.smoother = MultigridSmoother(
+                    vertices,
+                    hierarchy,
+                    tau * iterations,
+                    multigrid,
+                    weights=region,
+                    recorder=recorder,
+                )
+                return
+            L = build_laplacian(mesh, laplacian, dtype, recorder)
+            if pin is not None:
+                L = pin_mesh_laplacian(
+                    mesh, L, vertices, pin, feature_angle, recorder
+                )
+            with recorder.span("reorder", reorder=reorder):
+                order = (
+                    None
+                    if reorder is None
+                    else REORDERINGS[reorder](vertices, L)
+                )
+            self.smoother = LaplaceSmoother(
+                vertices,
+                L,
+                tau,
+                iterations,
+                weights=region,
+                halo=halo,
+                recorder=recorder,
+                mu=mu,
+                order=order,
+            )
+        finally:
+            mesh.free()
+
+    @property
+    def done(self) -> bool:
+        return self.smoother.done
+
+    @property
+    def iterations(self) -> int:
+        return self.smoother.iterations
+
+    @property
+    def completed(self) -> int:
+        return self.smoother.completed
+
+    def step(self, iterations: int = 1) -> int:
+        """
+        Performs (at most) the given number of the remaining smoothing iterations.
+        Doesn't touch any Blender data, so it is safe to call from a worker thread.
+
+        :param iterations: Maximum number of iterations to perform.
+        :return: The number of iterations which were actually performed.
+        """
+        return self.smoother.step(iterations)
+
+    def run(self) -> "SmoothingJob":
+        """
+        Performs all remaining smoothing iterations, see step().
+
+        :return: The job itself, for convenience when collecting futures.
+        """
+        self.smoother.run()
+        return self
+
+    def preview(self):
+        """
+        Writes the current (possibly intermediate) coordinates to the mesh datablock. Main thread only.
+        """
+        with self.recorder.span(
+            "write_coordinates", verts=len(self.data.vertices)
+        ):
+            write_coordinates(self.data, self.smoother.coordinates())
+
+    def apply(self):
+        """
+        Writes the smoothed coordinates back to the mesh datablock. Main thread only.
+        """
+        self.preview()
+
+    def quality(self) -> dict[str, float]:
+        """
+        Computes the quality report of the current (possibly intermediate) coordinates relative to the original ones,
+        see MeshQuality. The topology and triangles are read on the first call. Main thread only.
+
+        :return: The metrics by name.
+        """
+        if self.measure is None:
+            self.measure = MeshQuality(
+                read_topology(self.data).edges,
+                read_triangles(self.data),
+                original=self.smoother.original,
+            )
+        with self.recorder.span("quality", verts=len(self.data.vertices)):
+            return self.measure(self.smoother.coordinates())
+
+    def restore(self):
+        """
+        Writes the original coordinates back to the mesh datablock, undoing any preview. Main thread only.
+        """
+        write_coordinates(self.data, self.smoother.original)
+
+    def store_delta(
+        self,
+        key: Hashable,
+        cache: DeltaCache = SMOOTHING_DELTAS,
+        quantize: bool = False,
+        compress: bool = False,
+    ) -> bool:
+        """
+        Caches the displacement of the current coordinates from the original ones, see apply_cached_delta().
+        Doesn't touch any Blender data, so it is safe to call from a worker thread.
+
+        :param key: Identifies the original mesh and the smoothing parameters, see mesh_fingerprint().
+        :param cache: The cache to store the delta in.
+        :param quantize: Whether to store 16-bit integer instead of 32-bit float displacements, see CoordinateDelta.
+        :param compress: Whether to deflate the stored displacements.
+        :return: Whether the delta was stored, False if it exceeds the cache's budget.
+        """
+        with self.recorder.span(
+            "store_delta", verts=len(self.smoother.original)
+        ) as span:
+            delta = CoordinateDelta(
+                self.smoother.original,
+                self.smoother.coordinates(),
+                quantize,
+                compress,
+            )
+            span["args"]["bytes"] = delta.nbytes
+            return cache.put(key, delta)
+
+
+def apply_cached_delta(
+    data: bpy.types.Mesh,
+    key: Hashable,
+    cache: DeltaCache = SMOOTHING_DELTAS,
+    recorder: SpanRecorder = NO_SPANS,
+) -> bool:
+    """
+    Re-applies a cached smoothing result to a mesh datablock, from its current (original) coordinates
+    plus the displacements stored by SmoothingJob.store_delta(). Main thread only.
+
+    Redoing an operator restores the mesh from the undo stack and executes the operator again,
+    so repeating the same smoothing this way only costs reading and writing the coordinates.
+
+    :param data: The mesh datablock to update.
+    :param key: Identifies the original mesh and the smoothing parameters, see mesh_fingerprint().
+    :param cache: The cache to look the delta up in.
+    :param recorder: Records the time spent restoring the coordinates.
+    :return: Whether a delta was found and applied, the mesh is left unchanged otherwise.
+    """
+    delta = cache.get(key)
+    if delta is None:
+        return False
+    with recorder.span("apply_cached_delta", verts=len(data.vertices)):
+        write_coordinates(data, delta.apply(read_coordinates(data)))
+    return True
+
+
+def run_concurrently(
+    jobs: list[SmoothingJob],
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> list[tuple[SmoothingJob, Exception]]:
+    """
+    Runs the thread-safe part of many smoothing jobs on a thread pool.
+
+    The sparse products and array arithmetic release the GIL,
+    so independent meshes are smoothed in parallel.
+    `progress` is called from the calling thread, once for every job which finishes.
+
+    :param jobs: The prepared smoothing jobs.
+    :param max_workers: Size of the thread pool, defaults to the ThreadPoolExecutor default.
+    :param progress: Optional callback receiving the number of finished jobs.
+    :return: The jobs which failed, each paired with the error it raised.
+    """
+    failures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(job.run): job for job in jobs}
+        for finished, future in enumerate(as_completed(futures), start=1):
+            if future.exception() is not None:
+                failures.append((futures[future], future.exception()))
+            if progress is not None:
+                progress(finished)
+    return failures
@@ -1,23 +1,71 @@
+import tempfile
+from typing import Optional
+
 import numpy
 import numpy as np
-from scipy.sparse import coo_array, eye_array, sparray, coo_matrix
+from scipy.sparse import sparray
 
 import bpy
 import bmesh
 
+# The mesh-independent math lives in the Blender-free core,
+# this module only converts between Blender meshes and arrays.
+from ..core.components import (
+    block_diagonal_smooth,
+    component_blocks,
+    component_parallel_smooth,
+)
+from ..core.deltas import coordinates_fingerprint
+from ..core.geodesics import cached_heat_geodesics, geodesic_falloff
+from ..core.laplacian import (
+    combinatorial_laplacian,
+    cotangent_laplacian,
+    cotangent_weights,
+    grow_region,
+    mass_matrix,
+    pin_laplacian,
+    region_laplacian,
+)
+from ..core.multigrid import MultigridHierarchy, MultigridSmoother
+from ..core.out_of_core import (
+    CHUNK_SIZE,
+    VERTICES,
+    create_array,
+    out_of_core_laplace_smooth,
+    save_combinatorial_laplacian,
+)
+from ..core.profiling import NO_SPANS, SpanRecorder
+from ..core.quality import mesh_quality
+from ..core.smoothing import (
+    explicit_laplace_smooth,
+    localized_explicit_laplace_smooth,
+)
+from ..core.spectral import SpectralSmoother, cached_spectral_basis
+from ..core.topology import FEATURE_ANGLE, MeshTopology, pinned_vertices
+
+# Re-exported for the operators (see __init__.py) and the tests of this package
+from ..core.deltas import DeltaCache  # noqa: F401
+from ..core.laplacian import enclosed_volume, localize_laplacian  # noqa: F401
+from ..core.quality import format_quality  # noqa: F401
+from ..core.smoothing import taubin_mu  # noqa: F401
+from ..core.spectral import SPECTRAL_BASES  # noqa: F401
 
-def numpy_verts(mesh: bmesh.types.BMesh) -> np.ndarray:
+
+def numpy_verts(
+    mesh: bmesh.types.BMesh, dtype: np.dtype = np.float64
+) -> np.ndarray:
     """
     Extracts a numpy array of (x, y, z) vertices from a blender mesh
 
     :param mesh: The BMesh to extract the vertices of.
+    :param dtype: Floating point type of the result, e.g. numpy.float32 to halve the memory traffic of smoothing.
     :return: A numpy array of shape [n, 3], where array[i, :] is the x, y, z coordinate of vertex i.
     """
     data = bpy.data.meshes.new("tmp")
     mesh.to_mesh(data)
     # Explained here:
     # https://blog.michelanders.nl/2016/02/copying-vertices-to-numpy-arrays-in_4.html
-    vertices = np.zeros(len(mesh.verts) * 3, dtype=np.float64)
+    vertices = np.zeros(len(mesh.verts) * 3, dtype=dtype)
     data.vertices.foreach_get("co", vertices)
     return vertices.reshape([len(mesh.verts), 3])
 
@@ -33,34 +81,279 @@ def set_verts(mesh: bmesh.types.BMesh, verts: np.ndarray) -> bmesh.types.BMesh:
     return mesh
 
 
+def read_coordinates(
+    data: bpy.types.Mesh, dtype: np.dtype = np.float64
+) -> np.ndarray:
+    """
+    Reads the vertex coordinates of a mesh datablock without going through BMesh.
+
+    This is the fast coordinate I/O path: a single `foreach_get` into a preallocated buffer.
+
+    :param data: The mesh datablock to read.
+    :param dtype: Floating point type of the result.
+    :return: A numpy array of shape [n, 3].
+    """
+    vertices = np.zeros(len(data.vertices) * 3, dtype=dtype)
+    data.vertices.foreach_get("co", vertices)
+    return vertices.reshape([-1, 3])
+
+
+def write_coordinates(data: bpy.types.Mesh, verts: np.ndarray):
+    """
+    Overwrites the vertex coordinates of a mesh datablock without going through BMesh, and tags it for redraw.
+
+    :param data: The mesh datablock to update.
+    :param verts: New coordinates as a numpy array of shape [n, 3].
+    """
+    data.vertices.foreach_set("co", verts.ravel())
+    data.update()
+
+
+def read_edges(data: bpy.types.Mesh) -> np.ndarray:
+    """
+    Reads the edge vertex indices of a mesh datablock without going through BMesh, see read_coordinates().
+
+    :param data: The mesh datablock to read.
+    :return: A numpy array of shape [e, 2].
+    """
+    edges = np.zeros(len(data.edges) * 2, dtype=np.int32)
+    data.edges.foreach_get("vertices", edges)
+    return edges.reshape([-1, 2])
+
+
+def read_triangles(data: bpy.types.Mesh) -> np.ndarray:
+    """
+    Reads the loop triangles of a mesh datablock without going through BMesh, see numpy_triangles().
+
+    :param data: The mesh datablock to read.
+    :return: A numpy array of shape [t, 3].
+    """
+    data.calc_loop_triangles()
+    triangles = np.zeros(len(data.loop_triangles) * 3, dtype=np.int32)
+    data.loop_triangles.foreach_get("vertices", triangles)
+    return triangles.reshape([-1, 3])
+
+
+def read_topology(data: bpy.types.Mesh) -> MeshTopology:
+    """
+    Reads the connectivity of a mesh datablock into a MeshTopology without going through BMesh, see read_coordinates().
+
+    The polygons are passed on as Blender stores them (loop vertex indices and loop starts),
+    plus the loose edges, which belong to no polygon.
+
+    :param data: The mesh datablock to read.
+    :return: The half-edge and vertex adjacency arrays of the mesh.
+    """
+    loops = np.zeros(len(data.loops), dtype=np.int32)
+    data.loops.foreach_get("vertex_index", loops)
+    starts = np.zeros(len(data.polygons), dtype=np.int32)
+    data.polygons.foreach_get("loop_start", starts)
+    loose = np.zeros(len(data.edges), dtype=bool)
+    data.edges.foreach_get("is_loose", loose)
+    return MeshTopology(
+        len(data.vertices),
+        loops,
+        np.append(starts, len(loops)),
+        read_edges(data)[loose],
+    )
+
+
+def mesh_fingerprint(data: bpy.types.Mesh) -> str:
+    """
+    Hashes the vertex positions, edges and polygon corners of a mesh datablock, see coordinates_fingerprint().
+    Blender stores the positions as 32-bit floats, so they are hashed exactly as stored.
+
+    :param data: The mesh datablock to hash.
+    :return: A digest which changes whenever the geometry or connectivity of the mesh does.
+    """
+    loops = np.zeros(len(data.loops), dtype=np.int32)
+    data.loops.foreach_get("vertex_index", loops)
+    return coordinates_fingerprint(
+        read_coordinates(data, np.float32), read_edges(data), loops
+    )
+
+
+def quality_report(
+    data: bpy.types.Mesh, original: Optional[np.ndarray] = None
+) -> dict[str, float]:
+    """
+    Computes the quality report of a mesh datablock, see mesh_quality().
+
+    :param data: The mesh datablock to evaluate.
+    :param original: Optional earlier vertex positions of the mesh (e.g. before smoothing) as an Nx3 numpy array.
+    :return: The metrics by name.
+    """
+    return mesh_quality(
+        read_coordinates(data),
+        read_edges(data),
+        read_triangles(data),
+        original,
+    )
+
+
+def numpy_edges(mesh: bmesh.types.BMesh) -> np.ndarray:
+    """
+    Extracts a numpy array of edge vertex indices from a blender mesh.
+
+    :param mesh: The BMesh to extract the edges of.
+    :return: A numpy array of shape [e, 2], where array[i, :] holds the vertex indices of edge i.
+    """
+    data = bpy.data.meshes.new("tmp")
+    mesh.to_mesh(data)
+    edges = np.zeros(len(data.edges) * 2, dtype=np.int32)
+    data.edges.foreach_get("vertices", edges)
+    bpy.data.meshes.remove(data)
+    return edges.reshape([-1, 2])
+
+
+def numpy_triangles(mesh: bmesh.types.BMesh) -> np.ndarray:
+    """
+    Extracts a numpy array of triangle vertex indices from a blender mesh.
+
+    Quads and n-gons are split with Blender's own loop triangulation,
+    so the result is suitable for per-triangle geometric quantities (angles, areas).
+
+    :param mesh: The BMesh to extract the triangles of.
+    :return: A numpy array of shape [t, 3], where array[i, :] holds the vertex indices of triangle i.
+    """
+    data = bpy.data.meshes.new("tmp")
+    mesh.to_mesh(data)
+    data.calc_loop_triangles()
+    triangles = np.zeros(len(data.loop_triangles) * 3, dtype=np.int32)
+    data.loop_triangles.foreach_get("vertices", triangles)
+    bpy.data.meshes.remove(data)
+    return triangles.reshape([-1, 3])
+
+
+def mesh_topology(mesh: bmesh.types.BMesh) -> MeshTopology:
+    """
+    Builds the array-backed topology of a blender mesh, see read_topology().
+    Use its degree / neighbours() instead of walking `vert.link_edges`, which allocates a wrapper per element.
+
+    :param mesh: The BMesh to extract the topology of.
+    :return: The half-edge and vertex adjacency arrays of the mesh.
+    """
+    data = bpy.data.meshes.new("tmp")
+    mesh.to_mesh(data)
+    topology = read_topology(data)
+    bpy.data.meshes.remove(data)
+    return topology
+
+
+def selected_vertices(data: bpy.types.Mesh) -> np.ndarray:
+    """
+    Finds the indices of the selected vertices of a mesh datablock, with a single `foreach_get` of the selection flags.
+
+    :param data: The mesh datablock to read the selection of.
+    :return: A sorted numpy array of the indices of all selected vertices.
+    """
+    selected = np.zeros(len(data.vertices), dtype=bool)
+    data.vertices.foreach_get("select", selected)
+    return np.flatnonzero(selected)
+
+
+def geodesic_weights(
+    data: bpy.types.Mesh,
+    sources: np.ndarray,
+    radius: float,
+    falloff: str = "smooth",
+    time_factor: float = 1.0,
+    recorder: SpanRecorder = NO_SPANS,
+) -> np.ndarray:
+    """
+    Computes smoothing weights which fade out with the geodesic distance from some vertices of a mesh datablock,
+    see HeatGeodesics and geodesic_falloff().
+    The heat method's factorizations are cached per mesh, so other sources on the same mesh only cost two solves.
+
+    :param data: The mesh datablock to read.
+    :param sources: Indices of the vertices with full weight, e.g. the selected ones.
+    :param radius: Geodesic distance at which the weights reach 0.
+    :param falloff: The profile of the weights, one of the keys of FALLOFFS.
+    :param time_factor: Diffusion time of the heat method, in squared mean edge lengths.
+    :param recorder: Records the time spent factorizing and solving.
+    :return: A numpy array of shape [n] with the weight of every vertex.
+    """
+    geodesics = cached_heat_geodesics(
+        read_coordinates(data), read_triangles(data), time_factor, recorder
+    )
+    return geodesic_falloff(
+        geodesics.distances(sources, recorder), radius, falloff
+    )
+
+
+def vertex_group_weights(data: bpy.types.Mesh, group_index: int) -> np.ndarray:
+    """
+    Extracts the per-vertex weights of one vertex group from a mesh datablock.
+
+    Blender has no bulk accessor (like `foreach_get`) for deform weights, so this is a pass over
+    the group memberships of every vertex, but it reads them straight from the datablock instead of building a BMesh.
+
+    :param data: The mesh datablock to read the weights of.
+    :param group_index: Index of the vertex group (as in `Object.vertex_groups`).
+    :return: A numpy array of shape [n], with weight 0 for vertices which are not in the group.
+    """
+    weights = np.zeros(len(data.vertices))
+    for vertex in data.vertices:
+        for element in vertex.groups:
+            if element.group == group_index:
+                weights[vertex.index] = element.weight
+                break
+    return weights
+
+
+def numpy_vert_subset(
+    mesh: bmesh.types.BMesh, indices: np.ndarray, dtype: np.dtype = np.float64
+) -> np.ndarray:
+    """
+    Extracts the (x, y, z) coordinates of a subset of the vertices of a blender mesh.
+
+    Unlike numpy_verts(), this doesn't copy the whole mesh, so its cost only depends on the size of the subset.
+
+    :param mesh: The BMesh to extract the vertices of.
+    :param indices: Indices of the vertices to extract.
+    :param dtype: Floating point type of the result.
+    :return: A numpy array of shape [len(indices), 3].
+    """
+    mesh.verts.ensure_lookup_table()
+    return np.array(
+        [mesh.verts[i].co for i in indices.tolist()], dtype=dtype
+    ).reshape([len(indices), 3])
+
+
+def set_vert_subset(
+    mesh: bmesh.types.BMesh, indices: np.ndarray, verts: np.ndarray
+) -> bmesh.types.BMesh:
+    """
+    Overwrites the coordinates of a subset of the vertices of a blender mesh, leaving all others untouched.
+
+    :param mesh: The BMesh to update.
+    :param indices: Indices of the vertices to update.
+    :param verts: New coordinates as a numpy array of shape [len(indices), 3].
+    :return: The updated mesh.
+    """
+    mesh.verts.ensure_lookup_table()
+    for i, co in zip(indices.tolist(), verts.tolist()):
+        mesh.verts[i].co = co
+    return mesh
+
+
 # HINT: This is a helper method which you can change (for example, if you want to try different sparse formats)
-def adjacency_matrix(mesh: bmesh.types.BMesh) -> coo_array:
+def adjacency_matrix(
+    mesh: bmesh.types.BMesh, dtype: np.dtype = np.float64
+) -> sparray:
     """
     Computes the adjacency matrix of a mesh.
 
     Computes the adjacency matrix of the given mesh.
     Uses a sparse data structure to represent the matrix,
     which is more efficient for operations like matrix multiplication.
+    The matrix wraps the CSR neighbour arrays of the mesh's topology (see mesh_topology()) with int32 indices.
 
     :param mesh: Mesh to compute the adjacency matrix of.
+    :param dtype: Type of the stored values.
     :return: A sparse matrix representing the mesh adjacency matrix.
     """
-    # HINT: Iterating over mesh.edges is significantly faster than iterating over mesh.verts and getting neighbors!
-    #       Building a sparse matrix from a set of I, J, V triplets is also faster than adding elements sequentially.
-    # TODO: Create a sparse adjacency matrix using one of the types from scipy.sparse
-    num_verts = len(mesh.verts)
-    rows: list[int] = []
-    cols: list[int] = []
-    for edge in mesh.edges:
-        v1, v2 = edge.verts
-        rows.append(v1.index)
-        cols.append(v2.index)
-        rows.append(v2.index)
-        cols.append(v1.index)
-    np_rows: np.ndarray = np.array(rows)
-    np_cols: np.ndarray = np.array(cols)
-    data: np.ndarray = np.ones_like(np_rows)
-    return coo_array((data, (np_rows, np_cols)), shape=(num_verts, num_verts))
+    return mesh_topology(mesh).adjacency(dtype)
 
 
 # !!! This function will be used for automatic grading, don't edit the signature !!!
@@ -80,45 +373,335 @@ def build_combinatorial_laplacian(mesh: bmesh.types.BMesh) -> sparray:
     :param mesh: Mesh to compute the normalized combinatorial Laplacian matrix of.
     :return: A sparse array representing the mesh Laplacian matrix.
     """
+    return combinatorial_mesh_laplacian(mesh)
+
+
+def combinatorial_mesh_laplacian(
+    mesh: bmesh.types.BMesh,
+    dtype: np.dtype = np.float64,
+    recorder: SpanRecorder = NO_SPANS,
+) -> sparray:
+    """
+    Computes the normalized combinatorial Laplacian of the given mesh, see combinatorial_laplacian().
+
+    This is the implementation behind build_combinatorial_laplacian(), whose signature must stay as it is.
 
-    num_verts = len(mesh.verts)
-    A = adjacency_matrix(mesh)
-    vert_degrees = []
-    for vert in mesh.verts:
-        degree = len(vert.link_edges)
-        vert_degrees.append(degree)
-    D = np.diag(vert_degrees)
-    I = np.identity(num_verts)
-    L = I - np.linalg.inv(D) @ A
+    :param mesh: Mesh to compute the normalized combinatorial Laplacian matrix of.
+    :param dtype: Floating point type of the stored values.
+    :param recorder: Records the time spent reading the mesh and assembling the matrix.
+    :return: A sparse array representing the mesh Laplacian matrix.
+    """
+    with recorder.span("numpy_edges") as span:
+        edges = numpy_edges(mesh)
+        span["args"]["edges"] = len(edges)
+    with recorder.span("assemble_laplacian", verts=len(mesh.verts)):
+        return combinatorial_laplacian(len(mesh.verts), edges, dtype)
+
+
+def build_cotangent_laplacian(
+    mesh: bmesh.types.BMesh,
+    dtype: np.dtype = np.float64,
+    recorder: SpanRecorder = NO_SPANS,
+) -> sparray:
+    """
+    Computes the normalized cotangent Laplacian of the given mesh.
+
+    Unlike the combinatorial Laplacian, the weights depend on the geometry of the mesh,
+    which keeps irregularly sampled regions from drifting along the surface during smoothing.
+    See cotangent_laplacian() for the exact definition.
+
+    :param mesh: Mesh to compute the cotangent Laplacian matrix of.
+    :param dtype: Floating point type of the stored values.
+    :param recorder: Records the time spent reading the mesh and assembling the matrix.
+    :return: A sparse array representing the mesh Laplacian matrix.
+    """
+    with recorder.span("numpy_verts", verts=len(mesh.verts)):
+        vertices = numpy_verts(mesh)
+    with recorder.span("numpy_triangles") as span:
+        triangles = numpy_triangles(mesh)
+        span["args"]["triangles"] = len(triangles)
+    with recorder.span("assemble_laplacian", verts=len(vertices)):
+        return cotangent_laplacian(vertices, triangles, dtype)
+
+
+def build_mass_matrix(mesh: bmesh.types.BMesh) -> sparray:
+    """
+    Computes the lumped mass matrix of the given mesh, see mass_matrix().
+
+    :param mesh: Mesh to compute the mass matrix of.
+    :return: A sparse diagonal array of vertex areas.
+    """
+    return mass_matrix(numpy_verts(mesh), numpy_triangles(mesh))
+
+
+LAPLACIANS = {
+    "combinatorial": combinatorial_mesh_laplacian,
+    "cotangent": build_cotangent_laplacian,
+}
+
+
+def build_laplacian(
+    mesh: bmesh.types.BMesh,
+    laplacian: str = "combinatorial",
+    dtype: np.dtype = np.float64,
+    recorder: SpanRecorder = NO_SPANS,
+) -> sparray:
+    """
+    Computes a Laplacian of the given mesh by name.
+
+    :param mesh: Mesh to compute the Laplacian matrix of.
+    :param laplacian: One of the keys of LAPLACIANS ("combinatorial" or "cotangent").
+    :param dtype: Floating point type of the stored values.
+    :param recorder: Records the time spent building the Laplacian.
+    :return: A sparse array representing the mesh Laplacian matrix.
+    """
+    if laplacian not in LAPLACIANS:
+        raise ValueError(
+            f"Unknown Laplacian '{laplacian}', expected one of {list(LAPLACIANS)}"
+        )
+    with recorder.span("build_laplacian", laplacian=laplacian) as span:
+        L = LAPLACIANS[laplacian](mesh, dtype, recorder)
+        span["args"]["nnz"] = L.nnz
     return L
 
 
-# !!! This function will be used for automatic grading, don't edit the signature !!!
-def explicit_laplace_smooth(
+def build_laplacian_weights(
+    mesh: bmesh.types.BMesh,
+    laplacian: str = "combinatorial",
+    recorder: SpanRecorder = NO_SPANS,
+) -> sparray:
+    """
+    Computes the symmetric weight matrix W of a Laplacian L = I - D^(-1)W of the given mesh by name.
+
+    :param mesh: Mesh to compute the weights of.
+    :param laplacian: One of the keys of LAPLACIANS ("combinatorial" or "cotangent").
+    :param recorder: Records the time spent building the weights.
+    :return: The adjacency matrix or the cotangent weights of the mesh, as a sparse array.
+    """
+    if laplacian not in LAPLACIANS:
+        raise ValueError(
+            f"Unknown Laplacian '{laplacian}', expected one of {list(LAPLACIANS)}"
+        )
+    with recorder.span("build_weights", laplacian=laplacian) as span:
+        if laplacian == "combinatorial":
+            W = adjacency_matrix(mesh).tocsr()
+        else:
+            W = cotangent_weights(numpy_verts(mesh), numpy_triangles(mesh))
+        span["args"]["nnz"] = W.nnz
+    return W
+
+
+def pin_mesh_laplacian(
+    mesh: bmesh.types.BMesh,
+    L: sparray,
     vertices: np.ndarray,
-    L: coo_array,
+    pin: str,
+    feature_angle: float = FEATURE_ANGLE,
+    recorder: SpanRecorder = NO_SPANS,
+) -> sparray:
+    """
+    Pins the boundary and / or sharp-feature vertices of a mesh by folding them into its Laplacian, see pin_laplacian().
+
+    :param mesh: Mesh the Laplacian belongs to.
+    :param L: The Laplacian of the mesh (in mesh vertex order).
+    :param vertices: The vertex positions of the mesh, for the dihedral angles.
+    :param pin: One of the keys of PINS ("boundary", "features" or "boundary_and_features").
+    :param feature_angle: Dihedral angle in radians above which an edge is a sharp feature.
+    :param recorder: Records the time spent finding the pinned vertices and updating the Laplacian.
+    :return: The Laplacian with empty rows for the pinned vertices.
+    """
+    with recorder.span("pin_laplacian", pin=pin) as span:
+        pinned = pinned_vertices(
+            vertices, mesh_topology(mesh), pin, feature_angle
+        )
+        span["args"]["pinned"] = len(pinned)
+        return pin_laplacian(L, pinned)
+
+
+def build_region_laplacian(
+    data: bpy.types.Mesh,
+    weights: np.ndarray,
+    halo: int = 0,
+    laplacian: str = "combinatorial",
+    dtype: np.dtype = np.float64,
+    vertices: Optional[np.ndarray] = None,
+    pin: Optional[str] = None,
+    feature_angle: float = FEATURE_ANGLE,
+    recorder: SpanRecorder = NO_SPANS,
+) -> tuple[np.ndarray, np.ndarray, sparray, np.ndarray]:
+    """
+    Assembles the local Laplacian of a weighted region of a mesh datablock, equivalent to
+    localize_laplacian(build_laplacian(...), weights, halo), without a BMesh or the Laplacian of the whole mesh.
+
+    The rings are grown on the CSR neighbour arrays of read_topology(), and only the rows of the region (plus its halo)
+    are assembled from the edges (or triangles) around it, see region_laplacian().
+
+    :param data: The mesh datablock the region belongs to.
+    :param weights: Per-vertex smoothing weights as a numpy array of shape [n], e.g. 1 for selected vertices.
+    :param halo: Number of rings around the region which are smoothed with falling-off weights.
+    :param laplacian: Which Laplacian to smooth with, one of the keys of LAPLACIANS.
+    :param dtype: Floating point type of the stored values.
+    :param vertices: The vertex positions as an Nx3 numpy array, which the cotangent weights and sharp features
+                     depend on, read from `data` when needed and not given.
+    :param pin: Optional vertices to keep in place, one of the keys of PINS, see pin_mesh_laplacian().
+    :param feature_angle: Dihedral angle in radians above which an edge is a sharp feature, when pinning features.
+    :param recorder: Records the time spent reading the topology and assembling the rows.
+    :return: A tuple (active, boundary, L_local, active_weights), see localize_laplacian().
+    """
+    if laplacian not in LAPLACIANS:
+        raise ValueError(
+            f"Unknown Laplacian '{laplacian}', expected one of {list(LAPLACIANS)}"
+        )
+    with recorder.span("read_topology", verts=len(data.vertices)):
+        topology = read_topology(data)
+    if vertices is None and (laplacian == "cotangent" or pin is not None):
+        with recorder.span("read_coordinates", verts=len(data.vertices)):
+            vertices = read_coordinates(data)
+    with recorder.span("grow_region", halo=halo) as span:
+        active, active_weights = grow_region(
+            topology.adjacency(np.int8), weights, halo
+        )
+        span["args"]["active_verts"] = len(active)
+    with recorder.span("region_laplacian", laplacian=laplacian) as span:
+        if laplacian == "combinatorial":
+            boundary, L_local = region_laplacian(
+                active, topology.edges, topology.num_verts, dtype=dtype
+            )
+        else:
+            boundary, L_local = region_laplacian(
+                active,
+                read_triangles(data),
+                topology.num_verts,
+                vertices,
+                dtype,
+            )
+        span["args"]["nnz"] = L_local.nnz
+    if pin is not None:
+        with recorder.span("pin_laplacian", pin=pin) as span:
+            pinned = pinned_vertices(vertices, topology, pin, feature_angle)
+            span["args"]["pinned"] = len(pinned)
+            L_local = pin_laplacian(
+                L_local, np.flatnonzero(np.isin(active, pinned))
+            )
+    return active, boundary, L_local, active_weights
+
+
+def spectral_smooth(
+    mesh: bmesh.types.BMesh,
     tau: float,
-) -> np.ndarray:
+    iterations: int,
+    eigenvectors: int = 100,
+    laplacian: str = "combinatorial",
+    mu: Optional[float] = None,
+    recorder: SpanRecorder = NO_SPANS,
+) -> bmesh.types.BMesh:
     """
-    Performs smoothing of a list of vertices given a combinatorial Laplace matrix and a weight Tau.
+    Performs the equivalent of `iterations` explicit Laplace (or Taubin) steps in the mesh's spectral basis.
 
-    Updates are computed using the laplacian matrix and then weighted by Tau before subtracting from the vertices.
+    The lowest `eigenvectors` frequencies of the Laplacian are cached per topology (see cached_spectral_basis()),
+    so smoothing the same mesh again with other settings only costs a projection and a reconstruction.
+
+    :param mesh: Mesh to smooth.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations.
+    :param eigenvectors: Number of eigenvectors of the basis, higher frequencies are removed.
+    :param laplacian: Which Laplacian to smooth with, one of the keys of LAPLACIANS.
+    :param mu: Optional negative step factor, which turns every iteration into a Taubin step pair.
+    :param recorder: Records the time spent in every stage.
+    :return: The smoothed mesh.
+    """
+    basis = cached_spectral_basis(
+        build_laplacian_weights(mesh, laplacian, recorder),
+        eigenvectors,
+        recorder=recorder,
+    )
+    smoother = SpectralSmoother(
+        numpy_verts(mesh), basis, tau, iterations, recorder=recorder, mu=mu
+    )
+    return set_verts(mesh, smoother.run())
 
-        x = x - tau * L @ x
 
-    :param vertices: Vertices to apply offsets to as an Nx3 numpy array.
-    :param L: The NxN sparse laplacian matrix
-    :param tau: Update weight, tau=0 leaves the vertices unchanged, and tau=1 applies the full update.
-    :return: The new positions of the vertices as an Nx3 numpy array.
+def multigrid_laplace_smooth(
+    mesh: bmesh.types.BMesh,
+    tau: float,
+    iterations: int,
+    cycles: int = 3,
+    laplacian: str = "combinatorial",
+    recorder: SpanRecorder = NO_SPANS,
+) -> bmesh.types.BMesh:
     """
-    vertices_x = vertices[:, 0]
-    vertices_y = vertices[:, 1]
-    vertices_z = vertices[:, 2]
-    vertices_x = vertices_x - tau * L @ vertices_x
-    vertices_y = vertices_y - tau * L @ vertices_y
-    vertices_z = vertices_z - tau * L @ vertices_z
-    vertices = np.column_stack((vertices_x, vertices_y, vertices_z))
-    return vertices
+    Smooths a mesh for as long as `iterations` explicit Laplace steps, with an implicit step solved by multigrid.
+
+    Solves (I + tau * iterations * L) X = X_0 with a few V-cycles on a hierarchy built from the mesh's graph,
+    see MultigridSmoother. Every cycle costs a handful of products with the Laplacian, independent of `iterations`,
+    so large-scale bumps are removed at a fraction of the products explicit smoothing needs.
+
+    :param mesh: Mesh to smooth.
+    :param tau: Update weight of the equivalent explicit smoothing.
+    :param iterations: Number of iterations of the equivalent explicit smoothing.
+    :param cycles: Number of V-cycles, every cycle reduces the error of the solution by a roughly constant factor.
+    :param laplacian: Which Laplacian to smooth with, one of the keys of LAPLACIANS.
+    :param recorder: Records the time spent in every stage.
+    :return: The smoothed mesh.
+    """
+    hierarchy = MultigridHierarchy(
+        build_laplacian_weights(mesh, laplacian, recorder), recorder=recorder
+    )
+    smoother = MultigridSmoother(
+        numpy_verts(mesh),
+        hierarchy,
+        tau * iterations,
+        cycles,
+        recorder=recorder,
+    )
+    return set_verts(mesh, smoother.run())
+
+
+def iterative_localized_laplace_smooth(
+    mesh: bmesh.types.BMesh,
+    tau: float,
+    iterations: int,
+    weights: np.ndarray,
+    halo: int = 0,
+    laplacian: str = "combinatorial",
+    dtype: np.dtype = np.float64,
+    recorder: SpanRecorder = NO_SPANS,
+) -> bmesh.types.BMesh:
+    """
+    Performs iterative explicit Laplace smoothing restricted to a weighted region of a mesh.
+
+    The mesh is copied to a temporary datablock once, to read its topology (and triangles) in bulk,
+    but only the rows of the region (plus its halo) are assembled, see build_region_laplacian(),
+    and only the coordinates of the region and its boundary are read, iterated and written back,
+    see localized_explicit_laplace_smooth().
+
+    :param mesh: Mesh to smooth.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations to perform.
+    :param weights: Per-vertex smoothing weights as a numpy array of shape [n], e.g. 1 for selected vertices.
+    :param halo: Number of rings around the region which are smoothed with falling-off weights.
+    :param laplacian: Which Laplacian to smooth with, one of the keys of LAPLACIANS.
+    :param dtype: Floating point type used for the Laplacian and the coordinates during smoothing.
+    :param recorder: Records the time spent in every stage.
+    :return: A mesh with the updated coordinates after smoothing.
+    """
+    data = bpy.data.meshes.new("tmp")
+    mesh.to_mesh(data)
+    try:
+        active, boundary, L_local, active_weights = build_region_laplacian(
+            data, weights, halo, laplacian, dtype, recorder=recorder
+        )
+    finally:
+        bpy.data.meshes.remove(data)
+    with recorder.span("numpy_vert_subset", verts=len(active) + len(boundary)):
+        X = numpy_vert_subset(mesh, np.concatenate([active, boundary]), dtype)
+    with recorder.span("iterations", iterations=iterations, nnz=L_local.nnz):
+        X = localized_explicit_laplace_smooth(
+            X, L_local, active_weights, tau, iterations
+        )
+    with recorder.span("set_vert_subset", verts=len(active)):
+        set_vert_subset(mesh, active, X)
+    return mesh
 
 
 # !!! This function will be used for automatic grading, don't edit the signature !!!
@@ -131,24 +714,181 @@ def iterative_explicit_laplace_smooth(
     First, we define the coordinate vectors and the combinatorial Laplace matrix as numpy arrays.
     Then, we apply the smoothing operation as many times as iterations.
     We weight the updating vector in each iteration by tau.
+    See explicit_laplace_smooth_mesh() for the other Laplacians and options.
+
+    :param mesh: Mesh to smooth.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations to perform.
+    :return: A mesh with the updated coordinates after smoothing.
+    """
+    return explicit_laplace_smooth_mesh(mesh, tau, iterations)
+
+
+def explicit_laplace_smooth_mesh(
+    mesh: bmesh.types.BMesh,
+    tau: float,
+    iterations: int,
+    laplacian: str = "combinatorial",
+    dtype: np.dtype = np.float64,
+    recorder: SpanRecorder = NO_SPANS,
+    max_workers: Optional[int] = None,
+    pin: Optional[str] = None,
+    feature_angle: float = FEATURE_ANGLE,
+) -> bmesh.types.BMesh:
+    """
+    Performs iterative explicit Laplace smoothing of a given mesh, with a choice of Laplacian, precision and pinning.
+    This is the implementation behind iterative_explicit_laplace_smooth(), whose signature must stay as it is.
+
+    First, we define the coordinate vectors and the Laplace matrix as numpy arrays.
+    Then, we apply the smoothing operation as many times as iterations.
+    We weight the updating vector in each iteration by tau.
+    Meshes with several connected components (shells) are split into independent blocks,
+    which are smoothed in parallel (see component_blocks() and block_diagonal_smooth()).
 
     :param mesh: Mesh to smooth.
     :param tau: Update weight.
     :param iterations: Number of smoothing iterations to perform.
+    :param laplacian: Which Laplacian to smooth with, one of the keys of LAPLACIANS.
+    :param dtype: Floating point type used for the Laplacian and the coordinates during smoothing,
+                  numpy.float32 roughly halves the memory traffic of every iteration.
+    :param recorder: Records the time spent in every stage (reading, building the Laplacian, iterating, writing).
+    :param max_workers: Number of threads smoothing the components, defaults to the ThreadPoolExecutor default.
+    :param pin: Optional vertices to keep in place, one of the keys of PINS, see pin_mesh_laplacian().
+    :param feature_angle: Dihedral angle in radians above which an edge is a sharp feature, when pinning features.
     :return: A mesh with the updated coordinates after smoothing.
     """
 
     # Get coordinate vectors as numpy arrays
-    X = numpy_verts(mesh)
+    with recorder.span("numpy_verts", verts=len(mesh.verts)):
+        X = numpy_verts(mesh, dtype)
+
+    # Compute Laplace matrix
+    L = build_laplacian(mesh, laplacian, dtype, recorder)
+    if pin is not None:
+        L = pin_mesh_laplacian(mesh, L, X, pin, feature_angle, recorder)
 
-    # Compute combinatorial Laplace matrix
-    L = build_combinatorial_laplacian(mesh)
+    # Split the mesh into blocks of connected components, which never influence each other
+    with recorder.span("component_blocks") as span:
+        order, offsets = component_blocks(L)
+        span["args"]["blocks"] = len(offsets) - 1
 
     # Perform smoothing operations
-    for _ in range(iterations):
-        X = explicit_laplace_smooth(X, L, tau)
+    with recorder.span("iterations", iterations=iterations, nnz=L.nnz):
+        if len(offsets) > 2:
+            X = block_diagonal_smooth(
+                X,
+                L,
+                order,
+                offsets,
+                tau,
+                iterations,
+                max_workers=max_workers,
+                recorder=recorder,
+            )
+        else:
+            for _ in range(iterations):
+                with recorder.span("explicit_laplace_smooth"):
+                    X = explicit_laplace_smooth(X, L, tau)
 
     # Write smoothed vertices back to output mesh
-    set_verts(mesh, X)
+    with recorder.span("set_verts", verts=len(X)):
+        set_verts(mesh, X)
 
     return mesh
+
+
+def iterative_taubin_smooth(
+    mesh: bmesh.types.BMesh,
+    lam: float,
+    mu: float,
+    iterations: int,
+    laplacian: str = "combinatorial",
+    dtype: np.dtype = np.float64,
+    recorder: SpanRecorder = NO_SPANS,
+    max_workers: Optional[int] = None,
+    pin: Optional[str] = None,
+    feature_angle: float = FEATURE_ANGLE,
+) -> bmesh.types.BMesh:
+    """
+    Performs Taubin (lambda|mu) smoothing of a given mesh, which unlike explicit smoothing barely shrinks it.
+
+    Every iteration costs two products with the Laplacian, see taubin_smooth().
+    The connected components of the mesh are smoothed in parallel, see component_parallel_smooth().
+
+    :param mesh: Mesh to smooth.
+    :param lam: The positive step factor.
+    :param mu: The negative step factor, see taubin_mu().
+    :param iterations: Number of (shrinking and inflating) iteration pairs to perform.
+    :param laplacian: Which Laplacian to smooth with, one of the keys of LAPLACIANS.
+    :param dtype: Floating point type used for the Laplacian and the coordinates during smoothing.
+    :param recorder: Records the time spent in every stage.
+    :param max_workers: Number of threads smoothing the components, defaults to the ThreadPoolExecutor default.
+    :param pin: Optional vertices to keep in place, one of the keys of PINS, see pin_mesh_laplacian().
+    :param feature_angle: Dihedral angle in radians above which an edge is a sharp feature, when pinning features.
+    :return: A mesh with the updated coordinates after smoothing.
+    """
+    with recorder.span("numpy_verts", verts=len(mesh.verts)):
+        X = numpy_verts(mesh, dtype)
+    L = build_laplacian(mesh, laplacian, dtype, recorder)
+    if pin is not None:
+        L = pin_mesh_laplacian(mesh, L, X, pin, feature_angle, recorder)
+    with recorder.span("iterations", iterations=iterations, nnz=L.nnz):
+        X = component_parallel_smooth(
+            X,
+            L,
+            lam,
+            iterations,
+            mu=mu,
+            max_workers=max_workers,
+            recorder=recorder,
+        )
+    with recorder.span("set_verts", verts=len(X)):
+        set_verts(mesh, X)
+    return mesh
+
+
+def out_of_core_smooth_mesh(
+    data: bpy.types.Mesh,
+    tau: float,
+    iterations: int,
+    directory: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    mu: Optional[float] = None,
+    recorder: SpanRecorder = NO_SPANS,
+):
+    """
+    Smooths a mesh datablock with the combinatorial Laplacian, keeping the Laplacian and coordinates on disk.
+
+    The coordinates and edges are read straight into memory-mapped files (no BMesh or in-memory copies),
+    and smoothed in blocks of `chunk_size` rows, see out_of_core_laplace_smooth().
+    The files are removed again once the smoothed coordinates are written back.
+
+    :param data: The mesh datablock to smooth.
+    :param tau: Update weight.
+    :param iterations: Number of smoothing iterations to perform.
+    :param directory: Where to store the temporary files, defaults to the system's temporary directory.
+    :param chunk_size: Number of vertices (and edges) processed at once, which bounds the memory use.
+    :param mu: Optional negative step factor, which turns every iteration into a Taubin step pair.
+    :param recorder: Records the time spent in every stage.
+    """
+    num_verts, num_edges = len(data.vertices), len(data.edges)
+    with tempfile.TemporaryDirectory(dir=directory) as problem:
+        with recorder.span("read_coordinates", verts=num_verts):
+            vertices = create_array(
+                problem, VERTICES, (num_verts, 3), np.float32
+            )
+            data.vertices.foreach_get("co", vertices.reshape(-1))
+            vertices.flush()
+        with recorder.span("numpy_edges", edges=num_edges):
+            edges = create_array(problem, "edges", (num_edges, 2), np.int32)
+            data.edges.foreach_get("vertices", edges.reshape(-1))
+        with recorder.span("build_laplacian", laplacian="combinatorial"):
+            save_combinatorial_laplacian(
+                problem, num_verts, edges, np.float32, chunk_size
+            )
+        smoothed = out_of_core_laplace_smooth(
+            problem, tau, iterations, chunk_size, mu, recorder
+        )
+        with recorder.span("write_coordinates", verts=num_verts):
+            write_coordinates(data, smoothed)
+        del vertices, edges, smoothed
@@ -7,12 +7,40 @@ from .explicit_laplace_smoothing import (
 )
 from data import primitives, meshes
 import unittest
+import bpy
 import numpy as np
 from mathutils import Matrix, Vector
 from .explicit_laplace_smoothing import (
     iterative_explicit_laplace_smooth,
+    explicit_laplace_smooth_mesh,
     build_combinatorial_laplacian,
+    combinatorial_mesh_laplacian,
+    build_cotangent_laplacian,
+    build_mass_matrix,
+    iterative_localized_laplace_smooth,
+    localize_laplacian,
+    numpy_verts,
+    read_coordinates,
+    enclosed_volume,
+    iterative_taubin_smooth,
+    numpy_triangles,
+    out_of_core_smooth_mesh,
+    spectral_smooth,
+    multigrid_laplace_smooth,
+    quality_report,
+    adjacency_matrix,
+    component_parallel_smooth,
+    explicit_laplace_smooth,
+    mesh_topology,
+    mesh_fingerprint,
+    geodesic_weights,
+    taubin_mu,
+    DeltaCache,
+    SPECTRAL_BASES,
 )
+from ..core.deltas import SMOOTHING_DELTAS
+from ..core.profiling import SpanRecorder
+from .batch import SmoothingJob, apply_cached_delta, run_concurrently
 from data import primitives, meshes
 
 
@@ -24,3 +52,454 @@ class TestExplicitLaplaceSmoothing(unittest.TestCase):
         self.assertEqual(L.shape, (8, 8))
         self.assertTrue(L[0, 0] == 1)
         self.assertAlmostEqual(L[0, 1], -1 / 3)
+
+    def test_build_cotangent_laplacian_cube(self):
+        mesh = primitives.cube()
+        L = build_cotangent_laplacian(mesh)
+        self.assertEqual(L.shape, (8, 8))
+        self.assertAlmostEqual(L[0, 0], 1)
+        # Rows of a normalized Laplacian sum to zero
+        self.assertTrue(np.allclose(L.sum(axis=1), 0))
+
+    def test_cotangent_laplacian_matches_combinatorial_on_regular_grid(self):
+        # On the cube every vertex sees its three neighbours at right angles,
+        # so the cotangent weights reduce to uniform weights
+        mesh = primitives.cube()
+        L_cot = build_cotangent_laplacian(mesh).toarray()
+        L_comb = build_combinatorial_laplacian(mesh).toarray()
+        self.assertTrue(np.allclose(L_cot, L_comb))
+
+    def test_build_mass_matrix_area(self):
+        mesh = meshes.DOUBLE_TORUS
+        M = build_mass_matrix(mesh)
+        face_area = sum(face.calc_area() for face in mesh.faces)
+        self.assertAlmostEqual(M.diagonal().sum(), face_area, places=5)
+
+    def test_iterative_cotangent_smooth_keeps_shape(self):
+        mesh = primitives.uv_sphere()
+        before = numpy_verts(mesh)
+        smoothed = explicit_laplace_smooth_mesh(
+            mesh, 0.5, 5, laplacian="cotangent"
+        )
+        after = numpy_verts(smoothed)
+        self.assertEqual(after.shape, before.shape)
+        self.assertTrue(np.all(np.isfinite(after)))
+
+    def test_localized_smooth_only_moves_region(self):
+        mesh = primitives.uv_sphere()
+        before = numpy_verts(mesh)
+        weights = np.zeros(len(before))
+        weights[[10, 11, 12]] = 1.0
+        smoothed = iterative_localized_laplace_smooth(
+            mesh, 0.5, 3, weights, halo=0
+        )
+        after = numpy_verts(smoothed)
+        moved = np.flatnonzero(np.any(~np.isclose(before, after), axis=1))
+        self.assertTrue(set(moved) <= {10, 11, 12})
+
+    def test_localized_smooth_matches_full_smooth_step(self):
+        mesh = primitives.uv_sphere()
+        before = numpy_verts(mesh)
+        L = build_combinatorial_laplacian(mesh)
+        weights = np.zeros(len(before))
+        weights[[10, 11, 12]] = 1.0
+        smoothed = iterative_localized_laplace_smooth(
+            mesh, 0.5, 1, weights, halo=0
+        )
+        expected = before - 0.5 * (L @ before)
+        self.assertTrue(
+            np.allclose(
+                numpy_verts(smoothed)[[10, 11, 12]], expected[[10, 11, 12]]
+            )
+        )
+
+    def test_localize_laplacian_halo(self):
+        mesh = primitives.cube()
+        L = build_combinatorial_laplacian(mesh)
+        weights = np.zeros(8)
+        weights[0] = 1.0
+        active, boundary, L_local, active_weights = localize_laplacian(
+            L, weights, halo=1
+        )
+        # Vertex 0 and its three neighbours are smoothed, the three vertices two edges away stay fixed
+        self.assertEqual(len(active), 4)
+        self.assertEqual(len(boundary), 3)
+        self.assertEqual(L_local.shape, (4, 7))
+        self.assertTrue(np.allclose(active_weights, [1, 0.5, 0.5, 0.5]))
+
+    def test_concurrent_jobs_match_sequential_smoothing(self):
+        datablocks = []
+        for _ in range(4):
+            primitives.uv_sphere()
+            datablocks.append(bpy.context.object.data)
+        expected = numpy_verts(
+            iterative_explicit_laplace_smooth(primitives.uv_sphere(), 0.5, 5)
+        )
+
+        jobs = [SmoothingJob(data, 0.5, 5) for data in datablocks]
+        finished = []
+        failures = run_concurrently(
+            jobs, max_workers=2, progress=finished.append
+        )
+        self.assertEqual(failures, [])
+        self.assertEqual(finished, [1, 2, 3, 4])
+        for job in jobs:
+            job.apply()
+            co = np.zeros(len(job.data.vertices) * 3)
+            job.data.vertices.foreach_get("co", co)
+            self.assertTrue(np.allclose(co.reshape([-1, 3]), expected))
+
+    def test_job_steps_preview_and_restore(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        original = read_coordinates(data)
+
+        job = SmoothingJob(data, 0.5, 3)
+        self.assertEqual(job.step(2), 2)
+        self.assertFalse(job.done)
+        job.preview()
+        self.assertFalse(np.allclose(read_coordinates(data), original))
+        self.assertEqual(job.step(5), 1)
+        self.assertTrue(job.done)
+
+        job.restore()
+        self.assertTrue(np.allclose(read_coordinates(data), original))
+
+    def test_single_precision_laplacian_is_compact(self):
+        L = combinatorial_mesh_laplacian(meshes.DOUBLE_TORUS, np.float32)
+        self.assertEqual(L.dtype, np.float32)
+        self.assertEqual(L.indices.dtype, np.int32)
+        self.assertEqual(L.indptr.dtype, np.int32)
+
+    def test_single_precision_smoothing_error_bound(self):
+        # float32 has a unit roundoff of ~6e-8, each iteration adds a few roundoffs relative to the mesh extent
+        iterations = 50
+        for laplacian in ["combinatorial", "cotangent"]:
+            mesh = meshes.DOUBLE_TORUS.copy()
+            reference = numpy_verts(
+                explicit_laplace_smooth_mesh(
+                    mesh.copy(), 0.5, iterations, laplacian=laplacian
+                )
+            )
+            single = numpy_verts(
+                explicit_laplace_smooth_mesh(
+                    mesh.copy(),
+                    0.5,
+                    iterations,
+                    laplacian=laplacian,
+                    dtype=np.float32,
+                )
+            )
+            extent = np.linalg.norm(np.ptp(reference, axis=0))
+            error = np.abs(single - reference).max()
+            self.assertLess(error, iterations * 1e-6 * extent)
+
+    def test_profiled_smoothing_records_every_stage(self):
+        recorder = SpanRecorder()
+        explicit_laplace_smooth_mesh(
+            primitives.uv_sphere(), 0.5, 4, recorder=recorder
+        )
+        totals = recorder.totals()
+        for stage in [
+            "numpy_verts",
+            "numpy_edges",
+            "assemble_laplacian",
+            "build_laplacian",
+            "explicit_laplace_smooth",
+            "iterations",
+            "set_verts",
+        ]:
+            self.assertIn(stage, totals)
+        self.assertEqual(
+            sum(
+                span["name"] == "explicit_laplace_smooth"
+                for span in recorder.spans
+            ),
+            4,
+        )
+
+    def test_taubin_preserves_volume_better_than_explicit(self):
+        # At equal cost, i.e. one Taubin iteration per two explicit iterations
+        triangles = numpy_triangles(primitives.uv_sphere())
+        volume = enclosed_volume(
+            numpy_verts(primitives.uv_sphere()), triangles
+        )
+        explicit = numpy_verts(
+            iterative_explicit_laplace_smooth(primitives.uv_sphere(), 0.5, 20)
+        )
+        taubin = numpy_verts(
+            iterative_taubin_smooth(
+                primitives.uv_sphere(), 0.5, taubin_mu(0.5), 10
+            )
+        )
+        explicit_drift = abs(enclosed_volume(explicit, triangles) - volume)
+        taubin_drift = abs(enclosed_volume(taubin, triangles) - volume)
+        self.assertLess(taubin_drift, 0.1 * explicit_drift)
+
+    def test_components_are_smoothed_independently(self):
+        mesh = meshes.TWO_TORI.copy()
+        X = numpy_verts(mesh)
+        L = build_combinatorial_laplacian(mesh)
+        expected = X
+        for _ in range(5):
+            expected = explicit_laplace_smooth(expected, L, 0.5)
+        # One block per torus, smoothed on two threads
+        smoothed = component_parallel_smooth(
+            X, L, 0.5, 5, max_workers=2, min_block_size=1
+        )
+        self.assertTrue(np.allclose(smoothed, expected))
+        smoothed = numpy_verts(
+            iterative_explicit_laplace_smooth(meshes.TWO_TORI.copy(), 0.5, 5)
+        )
+        self.assertTrue(np.allclose(smoothed, expected))
+
+    def test_pinned_boundary_of_open_mesh(self):
+        mesh = meshes.HALF_TORUS.copy()
+        boundary = mesh_topology(mesh).boundary_vertices()
+        self.assertGreater(len(boundary), 0)
+        original = numpy_verts(mesh)
+        smoothed = numpy_verts(
+            explicit_laplace_smooth_mesh(mesh, 0.5, 10, pin="boundary")
+        )
+        self.assertTrue(np.array_equal(smoothed[boundary], original[boundary]))
+        self.assertFalse(np.allclose(smoothed, original))
+
+    def test_pinned_job_keeps_sharp_edges(self):
+        primitives.cube()
+        data = bpy.context.object.data
+        original = read_coordinates(data)
+        # Every cube vertex is on a sharp edge
+        job = SmoothingJob(data, 0.5, 10, pin="features")
+        self.assertTrue(
+            np.array_equal(job.run().smoother.coordinates(), original)
+        )
+
+    def test_out_of_core_smoothing_matches_in_memory_smoothing(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        expected = numpy_verts(
+            iterative_explicit_laplace_smooth(primitives.uv_sphere(), 0.5, 5)
+        )
+        out_of_core_smooth_mesh(data, 0.5, 5, chunk_size=100)
+        self.assertTrue(
+            np.allclose(read_coordinates(data), expected, atol=1e-5)
+        )
+
+    def test_reordered_job_matches_mesh_order(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        expected = SmoothingJob(data, 0.5, 5).run().smoother.coordinates()
+        for reorder in ["rcm", "morton"]:
+            job = SmoothingJob(data, 0.5, 5, reorder=reorder)
+            job.run().apply()
+            self.assertTrue(np.allclose(read_coordinates(data), expected))
+            job.restore()
+
+    def test_spectral_job_matches_iterated_job(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        SPECTRAL_BASES.clear()
+        for mu in [None, taubin_mu(0.5)]:
+            expected = (
+                SmoothingJob(data, 0.5, 5, mu=mu).run().smoother.coordinates()
+            )
+            # With (at least) as many eigenvectors as vertices, no frequency is dropped
+            job = SmoothingJob(
+                data, 0.5, 5, mu=mu, spectral=len(data.vertices)
+            )
+            self.assertTrue(
+                np.allclose(job.run().smoother.coordinates(), expected)
+            )
+        # The second job reused the basis of the first one
+        self.assertEqual(len(SPECTRAL_BASES), 1)
+
+    def test_spectral_smooth_removes_high_frequencies(self):
+        mesh = primitives.uv_sphere()
+        vertices = numpy_verts(mesh)
+        smoothed = numpy_verts(spectral_smooth(mesh, 0.5, 0, eigenvectors=1))
+        # Only the constant frequency is kept, i.e. every vertex collapses onto the mass-weighted centroid
+        self.assertTrue(np.allclose(smoothed, smoothed[0]))
+        self.assertLess(
+            np.linalg.norm(smoothed[0] - vertices.mean(axis=0)), 0.1
+        )
+
+    def test_multigrid_smooth_solves_implicit_step(self):
+        mesh = primitives.uv_sphere()
+        vertices = numpy_verts(mesh)
+        L = build_combinatorial_laplacian(mesh)
+        expected = np.linalg.solve(
+            np.eye(len(vertices)) + 5.0 * L.toarray(), vertices
+        )
+        smoothed = numpy_verts(
+            multigrid_laplace_smooth(mesh, 0.5, 10, cycles=8)
+        )
+        self.assertTrue(np.allclose(smoothed, expected, atol=1e-6))
+
+    def test_multigrid_job_counts_cycles(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        job = SmoothingJob(data, 0.5, 100, multigrid=3)
+        self.assertEqual(job.iterations, 3)
+        job.step(1)
+        self.assertEqual(job.completed, 1)
+        job.run().apply()
+        self.assertFalse(
+            np.allclose(read_coordinates(data), job.smoother.original)
+        )
+
+    def test_mesh_topology_matches_bmesh(self):
+        mesh = primitives.uv_sphere()
+        topology = mesh_topology(mesh)
+        self.assertEqual(len(topology.edges), len(mesh.edges))
+        self.assertEqual(topology.num_faces, len(mesh.faces))
+        self.assertEqual(len(topology.boundary_edges()), 0)
+        for vert in mesh.verts:
+            self.assertEqual(topology.degree[vert.index], len(vert.link_edges))
+            self.assertEqual(
+                set(topology.neighbours(vert.index).tolist()),
+                {edge.other_vert(vert).index for edge in vert.link_edges},
+            )
+        self.assertEqual(adjacency_matrix(mesh).nnz, 2 * len(mesh.edges))
+
+    def test_quality_report_of_job(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        report = quality_report(data)
+        self.assertGreater(report["edge_length_min"], 0)
+        self.assertEqual(report["degenerate_triangles"], 0)
+        job = SmoothingJob(data, 0.5, 10)
+        job.run()
+        smoothed = job.quality()
+        # Laplace smoothing shrinks the sphere, and every vertex moves less than the largest displacement
+        self.assertLess(smoothed["volume_change"], 0)
+        self.assertGreater(smoothed["displacement_max"], 0)
+        self.assertEqual(
+            quality_report(data, read_coordinates(data))["displacement_max"], 0
+        )
+
+    def test_cached_delta_restores_smoothed_mesh(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        cache = DeltaCache()
+        key = (mesh_fingerprint(data), 0.5, 10)
+        self.assertFalse(apply_cached_delta(data, key, cache))
+        job = SmoothingJob(data, 0.5, 10)
+        job.run().apply()
+        expected = read_coordinates(data)
+        self.assertTrue(
+            job.store_delta(key, cache, quantize=True, compress=True)
+        )
+        # The smoothed mesh has another fingerprint, the restored original the same one
+        self.assertNotEqual(mesh_fingerprint(data), key[0])
+        job.restore()
+        self.assertEqual(mesh_fingerprint(data), key[0])
+        self.assertTrue(apply_cached_delta(data, key, cache))
+        self.assertTrue(
+            np.allclose(read_coordinates(data), expected, atol=1e-4)
+        )
+
+    def test_geodesic_weights_fade_out(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        original = read_coordinates(data)
+        source = np.argmax(original[:, 2])
+        weights = geodesic_weights(data, [source], 1.0, "linear")
+        self.assertAlmostEqual(weights[source], 1.0)
+        # On the unit sphere, the geodesic distance from the pole grows with the polar angle
+        polar = np.arccos(np.clip(original[:, 2], -1, 1))
+        self.assertTrue(np.all(weights[polar > 1.2] == 0))
+        self.assertTrue(np.all(weights[polar < 0.8] > 0))
+        job = SmoothingJob(data, 0.5, 10, weights=lambda data: weights)
+        smoothed = job.run().smoother.coordinates()
+        self.assertTrue(
+            np.allclose(smoothed[weights == 0], original[weights == 0])
+        )
+        self.assertFalse(np.allclose(smoothed, original))
+
+
+class TestSmoothingOperators(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The operators are defined after this module is imported, see smoothing/__init__.py
+        from . import (
+            ClearSmoothingCache,
+            ExplicitLaplaceSmoothing,
+            ModalExplicitLaplaceSmoothing,
+        )
+
+        cls.registered = [
+            operator
+            for operator in (
+                ExplicitLaplaceSmoothing,
+                ModalExplicitLaplaceSmoothing,
+                ClearSmoothingCache,
+            )
+            if not operator.is_registered
+        ]
+        for operator in cls.registered:
+            bpy.utils.register_class(operator)
+
+    @classmethod
+    def tearDownClass(cls):
+        for operator in cls.registered:
+            bpy.utils.unregister_class(operator)
+
+    def test_operator_smooths_selected_mesh(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        expected = (
+            SmoothingJob(
+                data, 0.3, 4, laplacian="cotangent", mu=taubin_mu(0.3)
+            )
+            .run()
+            .smoother.coordinates()
+        )
+        result = bpy.ops.object.explicit_laplace_smoothing(
+            tau=0.3,
+            iterations=4,
+            laplacian="cotangent",
+            method="TAUBIN",
+            cache_results="OFF",
+        )
+        self.assertEqual(result, {"FINISHED"})
+        self.assertTrue(
+            np.allclose(read_coordinates(data), expected, atol=1e-5)
+        )
+
+    def test_result_cache_is_bounded_and_cleared(self):
+        primitives.uv_sphere()
+        SMOOTHING_DELTAS.clear()
+        bpy.ops.object.explicit_laplace_smoothing(tau=0.3, iterations=4)
+        # Caching is opt-in
+        self.assertEqual(len(SMOOTHING_DELTAS), 0)
+        bpy.ops.object.explicit_laplace_smoothing(
+            tau=0.3, iterations=4, cache_results="FLOAT", cache_budget=1
+        )
+        self.assertEqual(len(SMOOTHING_DELTAS), 1)
+        self.assertEqual(SMOOTHING_DELTAS.budget, 1 << 20)
+        self.assertEqual(bpy.ops.object.clear_smoothing_cache(), {"FINISHED"})
+        self.assertEqual(len(SMOOTHING_DELTAS), 0)
+
+    def test_modal_operator_registers_shared_properties(self):
+        primitives.uv_sphere()
+        data = bpy.context.object.data
+        # More iterations than the non-modal operator allows, so its own property has to win as well
+        expected = (
+            SmoothingJob(data, 0.3, 300, laplacian="cotangent")
+            .run()
+            .smoother.coordinates()
+        )
+        # Without a window there is no timer to run modally, so the operator is executed like a redo from the panel
+        result = bpy.ops.object.modal_explicit_laplace_smoothing(
+            "EXEC_DEFAULT",
+            tau=0.3,
+            iterations=300,
+            laplacian="cotangent",
+            time_budget=0.05,
+            cache_results="OFF",
+        )
+        self.assertEqual(result, {"FINISHED"})
+        self.assertTrue(
+            np.allclose(read_coordinates(data), expected, atol=1e-5)
+        )
@@ -0,0 +1,46 @@
+# Cost and size of the cached smoothing results, relative to smoothing again (see bench_smoothing.py)
+import numpy as np
+import pytest
+
+from assignment2.core.deltas import CoordinateDelta, coordinates_fingerprint
+from assignment2.core.laplacian import combinatorial_laplacian
+from assignment2.core.smoothing import LaplaceSmoother
+
+ENCODINGS = {
+    "float": dict(),
+    "quantized": dict(quantize=True),
+    "compressed": dict(compress=True),
+    "quantized-compressed": dict(quantize=True, compress=True),
+}
+
+
+@pytest.fixture
+def smoothed(mesh):
+    L = combinatorial_laplacian(len(mesh), mesh.edges)
+    return LaplaceSmoother(mesh.vertices, L, 0.5, 5).run()
+
+
+def test_mesh_fingerprint(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    original = mesh.vertices.astype(np.float32)
+    benchmark(coordinates_fingerprint, original, mesh.edges, mesh.triangles)
+
+
+@pytest.mark.parametrize("encoding", list(ENCODINGS))
+def test_store_delta(benchmark, mesh, smoothed, encoding):
+    delta = benchmark(
+        CoordinateDelta, mesh.vertices, smoothed, **ENCODINGS[encoding]
+    )
+    benchmark.extra_info["verts"] = len(mesh)
+    benchmark.extra_info["bytes"] = delta.nbytes
+    benchmark.extra_info["ratio"] = delta.nbytes / smoothed.nbytes
+
+
+@pytest.mark.parametrize("encoding", list(ENCODINGS))
+def test_apply_delta(benchmark, mesh, smoothed, encoding):
+    delta = CoordinateDelta(mesh.vertices, smoothed, **ENCODINGS[encoding])
+    benchmark.extra_info["verts"] = len(mesh)
+    restored = benchmark(delta.apply, mesh.vertices)
+    assert np.all(
+        np.abs(restored - smoothed).max(axis=0) <= delta.error + 1e-6
+    )
@@ -0,0 +1,24 @@
+# Cost of the heat method's one-off factorizations against a query from other sources,
+# which only costs two back-substitutions and a pass over the triangles
+import itertools
+
+import numpy as np
+
+from assignment2.core.geodesics import HeatGeodesics
+
+
+def test_heat_geodesics_factorize(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    benchmark.extra_info["triangles"] = len(mesh.triangles)
+    benchmark.pedantic(
+        HeatGeodesics, (mesh.vertices, mesh.triangles), rounds=3
+    )
+
+
+def test_heat_geodesics_query(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    geodesics = HeatGeodesics(mesh.vertices, mesh.triangles)
+    sources = np.random.default_rng(0).integers(len(mesh), size=(8, 1))
+    sources = itertools.cycle(sources.tolist())
+    distances = benchmark(lambda: geodesics.distances(next(sources)))
+    assert np.count_nonzero(distances == 0) >= 1
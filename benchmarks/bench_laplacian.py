@@ -0,0 +1,31 @@
+import numpy as np
+
+from assignment2.core.laplacian import (
+    combinatorial_laplacian,
+    cotangent_laplacian,
+    mass_matrix,
+)
+
+
+def test_combinatorial_laplacian(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    L = benchmark(combinatorial_laplacian, len(mesh), mesh.edges)
+    assert L.shape == (len(mesh), len(mesh))
+
+
+def test_combinatorial_laplacian_single(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    L = benchmark(combinatorial_laplacian, len(mesh), mesh.edges, np.float32)
+    assert L.dtype == np.float32
+
+
+def test_cotangent_laplacian(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    L = benchmark(cotangent_laplacian, mesh.vertices, mesh.triangles)
+    assert L.shape == (len(mesh), len(mesh))
+
+
+def test_mass_matrix(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    M = benchmark(mass_matrix, mesh.vertices, mesh.triangles)
+    assert M.shape == (len(mesh), len(mesh))
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from assignment2.core.planes import SquaredDistanceToPlanes
+
+PLANE_COUNTS = [10, 1_000, 100_000]
+
+
+def random_planes(
+    count: int, seed: int = 0
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-1, 1, (count, 3))
+    normals = rng.normal(size=(count, 3))
+    return list(
+        zip(points, normals / np.linalg.norm(normals, axis=-1, keepdims=True))
+    )
+
+
+@pytest.fixture(params=PLANE_COUNTS)
+def planes(request, max_size):
+    if request.param > max_size:
+        pytest.skip("more planes than --max-verts")
+    return random_planes(request.param)
+
+
+def test_construction(benchmark, planes):
+    benchmark.extra_info["planes"] = len(planes)
+    benchmark(SquaredDistanceToPlanes, planes)
+
+
+def test_from_arrays(benchmark, planes):
+    benchmark.extra_info["planes"] = len(planes)
+    points, normals = np.array(planes).transpose(1, 0, 2)
+    benchmark(SquaredDistanceToPlanes.from_arrays, points, normals)
+
+
+def test_load(benchmark, planes, tmp_path):
+    # Reloading a saved solver, compared to test_construction
+    benchmark.extra_info["planes"] = len(planes)
+    path = tmp_path / "planes.npz"
+    SquaredDistanceToPlanes(planes).save(path)
+    solver = benchmark(SquaredDistanceToPlanes.load, path)
+    assert len(solver.offsets) == len(planes)
+
+
+def test_query(benchmark, planes):
+    benchmark.extra_info["planes"] = len(planes)
+    solver = SquaredDistanceToPlanes(planes)
+    assert (
+        benchmark(solver.sum_of_squared_distances, np.array([0.1, 0.2, 0.3]))
+        >= 0
+    )
+
+
+def test_optimal_point(benchmark, planes):
+    benchmark.extra_info["planes"] = len(planes)
+    solver = SquaredDistanceToPlanes(planes)
+    assert benchmark(solver.optimal_point).shape == (3,)
+
+
+def test_robust_optimal_point(benchmark, planes):
+    benchmark.extra_info["planes"] = len(planes)
+    solver = SquaredDistanceToPlanes(planes)
+    assert benchmark(solver.optimal_point, "huber").shape == (3,)
+
+
+def test_nearest_planes(benchmark, planes):
+    # Labelling a point cloud with its nearest plane
+    points = np.random.default_rng(1).uniform(-1, 1, (1_000, 3))
+    benchmark.extra_info["planes"] = len(planes)
+    benchmark.extra_info["points"] = len(points)
+    solver = SquaredDistanceToPlanes(planes)
+    indices, _ = benchmark(solver.nearest_planes, points)
+    assert indices.shape == (len(points), 1)
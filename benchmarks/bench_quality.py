@@ -0,0 +1,14 @@
+# Cost of a full quality report, relative to a smoothing iteration (see bench_smoothing.py)
+import numpy as np
+
+from assignment2.core.quality import MeshQuality
+
+
+def test_mesh_quality(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    benchmark.extra_info["triangles"] = len(mesh.triangles)
+    original = mesh.vertices + 1e-3
+    # Per-iteration cost, the topology and the original volume are prepared once
+    measure = MeshQuality(mesh.edges, mesh.triangles, original)
+    report = benchmark(measure, mesh.vertices)
+    assert np.isfinite(report["volume_change"])
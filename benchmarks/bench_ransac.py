@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from assignment2.core.ransac import ransac_planes
+
+POINT_COUNTS = [100_000, 1_000_000, 4_000_000]
+NUM_PLANES = 5
+
+
+def scanned_planes(count: int, seed: int = 0) -> np.ndarray:
+    # Noisy samples of randomly oriented planes, plus 10% uniformly distributed outliers
+    rng = np.random.default_rng(seed)
+    per_plane = int(0.9 * count) // NUM_PLANES
+    clouds = [rng.uniform(-1, 1, (count - NUM_PLANES * per_plane, 3))]
+    for _ in range(NUM_PLANES):
+        basis = np.linalg.qr(rng.normal(size=(3, 3)))[0]
+        s, t, noise = rng.uniform(-1, 1, (3, per_plane, 1))
+        clouds.append(
+            rng.uniform(-0.5, 0.5, 3)
+            + s * basis[0]
+            + t * basis[1]
+            + 0.002 * noise * basis[2]
+        )
+    return np.concatenate(clouds)
+
+
+@pytest.fixture(params=POINT_COUNTS)
+def points(request, max_size):
+    if request.param > max_size:
+        pytest.skip("more points than --max-verts")
+    return scanned_planes(request.param)
+
+
+def test_ransac_planes(benchmark, points):
+    benchmark.extra_info["points"] = len(points)
+    planes, labels = benchmark(
+        ransac_planes,
+        points,
+        max_planes=NUM_PLANES,
+        min_inliers=len(points) // 100,
+        seed=0,
+    )
+    assert len(planes) == NUM_PLANES
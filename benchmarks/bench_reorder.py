@@ -0,0 +1,32 @@
+# Product throughput of the Laplacian of randomly numbered meshes, before and after renumbering the vertices
+import numpy as np
+import pytest
+
+from assignment2.core.laplacian import combinatorial_laplacian
+from assignment2.core.reorder import REORDERINGS, permute_laplacian
+from benchmarks.synthetic import scramble
+
+
+@pytest.mark.parametrize("reorder", [None, *REORDERINGS])
+def test_scrambled_product(benchmark, mesh, reorder):
+    vertices, _, edges = scramble(mesh.vertices, mesh.triangles, mesh.edges)
+    L = combinatorial_laplacian(len(vertices), edges)
+    if reorder is not None:
+        order = REORDERINGS[reorder](vertices, L)
+        vertices, L = vertices[order], permute_laplacian(L, order)
+    benchmark.extra_info["verts"] = len(mesh)
+    benchmark.extra_info["bandwidth"] = int(
+        np.abs(np.diff(L.nonzero(), axis=0)).max()
+    )
+    result = benchmark(L.__matmul__, vertices)
+    assert result.shape == vertices.shape
+
+
+@pytest.mark.parametrize("reorder", list(REORDERINGS))
+def test_reorder(benchmark, mesh, reorder):
+    # The one-off cost of computing the order, to weigh against the faster products
+    vertices, _, edges = scramble(mesh.vertices, mesh.triangles, mesh.edges)
+    L = combinatorial_laplacian(len(vertices), edges)
+    benchmark.extra_info["verts"] = len(mesh)
+    order = benchmark(REORDERINGS[reorder], vertices, L)
+    assert len(order) == len(vertices)
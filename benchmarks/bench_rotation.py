@@ -0,0 +1,32 @@
+import numpy as np
+
+from assignment2.core.rotation import (
+    angle_of_rotation,
+    axis_of_rotation,
+    rotation_component,
+)
+
+TRANSFORMATION = np.array(
+    [
+        [0.0, -2.0, 0.0, 1.0],
+        [2.0, 0.0, 0.0, 2.0],
+        [0.0, 0.0, 2.0, 3.0],
+        [0.0, 0.0, 0.0, 1.0],
+    ]
+)
+
+
+def test_rotation_component(benchmark):
+    assert benchmark(rotation_component, TRANSFORMATION).shape == (3, 3)
+
+
+def test_axis_of_rotation(benchmark):
+    assert np.allclose(
+        benchmark(axis_of_rotation, TRANSFORMATION[:3, :3]), [0, 0, 1]
+    )
+
+
+def test_angle_of_rotation(benchmark):
+    assert np.isclose(
+        benchmark(angle_of_rotation, TRANSFORMATION[:3, :3]), np.pi / 2
+    )
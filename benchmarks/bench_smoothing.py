@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from assignment2.core.laplacian import (
+    combinatorial_laplacian,
+    cotangent_laplacian,
+)
+from assignment2.core.smoothing import (
+    LaplaceSmoother,
+    explicit_laplace_smooth,
+    taubin_mu,
+)
+
+ITERATIONS = 10
+
+
+@pytest.mark.parametrize(
+    "dtype", [np.float64, np.float32], ids=["double", "single"]
+)
+def test_explicit_laplace_smooth(benchmark, mesh, dtype):
+    benchmark.extra_info["verts"] = len(mesh)
+    L = combinatorial_laplacian(len(mesh), mesh.edges, dtype)
+    X = mesh.vertices.astype(dtype)
+    result = benchmark(explicit_laplace_smooth, X, L, 0.5)
+    assert result.dtype == dtype
+
+
+def test_iterations_cotangent(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    benchmark.extra_info["iterations"] = ITERATIONS
+    L = cotangent_laplacian(mesh.vertices, mesh.triangles)
+    result = benchmark(
+        lambda: LaplaceSmoother(mesh.vertices, L, 0.5, ITERATIONS).run()
+    )
+    assert np.all(np.isfinite(result))
+
+
+def test_iterations_taubin(benchmark, mesh):
+    # Half the iterations of test_iterations_cotangent, i.e. the same number of sparse products
+    benchmark.extra_info["verts"] = len(mesh)
+    benchmark.extra_info["iterations"] = ITERATIONS // 2
+    L = cotangent_laplacian(mesh.vertices, mesh.triangles)
+    result = benchmark(
+        lambda: LaplaceSmoother(
+            mesh.vertices, L, 0.5, ITERATIONS // 2, mu=taubin_mu(0.5)
+        ).run()
+    )
+    assert np.all(np.isfinite(result))
+
+
+def test_iterations_localized(benchmark, mesh):
+    # A region of 1% of the mesh, the cost should scale with the region rather than the mesh
+    benchmark.extra_info["verts"] = len(mesh)
+    benchmark.extra_info["iterations"] = ITERATIONS
+    L = combinatorial_laplacian(len(mesh), mesh.edges)
+    weights = np.zeros(len(mesh))
+    weights[: max(1, len(mesh) // 100)] = 1.0
+    result = benchmark(
+        lambda: LaplaceSmoother(
+            mesh.vertices, L, 0.5, ITERATIONS, weights, halo=2
+        ).run()
+    )
+    assert result.shape == mesh.vertices.shape
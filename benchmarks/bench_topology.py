@@ -0,0 +1,40 @@
+# One-time cost of the array-backed topology, compared with assembling the adjacency matrix from the edges
+from assignment2.core.laplacian import edge_adjacency
+from assignment2.core.topology import MeshTopology
+
+
+def test_mesh_topology(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    benchmark.extra_info["triangles"] = len(mesh.triangles)
+    topology = benchmark(
+        MeshTopology.from_triangles, len(mesh), mesh.triangles
+    )
+    # The fan triangulation adds the diagonals of the bundled quad meshes
+    assert len(topology.edges) >= len(mesh.edges)
+
+
+def test_edge_adjacency(benchmark, mesh):
+    benchmark.extra_info["verts"] = len(mesh)
+    A = benchmark(lambda: edge_adjacency(len(mesh), mesh.edges).tocsr())
+    assert A.nnz == 2 * len(mesh.edges)
+
+
+def test_neighbour_queries(benchmark, mesh):
+    # Degree and neighbours of every 100th vertex, each an O(1) slice of the CSR arrays
+    topology = MeshTopology.from_triangles(len(mesh), mesh.triangles)
+    benchmark.extra_info["verts"] = len(mesh)
+    total = benchmark(
+        lambda: sum(
+            len(topology.neighbours(v)) - topology.degree[v]
+            for v in range(0, len(mesh), 100)
+        )
+    )
+    assert total == 0
+
+
+def test_feature_vertices(benchmark, mesh):
+    # Dihedral angles of every edge, e.g. for pinning sharp features while smoothing
+    topology = MeshTopology.from_triangles(len(mesh), mesh.triangles)
+    benchmark.extra_info["verts"] = len(mesh)
+    pinned = benchmark(topology.feature_vertices, mesh.vertices)
+    assert len(pinned) <= len(mesh)
@@ -0,0 +1,76 @@
+# Compares serial explicit smoothing with smoothing the connected components of a mesh in parallel blocks.
+# The input imitates a scan with many disjoint shells: one large torus plus many small ones.
+# Runs in plain Python (no Blender needed), e.g.
+# python benchmarks/components.py --size 500 --shells 2000 --shell-size 10 --workers 1 2 4
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from assignment2.core import (
+    LaplaceSmoother,
+    combinatorial_laplacian,
+    component_blocks,
+    component_parallel_smooth,
+)
+from benchmarks.synthetic import torus
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=500,
+        help="Resolution of the large torus, a size of s produces s * s vertices",
+    )
+    parser.add_argument("--shells", type=int, default=2000)
+    parser.add_argument("--shell-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--tau", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    vertices, _, edges = torus(args.size, args.size, noise=1e-3)
+    shell, _, shell_edges = torus(args.shell_size, args.shell_size, noise=1e-3)
+    count = len(vertices)
+    vertices = np.concatenate(
+        [vertices] + [shell + 3.0 * (i + 1) for i in range(args.shells)]
+    )
+    edges = np.concatenate(
+        [edges]
+        + [shell_edges + count + i * len(shell) for i in range(args.shells)]
+    )
+    L = combinatorial_laplacian(len(vertices), edges)
+
+    start = time.perf_counter()
+    _, offsets = component_blocks(L)
+    seconds = time.perf_counter() - start
+    print(
+        f"{len(vertices)} vertices in {args.shells + 1} components, "
+        f"{len(offsets) - 1} blocks, found in {seconds * 1000:.1f} ms"
+    )
+    print(f"{'method':>10}{'workers':>9}{'ms':>10}{'max. error':>12}")
+
+    start = time.perf_counter()
+    expected = LaplaceSmoother(vertices, L, args.tau, args.iterations).run()
+    seconds = time.perf_counter() - start
+    print(f"{'serial':>10}{'':>9}{seconds * 1000:>10.1f}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        smoothed = component_parallel_smooth(
+            vertices, L, args.tau, args.iterations, max_workers=workers
+        )
+        seconds = time.perf_counter() - start
+        error = np.abs(smoothed - expected).max()
+        print(
+            f"{'blocks':>10}{workers:>9}{seconds * 1000:>10.1f}{error:>12.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,81 @@
+# Shared fixtures of the benchmark suite, see the `bench` targets of the makefile.
+import os
+
+import numpy as np
+import pytest
+
+from assignment2.core.obj import face_edges, fan_triangulate, load_obj
+from benchmarks.synthetic import torus
+
+MESH_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "meshes"
+)
+
+BUNDLED_MESHES = [
+    "half-torus.obj",
+    "half-bagel-cut-torus.obj",
+    "bagel-cut-torus.obj",
+    "double-torus.obj",
+    "two-tori.obj",
+]
+
+# Resolution of the synthetic tori, a size of s produces s * s vertices
+SYNTHETIC_SIZES = [100, 316, 1000, 2000]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--max-verts", type=int, default=4_000_000,
+        help="Skip benchmark inputs with more vertices (or planes) than this",
+    )  # fmt: skip
+
+
+class Mesh(object):
+    """
+    A benchmark input: vertex positions with the edges and triangles of the mesh.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        vertices: np.ndarray,
+        edges: np.ndarray,
+        triangles: np.ndarray,
+    ):
+        self.name = name
+        self.vertices = vertices
+        self.edges = edges
+        self.triangles = triangles
+
+    def __len__(self):
+        return len(self.vertices)
+
+
+def load_mesh(name: str) -> Mesh:
+    if name in BUNDLED_MESHES:
+        vertices, faces = load_obj(os.path.join(MESH_DIR, name))
+        return Mesh(name, vertices, face_edges(faces), fan_triangulate(faces))
+    size = int(name.split("-")[1])
+    vertices, triangles, edges = torus(size, size, noise=1e-3)
+    return Mesh(name, vertices, edges, triangles)
+
+
+MESH_NAMES = BUNDLED_MESHES + [f"torus-{size}" for size in SYNTHETIC_SIZES]
+_meshes = {}
+
+
+@pytest.fixture(params=MESH_NAMES)
+def mesh(request) -> Mesh:
+    name = request.param
+    if name.startswith("torus-") and int(
+        name.split("-")[1]
+    ) ** 2 > request.config.getoption("--max-verts"):
+        pytest.skip(f"{name} has more than --max-verts vertices")
+    if name not in _meshes:
+        _meshes[name] = load_mesh(name)
+    return _meshes[name]
+
+
+@pytest.fixture
+def max_size(request) -> int:
+    return request.config.getoption("--max-verts")
@@ -0,0 +1,56 @@
+# Benchmarks the Laplacian builders on the bundled meshes.
+# This should be invoked with the following command line (or equivalent)
+# blender --background --python benchmarks/laplacian_build.py -- --repeat 10
+import argparse
+import os
+import sys
+import timeit
+
+# Blender will actually run this in another directory, so we need to make sure everything is available to import
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from assignment2.smoothing.explicit_laplace_smoothing import LAPLACIANS
+from data import meshes
+
+MESHES = {
+    "bagel-cut-torus.obj": meshes.BAGEL_CUT_TORUS,
+    "double-torus.obj": meshes.DOUBLE_TORUS,
+    "half-bagel-cut-torus.obj": meshes.HALF_BAGEL_CUT_TORUS,
+    "half-torus.obj": meshes.HALF_TORUS,
+    "two-tori.obj": meshes.TWO_TORI,
+}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=10,
+        help="Number of timed builds per mesh",
+    )
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'mesh':<26}{'verts':>8}"
+        + "".join(f"{name + ' [ms]':>22}" for name in LAPLACIANS)
+    )
+    for mesh_name, mesh in MESHES.items():
+        timings = [
+            min(
+                timeit.repeat(
+                    lambda: build(mesh), number=1, repeat=args.repeat
+                )
+            )
+            * 1000
+            for build in LAPLACIANS.values()
+        ]
+        print(
+            f"{mesh_name:<26}{len(mesh.verts):>8}"
+            + "".join(f"{t:>22.3f}" for t in timings)
+        )
+
+
+if __name__ == "__main__":
+    # Dealing with contested command line parameters, see test.py
+    main(sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else [])
@@ -0,0 +1,95 @@
+# Compares how much of a large-scale bump explicit smoothing and multigrid (implicit) smoothing remove, per cost.
+# Both methods are linear, so smoothing the bumpy torus minus smoothing the clean torus is what is left of the bumps.
+# Runs in plain Python (no Blender needed), e.g.
+# python benchmarks/multigrid.py --size 300 --iterations 100 1000 --cycles 1 2 3
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from assignment2.core import (
+    LaplaceSmoother,
+    combinatorial_laplacian,
+    edge_adjacency,
+)
+from assignment2.core.multigrid import MultigridHierarchy, MultigridSmoother
+from benchmarks.synthetic import torus
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=300,
+        help="Torus resolution, a size of s produces s * s vertices",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        nargs="+",
+        default=[100, 1000],
+        help="Explicit iterations, multigrid smooths for the same time",
+    )
+    parser.add_argument("--cycles", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--tau", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    clean, _, edges = torus(args.size, args.size)
+    # Five bumps around the torus and three around its tube, plus a little high-frequency noise
+    u = np.arctan2(clean[:, 1], clean[:, 0])
+    bumps = 0.02 * np.sin(5 * u) * np.sin(3 * np.arctan2(clean[:, 2], 1))
+    bumpy = clean + bumps[:, None] * clean / np.linalg.norm(
+        clean, axis=1, keepdims=True
+    )
+    bumpy += np.random.default_rng(0).normal(0, 1e-3, clean.shape)
+
+    def remaining(smooth) -> float:
+        # RMS of the smoothed displacement, relative to the RMS of the original displacement
+        smoothed = smooth(bumpy) - smooth(clean)
+        return np.sqrt(np.mean(smoothed**2) / np.mean((bumpy - clean) ** 2))
+
+    L = combinatorial_laplacian(len(clean), edges)
+    start = time.perf_counter()
+    hierarchy = MultigridHierarchy(edge_adjacency(len(clean), edges))
+    seconds = time.perf_counter() - start
+    print(
+        f"{len(clean)} vertices, τ={args.tau}, levels {hierarchy.sizes}, "
+        f"built in {seconds * 1000:.1f} ms"
+    )
+    print(
+        f"{'method':>10}{'iterations':>12}{'cycles':>8}{'products':>10}"
+        f"{'ms':>10}{'remaining':>11}"
+    )
+    for iterations in args.iterations:
+        start = time.perf_counter()
+        left = remaining(
+            lambda X: LaplaceSmoother(X, L, args.tau, iterations).run()
+        )
+        seconds = (time.perf_counter() - start) / 2
+        print(
+            f"{'explicit':>10}{iterations:>12}{'':>8}{iterations:>10}"
+            f"{seconds * 1000:>10.1f}{left:>11.2%}"
+        )
+        for cycles in args.cycles:
+            start = time.perf_counter()
+            left = remaining(
+                lambda X: MultigridSmoother(
+                    X, hierarchy, args.tau * iterations, cycles
+                ).run()
+            )
+            seconds = (time.perf_counter() - start) / 2
+            # Two Jacobi sweeps before and after the coarse correction, and the residual
+            products = 5 * cycles
+            print(
+                f"{'multigrid':>10}{iterations:>12}{cycles:>8}{products:>10}"
+                f"{seconds * 1000:>10.1f}{left:>11.2%}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,84 @@
+# Measures how the chunk size of out-of-core smoothing bounds its memory use, compared to smoothing in memory.
+# Peak memory is the tracemalloc peak of NumPy / SciPy allocations, memory-mapped pages are left to the OS page cache.
+# Runs in plain Python (no Blender needed), e.g.
+# python benchmarks/out_of_core.py --size 1000 --chunk-sizes 10000 100000 1000000
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from assignment2.core import (
+    VERTICES,
+    LaplaceSmoother,
+    SpanRecorder,
+    combinatorial_laplacian,
+    out_of_core_laplace_smooth,
+    save_combinatorial_laplacian,
+    write_array,
+)
+from benchmarks.synthetic import torus
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=1000,
+        help="Torus resolution, a size of s produces s * s vertices",
+    )
+    parser.add_argument(
+        "--chunk-sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+    )
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument(
+        "--directory", help="Where to store the files, defaults to /tmp"
+    )
+    args = parser.parse_args(argv)
+
+    vertices, _, edges = torus(args.size, args.size, noise=1e-3)
+    vertices = vertices.astype(np.float32)
+    print(f"{len(vertices)} vertices, {args.iterations} iterations")
+    print(f"{'chunk size':>12}{'peak [MB]':>11}{'s':>8}{'max. error':>12}")
+
+    recorder = SpanRecorder(allocations=True)
+    with recorder.span("in_memory") as span:
+        start = time.perf_counter()
+        L = combinatorial_laplacian(len(vertices), edges, np.float32)
+        expected = LaplaceSmoother(vertices, L, 0.5, args.iterations).run()
+        seconds = time.perf_counter() - start
+    print(
+        f"{'in memory':>12}{span['args']['peak_bytes'] / 2 ** 20:>11.1f}{seconds:>8.2f}"
+    )
+    del L
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        write_array(directory, VERTICES, vertices)
+        for chunk_size in args.chunk_sizes:
+            with recorder.span("out_of_core", chunk_size=chunk_size) as span:
+                start = time.perf_counter()
+                save_combinatorial_laplacian(
+                    directory, len(vertices), edges, np.float32, chunk_size
+                )
+                smoothed = out_of_core_laplace_smooth(
+                    directory, 0.5, args.iterations, chunk_size
+                )
+                seconds = time.perf_counter() - start
+            error = np.abs(smoothed - expected).max()
+            print(
+                f"{chunk_size:>12}{span['args']['peak_bytes'] / 2 ** 20:>11.1f}"
+                f"{seconds:>8.2f}{error:>12.2e}"
+            )
+            del smoothed
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+# Compares the memory footprint, throughput and accuracy of double and single precision smoothing.
+# Runs in plain Python (no Blender needed), e.g.
+# python benchmarks/precision.py --sizes 100 1000 2000
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from assignment2.core import (
+    combinatorial_laplacian,
+    explicit_laplace_smooth,
+)
+from benchmarks.synthetic import torus
+
+
+def nbytes(L, X) -> int:
+    return L.data.nbytes + L.indices.nbytes + L.indptr.nbytes + X.nbytes
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 1000, 2000],
+        help="Torus resolutions, a size of s produces s * s vertices",
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'verts':>10}{'precision':>11}{'memory [MB]':>14}{'ms / iteration':>16}{'Mverts / s':>12}{'rel. error':>12}"
+    )
+    for size in args.sizes:
+        vertices, _, edges = torus(size, size, noise=1e-3)
+        reference = None
+        for dtype in [np.float64, np.float32]:
+            L = combinatorial_laplacian(len(vertices), edges, dtype)
+            X = vertices.astype(dtype)
+
+            def smooth():
+                Y = X
+                for _ in range(args.iterations):
+                    Y = explicit_laplace_smooth(Y, L, 0.5)
+                return Y
+
+            seconds = (
+                min(timeit.repeat(smooth, number=1, repeat=3))
+                / args.iterations
+            )
+            result = smooth()
+            if reference is None:
+                reference = result
+            error = np.abs(result - reference).max() / np.linalg.norm(
+                np.ptp(reference, axis=0)
+            )
+            print(
+                f"{len(vertices):>10}{np.dtype(dtype).name:>11}{nbytes(L, X) / 2 ** 20:>14.1f}"
+                f"{seconds * 1000:>16.3f}{len(vertices) / seconds / 1e6:>12.1f}{error:>12.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,145 @@
+# Load generator for the mesh job server (serve.py): latency percentiles and throughput of smoothing requests
+# under a growing number of concurrent clients, plus the cold first request and plane fitting requests.
+# The server runs in its own process, like it does for the pipeline tools. Runs in plain Python, e.g.
+# python benchmarks/server.py --size 316 --clients 1 2 4 8 --requests 20 --workers 4
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from assignment2.core.server import MeshJobClient
+from benchmarks.synthetic import torus
+
+
+async def wait_for_server(path: str, process: subprocess.Popen):
+    while not os.path.exists(path):
+        if process.poll() is not None:
+            raise RuntimeError("The server exited during startup")
+        await asyncio.sleep(0.05)
+
+
+async def client_requests(path, vertices, edges, args) -> list[float]:
+    client = await MeshJobClient.connect(path)
+    try:
+        # All clients upload the same topology, so they share its Laplacian
+        topology = await client.upload_topology(len(vertices), edges)
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            await client.smooth(vertices, topology, args.tau, args.iterations)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    finally:
+        await client.close()
+
+
+def report(label: str, latencies: list[float], seconds: float):
+    milliseconds = 1000 * np.asarray(latencies)
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+    print(
+        f"{label:>16}{len(latencies):>10}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}"
+        f"{len(latencies) / seconds:>12.1f}"
+    )
+
+
+async def run(path: str, args):
+    vertices, _, edges = torus(args.size, args.size, noise=1e-3)
+    print(
+        f"{len(vertices)} vertices, {args.iterations} iterations per request, "
+        f"{vertices.nbytes / 2**20:.1f} MiB each way"
+    )
+    print(
+        f"{'clients':>16}{'requests':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'requests/s':>12}"
+    )
+
+    # The first request uploads the topology and builds the Laplacian
+    client = await MeshJobClient.connect(path)
+    start = time.perf_counter()
+    topology = await client.upload_topology(len(vertices), edges)
+    await client.smooth(vertices, topology, args.tau, args.iterations)
+    seconds = time.perf_counter() - start
+    report("cold", [seconds], seconds)
+
+    for clients in args.clients:
+        start = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(
+                client_requests(path, vertices, edges, args)
+                for _ in range(clients)
+            )
+        )
+        report(
+            str(clients),
+            [latency for client in latencies for latency in client],
+            time.perf_counter() - start,
+        )
+
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(args.planes, 3))
+    normals = rng.normal(size=(args.planes, 3))
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        request = time.perf_counter()
+        await client.optimal_point(points, normals)
+        latencies.append(time.perf_counter() - request)
+    report(f"{args.planes} planes", latencies, time.perf_counter() - start)
+
+    stats = await client.statistics()
+    await client.close()
+    for name, operation in stats["operations"].items():
+        print(
+            f"server {name}: {operation['count']} requests, "
+            f"{1000 * operation['waiting'] / operation['count']:.2f} ms waiting, "
+            f"{1000 * operation['computing'] / operation['count']:.2f} ms computing on average"
+        )
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=316,
+        help="Resolution of the torus, a size of s produces s * s vertices",
+    )
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--tau", type=float, default=0.5)
+    parser.add_argument("--planes", type=int, default=1000)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Threads of the server"
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.sock")
+        command = [
+            sys.executable,
+            os.path.join(ROOT, "serve.py"),
+            "--socket",
+            path,
+        ]
+        if args.workers is not None:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_for_server(path, server))
+            asyncio.run(run(path, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
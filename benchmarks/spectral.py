@@ -0,0 +1,91 @@
+# Compares spectral smoothing with iterated explicit smoothing over a sweep of filter settings on the same mesh.
+# The spectral basis is computed once (the "basis" row), then every setting only costs a projection and a reconstruction.
+# Runs in plain Python (no Blender needed), e.g.
+# python benchmarks/spectral.py --size 200 --eigenvectors 50 100 --iterations 10 100 1000
+import argparse
+import os
+import sys
+import time
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from assignment2.core import (
+    LaplaceSmoother,
+    combinatorial_laplacian,
+    edge_adjacency,
+)
+from assignment2.core.spectral import SpectralBasis, SpectralSmoother
+from benchmarks.conftest import load_mesh
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=200,
+        help="Torus resolution, a size of s produces s * s vertices",
+    )
+    parser.add_argument(
+        "--eigenvectors", type=int, nargs="+", default=[50, 100]
+    )
+    parser.add_argument(
+        "--iterations", type=int, nargs="+", default=[10, 100, 1000]
+    )
+    parser.add_argument("--tau", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    mesh = load_mesh(f"torus-{args.size}")
+    L = combinatorial_laplacian(len(mesh), mesh.edges)
+    W = edge_adjacency(len(mesh), mesh.edges)
+    print(f"{len(mesh)} vertices, τ={args.tau}")
+    print(
+        f"{'method':>10}{'k':>6}{'iterations':>12}{'ms':>10}{'max. error':>12}"
+    )
+
+    expected = {}
+    for iterations in args.iterations:
+        seconds = min(
+            timeit.repeat(
+                lambda: LaplaceSmoother(
+                    mesh.vertices, L, args.tau, iterations
+                ).run(),
+                number=1,
+                repeat=3,
+            )
+        )
+        expected[iterations] = LaplaceSmoother(
+            mesh.vertices, L, args.tau, iterations
+        ).run()
+        print(
+            f"{'iterated':>10}{'':>6}{iterations:>12}{seconds * 1000:>10.1f}"
+        )
+
+    for k in args.eigenvectors:
+        start = time.perf_counter()
+        basis = SpectralBasis(W, k)
+        seconds = time.perf_counter() - start
+        print(f"{'basis':>10}{k:>6}{'':>12}{seconds * 1000:>10.1f}")
+        for iterations in args.iterations:
+            seconds = min(
+                timeit.repeat(
+                    lambda: SpectralSmoother(
+                        mesh.vertices, basis, args.tau, iterations
+                    ).run(),
+                    number=1,
+                    repeat=3,
+                )
+            )
+            X = SpectralSmoother(mesh.vertices, basis, args.tau, iterations)
+            error = np.abs(X.run() - expected[iterations]).max()
+            print(
+                f"{'spectral':>10}{k:>6}{iterations:>12}"
+                f"{seconds * 1000:>10.1f}{error:>12.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
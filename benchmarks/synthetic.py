@@ -0,0 +1,75 @@
+import numpy as np
+
+
+def torus(
+    major_segments: int,
+    minor_segments: int,
+    major_radius: float = 1.0,
+    minor_radius: float = 0.25,
+    noise: float = 0.0,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Generates a triangulated torus of arbitrary resolution, for benchmarking beyond the size of the bundled meshes.
+
+    :param major_segments: Number of vertex rings around the main axis.
+    :param minor_segments: Number of vertices per ring.
+    :param major_radius: Distance from the centre of the torus to the centre of the tube.
+    :param minor_radius: Radius of the tube.
+    :param noise: Standard deviation of the gaussian noise added to the vertex positions.
+    :param seed: Seed for the noise.
+    :return: A tuple (vertices, triangles, edges) of Nx3, Tx3 and Ex2 numpy arrays.
+    """
+    u, v = np.meshgrid(
+        np.linspace(0, 2 * np.pi, major_segments, endpoint=False),
+        np.linspace(0, 2 * np.pi, minor_segments, endpoint=False),
+        indexing="ij",
+    )
+    ring = major_radius + minor_radius * np.cos(v)
+    vertices = np.stack(
+        [ring * np.cos(u), ring * np.sin(u), minor_radius * np.sin(v)], axis=-1
+    ).reshape([-1, 3])
+    vertices += np.random.default_rng(seed).normal(0, noise, vertices.shape)
+
+    index = np.arange(major_segments * minor_segments, dtype=np.int32).reshape(
+        [major_segments, minor_segments]
+    )
+    a = index
+    b = np.roll(index, -1, axis=0)
+    c = np.roll(np.roll(index, -1, axis=0), -1, axis=1)
+    d = np.roll(index, -1, axis=1)
+    triangles = np.concatenate(
+        [
+            np.stack([a, b, c], axis=-1).reshape([-1, 3]),
+            np.stack([a, c, d], axis=-1).reshape([-1, 3]),
+        ]
+    )
+    edges = np.concatenate(
+        [
+            np.stack([a, b], axis=-1).reshape([-1, 2]),
+            np.stack([a, d], axis=-1).reshape([-1, 2]),
+            np.stack([a, c], axis=-1).reshape([-1, 2]),
+        ]
+    )
+    return vertices, triangles, edges
+
+
+def scramble(
+    vertices: np.ndarray,
+    triangles: np.ndarray,
+    edges: np.ndarray,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Randomly renumbers the vertices of a mesh, like the vertex order of merged or unstructured scan data.
+
+    :param vertices: Vertex positions as an Nx3 numpy array.
+    :param triangles: Triangle vertex indices as a Tx3 numpy array.
+    :param edges: Edge vertex indices as an Ex2 numpy array.
+    :param seed: Seed for the permutation.
+    :return: The renumbered (vertices, triangles, edges).
+    """
+    order = np.random.default_rng(seed).permutation(len(vertices))
+    new_index = np.empty_like(order)
+    new_index[order] = np.arange(len(order))
+    return vertices[order], new_index[triangles], new_index[edges]
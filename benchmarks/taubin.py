@@ -0,0 +1,89 @@
+# Compares the volume drift and run time of explicit and Taubin smoothing at equal cost,
+# i.e. two explicit iterations per Taubin iteration (both do two sparse products).
+# Runs in plain Python (no Blender needed), e.g.
+# python benchmarks/taubin.py --sizes 100 1000 --iterations 10 50
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from assignment2.core import (
+    LaplaceSmoother,
+    combinatorial_laplacian,
+    enclosed_volume,
+    taubin_mu,
+)
+from benchmarks.conftest import load_mesh
+
+
+def roughness(L, X) -> float:
+    # Mean length of the Laplace coordinates, i.e. how far vertices are from their neighbours' centroid
+    return np.linalg.norm(L @ X, axis=1).mean()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 316],
+        help="Torus resolutions, a size of s produces s * s vertices",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        nargs="+",
+        default=[10, 50, 200],
+        help="Taubin iterations, explicit smoothing runs twice as many",
+    )
+    parser.add_argument("--tau", type=float, default=0.5)
+    parser.add_argument("--pass-band", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    names = ["double-torus.obj", "two-tori.obj"] + [
+        f"torus-{size}" for size in args.sizes
+    ]
+    mu = taubin_mu(args.tau, args.pass_band)
+    print(f"λ={args.tau}, μ={mu:.4f}")
+    print(
+        f"{'mesh':>18}{'verts':>10}{'products':>10}{'method':>10}"
+        f"{'volume drift':>14}{'roughness':>11}{'ms':>10}"
+    )
+    for name in names:
+        mesh = load_mesh(name)
+        L = combinatorial_laplacian(len(mesh), mesh.edges)
+        volume = enclosed_volume(mesh.vertices, mesh.triangles)
+        noise = roughness(L, mesh.vertices)
+        for iterations in args.iterations:
+            for method, smoother in [
+                (
+                    "explicit",
+                    lambda: LaplaceSmoother(
+                        mesh.vertices, L, args.tau, 2 * iterations
+                    ),
+                ),
+                (
+                    "taubin",
+                    lambda: LaplaceSmoother(
+                        mesh.vertices, L, args.tau, iterations, mu=mu
+                    ),
+                ),
+            ]:
+                seconds = min(
+                    timeit.repeat(lambda: smoother().run(), number=1, repeat=3)
+                )
+                X = smoother().run()
+                drift = enclosed_volume(X, mesh.triangles) / volume - 1
+                print(
+                    f"{name:>18}{len(mesh):>10}{2 * iterations:>10}{method:>10}"
+                    f"{drift:>+14.2%}{roughness(L, X) / noise:>11.3f}{seconds * 1000:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,61 @@
+# Installs the packages of requirements.txt into the running Python (e.g. Blender's own copy), but only when needed.
+# pip.main() touches the network and takes seconds even when everything is installed already,
+# so test.py and run.py first check the installed distributions, which takes a few milliseconds.
+import importlib.metadata
+import os
+import re
+
+REQUIREMENTS = os.path.join(os.path.dirname(__file__), "requirements.txt")
+
+
+def missing_requirements(path: str = REQUIREMENTS) -> list[str]:
+    """
+    Finds the lines of a requirements file which aren't satisfied by the installed distributions.
+
+    Only names and version specifiers are checked; a requirement whose name can't be parsed counts as missing.
+
+    :param path: Path of the requirements file.
+    :return: The unsatisfied requirement lines, in file order.
+    """
+    try:
+        from pip._vendor.packaging.requirements import Requirement
+    except ImportError:
+        Requirement = None
+
+    missing = []
+    with open(path) as file:
+        for line in file:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            if Requirement is not None:
+                requirement = Requirement(line)
+                name, specifier = requirement.name, requirement.specifier
+            else:
+                match = re.match(r"[A-Za-z0-9._-]+", line)
+                name, specifier = match and match.group(0), None
+            try:
+                version = importlib.metadata.version(name)
+            except (importlib.metadata.PackageNotFoundError, ValueError):
+                missing.append(line)
+                continue
+            if specifier is not None and not specifier.contains(
+                version, prereleases=True
+            ):
+                missing.append(line)
+    return missing
+
+
+def install_requirements(path: str = REQUIREMENTS) -> list[str]:
+    """
+    Installs a requirements file with pip, unless all of its requirements are satisfied already.
+
+    :param path: Path of the requirements file.
+    :return: The requirements which were missing (and are installed now), empty if pip wasn't run.
+    """
+    missing = missing_requirements(path)
+    if missing:
+        import pip
+
+        pip.main(["install", "-r", path])
+    return missing
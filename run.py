@@ -9,10 +9,10 @@ sys.path.append(os.path.dirname(__file__))
 # Make sure we have the packages we need
 # This is necessary because Blender comes with its own copy of Python
 # running `pip install -r requirements.txt` should enable code-completion in your IDE,
-# but Blender needs to install the requirements itself.
-import pip
+# but Blender needs to install the requirements itself (pip only runs if something is missing).
+from dependencies import install_requirements
 
-pip.main(["install", "-r", f"{os.path.dirname(__file__)}/requirements.txt"])
+install_requirements()
 
 # Add your plugins to the Blender UI
 import assignment2
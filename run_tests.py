@@ -0,0 +1,159 @@
+# Fast test entry point, run with plain Python (not Blender), e.g.
+# python run_tests.py --blender /path/to/blender
+# The Blender-free tests (assignment2.core) run one test case class per worker across a process pool,
+# while a single background Blender runs only the bpy-dependent tests (test.py --bpy-only) at the same time.
+# Use --no-blender to skip those, e.g. on machines without Blender.
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+import traceback
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+# Test modules which only depend on NumPy / SciPy
+CORE_TEST_MODULES = ["assignment2.core.test"]
+
+
+def core_test_cases() -> list[str]:
+    """
+    :return: The dotted names of all test case classes in CORE_TEST_MODULES, the unit of work of the pool.
+    """
+    names = []
+    for module in CORE_TEST_MODULES:
+        suite = unittest.defaultTestLoader.loadTestsFromName(module)
+        for case in suite:
+            for test in case:
+                name = f"{type(test).__module__}.{type(test).__qualname__}"
+                if name not in names:
+                    names.append(name)
+    return names
+
+
+def run_test_case(name: str) -> dict:
+    """
+    Runs one test case class in a worker process.
+    TestResult objects hold tracebacks and test instances, so only plain data is sent back.
+
+    :param name: Dotted name of the test case class.
+    :return: The number of tests run, the failures, errors and skips (as (test, message) pairs) and the time taken.
+    """
+    start = time.perf_counter()
+    result = unittest.TestResult()
+    try:
+        unittest.defaultTestLoader.loadTestsFromName(name).run(result)
+    except Exception:
+        result.errors.append((name, traceback.format_exc()))
+    return {
+        "name": name,
+        "run": result.testsRun,
+        "failures": [(str(test), text) for test, text in result.failures],
+        "errors": [(str(test), text) for test, text in result.errors],
+        "skipped": [(str(test), text) for test, text in result.skipped],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def start_blender(blender: str, verbose: bool) -> subprocess.Popen:
+    """
+    Starts a background Blender which runs only the bpy-dependent tests.
+
+    :param blender: Path (or name on the PATH) of the Blender executable.
+    :param verbose: Whether Blender's unittest runner lists every test.
+    :return: The running process, its output is collected by communicate().
+    """
+    command = [
+        blender,
+        "--background",
+        "--factory-startup",
+        "--python-exit-code",
+        "1",
+        "--python",
+        os.path.join(ROOT, "test.py"),
+        "--",
+        "--bpy-only",
+    ]
+    if verbose:
+        command.append("--verbose")
+    return subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of processes running the Blender-free tests",
+    )
+    parser.add_argument(
+        "--blender",
+        default=os.environ.get("BLENDER", "blender"),
+        help="Blender executable for the bpy tests (default: $BLENDER or blender)",
+    )
+    parser.add_argument(
+        "--no-blender", action="store_true", help="Skip the bpy tests"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    # Blender takes longest to start, so it boots while the pool works
+    blender = None
+    if not args.no_blender:
+        if shutil.which(args.blender) is None:
+            print(
+                f"Blender not found at '{args.blender}', skipping the bpy tests "
+                f"(use --blender or $BLENDER)"
+            )
+        else:
+            blender = start_blender(args.blender, args.verbose)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(run_test_case, core_test_cases()))
+
+    failed = False
+    for result in sorted(results, key=lambda result: -result["seconds"]):
+        problems = result["failures"] + result["errors"]
+        failed |= bool(problems)
+        if args.verbose or problems:
+            print(
+                f"{result['name']}: {result['run']} tests, "
+                f"{len(problems)} failed, {len(result['skipped'])} skipped "
+                f"in {result['seconds']:.2f} s"
+            )
+        for test, text in problems:
+            print(f"{'=' * 70}\nFAIL: {test}\n{'-' * 70}\n{text}")
+    print(
+        f"core: {sum(result['run'] for result in results)} tests in "
+        f"{len(results)} test cases, {args.workers} workers, "
+        f"{time.perf_counter() - start:.2f} s"
+    )
+
+    if blender is not None:
+        output, _ = blender.communicate()
+        if args.verbose or blender.returncode != 0:
+            print(output)
+        else:
+            # The last lines of unittest's report ("Ran N tests in ...", "OK")
+            print("\n".join(output.strip().splitlines()[-3:]))
+        print(
+            f"bpy: exit code {blender.returncode}, "
+            f"{time.perf_counter() - start:.2f} s"
+        )
+        failed |= blender.returncode != 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,43 @@
+# Serves smoothing and plane fitting to tools outside Blender over a Unix socket, run with plain Python, e.g.
+# python serve.py --socket /tmp/assignment2.sock --workers 4
+# Clients connect with assignment2.core.MeshJobClient, see assignment2/core/server.py for the protocol.
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from assignment2.core.server import serve
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--socket",
+        default=os.path.join(tempfile.gettempdir(), "assignment2.sock"),
+        help="Path of the socket file",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of threads running the requests",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=8,
+        help="Number of mesh topologies and Laplacians kept between requests",
+    )
+    args = parser.parse_args(argv)
+    print(f"Serving on {args.socket}")
+    try:
+        asyncio.run(serve(args.socket, args.workers, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -6,16 +6,22 @@ import sys
 # Blender will actually run this in another directory, so we need to make sure everything is available to import
 sys.path.append(os.path.dirname(__file__))
 
-# Make sure we have the packages we need
-import pip
-pip.main(['install', '-r', f'{os.path.dirname(__file__)}/requirements.txt'])
+# Make sure we have the packages we need (pip only runs if something is missing)
+from dependencies import install_requirements
+install_requirements()
 
 # Dealing with contested command line parameters
 # see: https://blender.stackexchange.com/questions/267812/blender-doesnt-recognize-python-as-a-command-line-argument
 argv = [__file__]
 if "--" in sys.argv:
     argv += sys.argv[sys.argv.index("--") + 1:]
+# With --bpy-only the Blender-free core tests are left out, run_tests.py runs those in plain Python processes
+bpy_only = "--bpy-only" in argv
+if bpy_only:
+    argv.remove("--bpy-only")
 
 # Import your package & run its unit tests
 from assignment2 import *
+if not bpy_only:
+    from assignment2.core.test import *
 unittest.main(argv=argv)